@@ -20,7 +20,9 @@
 
 # bookings/admin.py
 from django.contrib import admin
-from .models import Table, Booking
+from .models import (
+    Table, Booking, DailyBookingStats, Job, OpeningHours, ScheduleException, TurnTimeRule,
+    WaitlistEntry)
 
 
 @admin.register(Table)
@@ -35,7 +37,59 @@ class BookingAdmin(admin.ModelAdmin):
                     'number_of_guests', 'status', 'created_at')  # Added 'status'
     list_filter = ('status', 'booking_date', 'booking_time',
                    'table__capacity')  # Added 'status'
-    search_fields = ('user__username', 'table__number')
+    search_fields = ('user__username', 'table__number', 'confirmation_code')
     date_hierarchy = 'booking_date'
     # Allow direct editing of status in admin
     list_editable = ('status',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after',
+                    'locked_by', 'updated_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'booking_date', 'earliest_time', 'latest_time',
+                    'number_of_guests', 'status', 'created_at')
+    list_filter = ('status', 'booking_date')
+    search_fields = ('user__username',)
+    date_hierarchy = 'booking_date'
+    raw_id_fields = ('booking',)
+
+
+@admin.register(OpeningHours)
+class OpeningHoursAdmin(admin.ModelAdmin):
+    list_display = ('weekday', 'opens_at', 'closes_at')
+    list_filter = ('weekday',)
+
+
+@admin.register(ScheduleException)
+class ScheduleExceptionAdmin(admin.ModelAdmin):
+    list_display = ('date', 'is_open', 'starts_at', 'ends_at', 'reason')
+    list_filter = ('is_open',)
+    date_hierarchy = 'date'
+    search_fields = ('reason',)
+
+
+@admin.register(TurnTimeRule)
+class TurnTimeRuleAdmin(admin.ModelAdmin):
+    list_display = ('min_guests', 'max_guests', 'table', 'minutes')
+    list_filter = ('table',)
+
+
+@admin.register(DailyBookingStats)
+class DailyBookingStatsAdmin(admin.ModelAdmin):
+    # Maintained from Booking; see bookings/rollup.py
+    list_display = ('date', 'hour', 'status', 'bookings', 'covers')
+    list_filter = ('status',)
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,73 @@
+# bookings/allocation.py
+from django.db import IntegrityError, transaction
+
+from .models import Table
+from .occupancy import get_turn_times, occupancy, tables_free_at
+
+
+# Two active bookings on the same table must not hold it at the same time
+# (see bookings/occupancy.py). Enforced by the database; see migrations
+# 0006_booking_no_overlap and 0010_turn_times.
+OVERLAP_CONSTRAINT = 'bookings_booking_no_overlap'
+
+
+class NoTableAvailable(Exception):
+    """No table fits the party at that date and time."""
+
+
+class BookingConflict(Exception):
+    """Every free table was taken by a concurrent booking before ours landed."""
+
+
+def is_overlap_error(error):
+    """
+    True for the IntegrityErrors raised when a write would double-book a
+    table: the overlap trigger/exclusion constraint, or the exact-slot
+    unique constraint.
+    """
+    if not isinstance(error, IntegrityError):
+        return False
+    message = str(error)
+    return OVERLAP_CONSTRAINT in message or (
+        'table_id' in message and 'booking_time' in message)
+
+
+def free_tables(booking_date, booking_time, number_of_guests, exclude=None):
+    """
+    Tables big enough for the party that no active booking holds during the
+    party's turn on them, smallest first. ``exclude`` is a booking being
+    moved, which shouldn't block itself.
+    """
+    held = occupancy(booking_date, exclude=exclude)
+    tables = Table.objects.filter(capacity__gte=number_of_guests).order_by('capacity', 'number')
+    return tables_free_at(tables, held, booking_time, number_of_guests)
+
+
+def place_booking(booking):
+    """
+    Save ``booking`` on the smallest free table, holding it for the party's
+    turn time there, and return that table.
+
+    Availability is read once; the database has the final say. If a
+    concurrent request takes the chosen table first, the insert fails on the
+    overlap constraint and the next candidate is tried. Must be called inside
+    ``transaction.atomic()``: each attempt runs in a savepoint.
+    """
+    candidates = list(free_tables(
+        booking.booking_date, booking.booking_time, booking.number_of_guests,
+        exclude=booking if booking.pk else None))
+    if not candidates:
+        raise NoTableAvailable
+    turn_times = get_turn_times()
+    for table in candidates:
+        booking.table = table
+        booking.turn_minutes = turn_times.minutes(table.id, booking.number_of_guests)
+        try:
+            with transaction.atomic():
+                booking.save()
+        except IntegrityError as e:
+            if not is_overlap_error(e):
+                raise
+        else:
+            return table
+    raise BookingConflict
@@ -0,0 +1,273 @@
+# bookings/analytics.py
+"""
+Occupancy, cancellation and demand analytics for the staff pages.
+
+Booking history and the bookings already on the books are read in one
+``values_list`` pass and kept as parallel NumPy column arrays (date, slot,
+guests, status, lead time, turn). Everything else is array arithmetic over
+those columns: a booking's covers are spread over the slots its turn spans
+with a difference array and a cumulative sum, and rates are bincounts, so
+the cost grows with the number of rows only inside NumPy.
+
+Demand forecasts are deliberately simple. For each upcoming day the covers
+already booked are topped up with the share of an average same-weekday
+day's covers that usually arrives later than that many days ahead (the
+"pickup" seen in the history). A day whose busiest slot is expected to fill
+at least SELL_OUT_OCCUPANCY of the seats is flagged as selling out.
+
+The history window stays inside the live Booking table as long as
+BOOKINGS_ANALYTICS_HISTORY_WEEKS is shorter than
+BOOKINGS_ARCHIVE_AFTER_DAYS; archived bookings are not read.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, ExtractMinute, TruncDate
+from django.utils import timezone
+
+from .models import Booking, Table
+
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+STATUSES = [code for code, label in Booking.BOOKING_STATUS_CHOICES]
+CANCELLED = STATUSES.index('cancelled')
+# Lead time buckets in days booked ahead: same day, 1-2, 3-7, 8-14, 15+
+LEAD_TIME_EDGES = [0, 1, 3, 8, 15]
+LEAD_TIME_LABELS = ['Same day', '1-2 days', '3-7 days', '8-14 days', '15+ days']
+# Share of the seats the busiest slot must reach for a day to count as sold out
+SELL_OUT_OCCUPANCY = 0.9
+
+
+def _day_numbers(dates):
+    return np.array(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def _weekdays(day_numbers):
+    # Day 0 of the epoch, 1970-01-01, was a Thursday
+    return (day_numbers + 3) % 7
+
+
+def load_columns(since, until):
+    """
+    Bookings dated from ``since`` up to (not including) ``until`` as a dict
+    of equal-length arrays: ``day`` (days since the epoch), ``slot`` (start
+    slot of the day), ``guests``, ``status`` (index into STATUSES), ``lead``
+    (days booked ahead) and ``turn`` (minutes).
+    """
+    rows = list(Booking.objects.filter(
+        booking_date__gte=since, booking_date__lt=until,
+    ).annotate(
+        hour=ExtractHour('booking_time'),
+        minute=ExtractMinute('booking_time'),
+        booked_on=TruncDate('created_at'),
+    ).values_list('booking_date', 'hour', 'minute', 'number_of_guests', 'status',
+                  'booked_on', 'turn_minutes').order_by())
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return {name: empty for name in ('day', 'slot', 'guests', 'status', 'lead', 'turn')}
+    dates, hours, minutes, guests, statuses, booked_on, turns = zip(*rows)
+    day = _day_numbers(dates)
+    codes, status = np.unique(np.array(statuses), return_inverse=True)
+    return {
+        'day': day,
+        'slot': (np.array(hours) * 60 + np.array(minutes)) // SLOT_MINUTES,
+        'guests': np.array(guests, dtype=np.int64),
+        'status': np.array([STATUSES.index(code) for code in codes])[status],
+        'lead': np.maximum(day - _day_numbers(booked_on), 0),
+        'turn': np.array(turns, dtype=np.int64),
+    }
+
+
+def _slot_covers(rows, rows_index, columns, mask):
+    """
+    Covers seated per slot: a ``rows`` x SLOTS_PER_DAY array where each
+    masked booking adds its guests to row ``rows_index`` for every slot its
+    turn spans.
+    """
+    start = columns['slot'][mask]
+    start_minute = start * SLOT_MINUTES
+    end = np.minimum(-(-(start_minute + columns['turn'][mask]) // SLOT_MINUTES), SLOTS_PER_DAY)
+    guests = columns['guests'][mask]
+    changes = np.zeros((rows, SLOTS_PER_DAY + 1))
+    np.add.at(changes, (rows_index, start), guests)
+    np.add.at(changes, (rows_index, end), -guests)
+    return np.cumsum(changes, axis=1)[:, :SLOTS_PER_DAY]
+
+
+def _ratios(numerators, denominators):
+    numerators = np.asarray(numerators, dtype=float)
+    denominators = np.asarray(denominators, dtype=float)
+    ratios = np.divide(numerators, denominators, out=np.zeros_like(numerators),
+                       where=denominators > 0)
+    return np.where(denominators > 0, ratios, np.nan)
+
+
+def _rounded(values):
+    """Array to nested lists for JSON, with NaN as None."""
+    values = np.round(np.asarray(values, dtype=float), 3)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def occupancy_heatmap(columns, first_day, last_day, seats):
+    """
+    Average share of the seats taken per weekday and slot, over the days
+    from ``first_day`` to ``last_day`` (day numbers, inclusive).
+    Cancelled bookings don't count. Returns a 7 x SLOTS_PER_DAY array.
+    """
+    active = columns['status'] != CANCELLED
+    weekday = _weekdays(columns['day'][active])
+    covers = _slot_covers(7, weekday, columns, active)
+    days_per_weekday = np.bincount(_weekdays(np.arange(first_day, last_day + 1)), minlength=7)
+    per_day = _ratios(covers, days_per_weekday[:, None] * np.ones(SLOTS_PER_DAY))
+    return np.nan_to_num(per_day / seats if seats else per_day * 0)
+
+
+def cancellation_rates(columns):
+    """Share of bookings cancelled: overall, by weekday and by lead time bucket."""
+    cancelled = columns['status'] == CANCELLED
+    weekday = _weekdays(columns['day'])
+    bucket = np.digitize(columns['lead'], LEAD_TIME_EDGES) - 1
+    by_weekday = np.bincount(weekday, minlength=7)
+    by_bucket = np.bincount(bucket, minlength=len(LEAD_TIME_EDGES))
+    return {
+        'overall': _ratios(cancelled.sum(), len(cancelled)),
+        'by_weekday': _ratios(np.bincount(weekday, weights=cancelled, minlength=7), by_weekday),
+        'by_lead_time': _ratios(
+            np.bincount(bucket, weights=cancelled, minlength=len(LEAD_TIME_EDGES)), by_bucket),
+        'bookings_by_lead_time': by_bucket,
+    }
+
+
+def demand_forecast(history, upcoming, first_day, last_day, today, days, seats):
+    """
+    Expected covers per upcoming day and per slot; see the module docstring.
+    ``history`` covers the days ``first_day`` to ``last_day`` (inclusive);
+    ``upcoming`` the ``days`` days from ``today``.
+    """
+    active = history['status'] != CANCELLED
+    weekday = _weekdays(history['day'][active])
+    days_per_weekday = np.bincount(_weekdays(np.arange(first_day, last_day + 1)), minlength=7)
+    daily_covers = np.nan_to_num(_ratios(
+        np.bincount(weekday, weights=history['guests'][active], minlength=7), days_per_weekday))
+    slot_profile = np.nan_to_num(_ratios(
+        _slot_covers(7, weekday, history, active), days_per_weekday[:, None] * np.ones(SLOTS_PER_DAY)))
+
+    # Share of covers booked at least n days ahead, for n = 0 .. days
+    lead = np.minimum(history['lead'][active], days)
+    booked_at = np.bincount(lead, weights=history['guests'][active], minlength=days + 1)
+    total = booked_at.sum()
+    booked_ahead = booked_at[::-1].cumsum()[::-1] / total if total else np.ones(days + 1)
+
+    ahead = np.arange(days)
+    future_weekday = _weekdays(today + ahead)
+    still_to_come = 1 - booked_ahead[ahead]
+
+    on_books = upcoming['status'] != CANCELLED
+    day_index = upcoming['day'][on_books] - today
+    booked_covers = np.bincount(day_index, weights=upcoming['guests'][on_books], minlength=days)
+    booked_slots = _slot_covers(days, day_index, upcoming, on_books)
+
+    expected_covers = booked_covers + still_to_come * daily_covers[future_weekday]
+    expected_slots = booked_slots + still_to_come[:, None] * slot_profile[future_weekday]
+    peak_slot = expected_slots.argmax(axis=1)
+    peak = expected_slots[ahead, peak_slot] / seats if seats else np.zeros(days)
+    return {
+        'day': today + ahead,
+        'on_books': booked_covers,
+        'expected': expected_covers,
+        'peak_occupancy': peak,
+        'peak_slot': peak_slot,
+        'sells_out': peak >= SELL_OUT_OCCUPANCY,
+    }
+
+
+def _slot_label(slot):
+    return f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}"
+
+
+def _busy_slots(heatmap):
+    """The slots from the first to the last one with any occupancy."""
+    busy = np.flatnonzero(heatmap.any(axis=0))
+    if not busy.size:
+        return np.arange(0)
+    return np.arange(busy[0], busy[-1] + 1)
+
+
+def compute_analytics(today=None, weeks=None, days=None):
+    """
+    Heatmap, cancellation rates and forecast as plain JSON-ready data, from
+    ``weeks`` of history before ``today`` and for the ``days`` from it.
+    """
+    today = today or timezone.localdate()
+    weeks = weeks or settings.BOOKINGS_ANALYTICS_HISTORY_WEEKS
+    days = days or settings.BOOKINGS_ANALYTICS_FORECAST_DAYS
+    since = today - timedelta(weeks=weeks)
+    seats = Table.objects.aggregate(seats=Sum('capacity'))['seats'] or 0
+
+    columns = load_columns(since, today + timedelta(days=days))
+    today_number = _day_numbers([today])[0]
+    past = columns['day'] < today_number
+    history = {name: values[past] for name, values in columns.items()}
+    upcoming = {name: values[~past] for name, values in columns.items()}
+    first_day, last_day = today_number - weeks * 7, today_number - 1
+
+    heatmap = occupancy_heatmap(history, first_day, last_day, seats)
+    slots = _busy_slots(heatmap)
+    rates = cancellation_rates(history)
+    forecast = demand_forecast(history, upcoming, first_day, last_day, today_number, days, seats)
+
+    return {
+        'today': today.isoformat(),
+        'history': {
+            'from': since.isoformat(),
+            'to': (today - timedelta(days=1)).isoformat(),
+            'bookings': int(past.sum()),
+        },
+        'seats': seats,
+        'slot_minutes': SLOT_MINUTES,
+        'heatmap': {
+            'weekdays': WEEKDAYS,
+            'slots': [_slot_label(slot) for slot in slots],
+            'occupancy': _rounded(heatmap[:, slots]),
+        },
+        'cancellations': {
+            'overall': _rounded(rates['overall']),
+            'by_weekday': dict(zip(WEEKDAYS, _rounded(rates['by_weekday']))),
+            'by_lead_time': [
+                {'lead_time': label, 'bookings': int(count), 'rate': rate}
+                for label, count, rate in zip(
+                    LEAD_TIME_LABELS, rates['bookings_by_lead_time'],
+                    _rounded(rates['by_lead_time']))
+            ],
+        },
+        'forecast': [
+            {
+                'date': str(np.datetime64(int(day), 'D')),
+                'weekday': WEEKDAYS[int(_weekdays(day))],
+                'on_books': int(on_books),
+                'expected': round(float(expected), 1),
+                'peak_occupancy': round(float(peak), 3),
+                'peak_slot': _slot_label(int(slot)),
+                'sells_out': bool(sells_out),
+            }
+            for day, on_books, expected, peak, slot, sells_out in zip(
+                forecast['day'], forecast['on_books'], forecast['expected'],
+                forecast['peak_occupancy'], forecast['peak_slot'], forecast['sells_out'])
+        ],
+    }
+
+
+def booking_analytics(today=None):
+    """compute_analytics(), cached for BOOKINGS_ANALYTICS_CACHE_TIMEOUT seconds."""
+    today = today or timezone.localdate()
+    key = f'bookings:analytics:{today.isoformat()}'
+    data = cache.get(key)
+    if data is None:
+        data = compute_analytics(today)
+        cache.set(key, data, settings.BOOKINGS_ANALYTICS_CACHE_TIMEOUT)
+    return data
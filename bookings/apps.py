@@ -4,3 +4,56 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.signals import user_logged_out
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+        from .auth import forget_session, forget_user
+        from .availability import forget_booking_date, forget_tables
+        from .db import configure_sqlite
+        from .history import forget_upcoming
+        from .models import Booking, OpeningHours, ScheduleException, Table, TurnTimeRule
+        from .occupancy import forget_turn_times
+        from .rollup import count_booking, remember_stored_state, uncount_booking
+        from .schedule import forget_schedule
+
+        connection_created.connect(configure_sqlite, dispatch_uid='bookings.configure_sqlite')
+
+        # Keep the per-process user cache (bookings/auth.py) in step
+        User = get_user_model()
+        post_save.connect(forget_user, sender=User, dispatch_uid='bookings.forget_user_saved')
+        post_delete.connect(forget_user, sender=User, dispatch_uid='bookings.forget_user_deleted')
+        user_logged_out.connect(forget_session, dispatch_uid='bookings.forget_session')
+
+        # Cached upcoming bookings on My Bookings (bookings/history.py)
+        post_save.connect(forget_upcoming, sender=Booking, dispatch_uid='bookings.forget_upcoming_saved')
+        post_delete.connect(forget_upcoming, sender=Booking, dispatch_uid='bookings.forget_upcoming_deleted')
+
+        # Cached check_availability results (bookings/availability.py)
+        post_save.connect(forget_tables, sender=Table, dispatch_uid='bookings.forget_tables_saved')
+        post_delete.connect(forget_tables, sender=Table, dispatch_uid='bookings.forget_tables_deleted')
+        post_save.connect(forget_booking_date, sender=Booking, dispatch_uid='bookings.forget_booking_date_saved')
+        post_delete.connect(forget_booking_date, sender=Booking, dispatch_uid='bookings.forget_booking_date_deleted')
+
+        # Compiled opening hours (bookings/schedule.py)
+        for model in (OpeningHours, ScheduleException):
+            post_save.connect(forget_schedule, sender=model,
+                              dispatch_uid=f'bookings.forget_schedule_saved_{model.__name__}')
+            post_delete.connect(forget_schedule, sender=model,
+                                dispatch_uid=f'bookings.forget_schedule_deleted_{model.__name__}')
+
+        # Compiled turn time rules (bookings/occupancy.py)
+        post_save.connect(forget_turn_times, sender=TurnTimeRule, dispatch_uid='bookings.forget_turn_times_saved')
+        post_delete.connect(forget_turn_times, sender=TurnTimeRule, dispatch_uid='bookings.forget_turn_times_deleted')
+
+        # Daily booking stats (bookings/rollup.py)
+        pre_save.connect(remember_stored_state, sender=Booking, dispatch_uid='bookings.remember_stored_state')
+        post_save.connect(count_booking, sender=Booking, dispatch_uid='bookings.count_booking')
+        pre_delete.connect(remember_stored_state, sender=Booking, dispatch_uid='bookings.remember_deleted_state')
+        post_delete.connect(uncount_booking, sender=Booking, dispatch_uid='bookings.uncount_booking')
+
+        # Register background job handlers
+        from . import tasks  # noqa: F401
@@ -0,0 +1,105 @@
+# bookings/archive.py
+import heapq
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking
+from .rollup import rollup_paused
+
+
+ARCHIVABLE_STATUSES = ['completed', 'cancelled']
+
+
+def archive_bookings(before=None, batch_size=1000, pause=0.0):
+    """
+    Move finished bookings dated before ``before`` from Booking into
+    ArchivedBooking, oldest first, ``batch_size`` rows at a time.
+
+    Rows are copied before they are deleted and the copy ignores rows that
+    are already archived, so a run that dies halfway (or an archive on a
+    different database, where the two writes can't share a transaction) never
+    loses a booking and can simply be re-run.
+    """
+    if before is None:
+        before = timezone.now().date() - timedelta(days=settings.BOOKINGS_ARCHIVE_AFTER_DAYS)
+    archive_db = router.db_for_write(ArchivedBooking)
+    live_db = router.db_for_write(Booking)
+
+    candidates = Booking.objects.filter(
+        booking_date__lt=before, status__in=ARCHIVABLE_STATUSES,
+    ).select_related('user', 'table').order_by('booking_date', 'id')
+
+    total = 0
+    while True:
+        batch = list(candidates[:batch_size])
+        if not batch:
+            return total
+        with transaction.atomic(using=archive_db), transaction.atomic(using=live_db):
+            ArchivedBooking.objects.using(archive_db).bulk_create(
+                [ArchivedBooking.from_booking(booking) for booking in batch],
+                ignore_conflicts=True)
+            # Archived bookings stay counted in the daily stats
+            with rollup_paused():
+                Booking.objects.filter(id__in=[booking.id for booking in batch]).delete()
+        total += len(batch)
+        if pause:
+            time.sleep(pause)
+
+
+def archived_bookings_for_user(user):
+    return ArchivedBooking.objects.filter(user_id=user.pk).order_by(
+        '-booking_date', '-booking_time')
+
+
+def search_archived_bookings(query=None, status=None, booking_date=None):
+    """The staff booking-list filters, applied to the archive."""
+    archived = ArchivedBooking.objects.order_by('-booking_date', '-booking_time')
+    if query:
+        archived = archived.filter(
+            Q(username__icontains=query) |
+            Q(table_number__icontains=query) |
+            Q(notes__icontains=query) |
+            Q(confirmation_code=query.strip().upper())
+        )
+    if status:
+        archived = archived.filter(status=status)
+    if booking_date:
+        archived = archived.filter(booking_date=booking_date)
+    return archived
+
+
+def _newest_first(booking):
+    return (booking.booking_date, booking.booking_time)
+
+
+class CombinedBookings:
+    """
+    Live and archived bookings as one newest-first sequence, for Paginator.
+
+    Both querysets must already be ordered newest first. A page only fetches
+    up to its last row from each side and merges them, so the archive is
+    read only as deep as the user pages.
+    """
+
+    def __init__(self, live, archived):
+        self.live = live
+        self.archived = archived
+
+    def count(self):
+        return self.live.count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop = index.start or 0, index.stop
+            merged = heapq.merge(
+                self.live[:stop], self.archived[:stop], key=_newest_first, reverse=True)
+            return list(merged)[start:stop]
+        return self[index:index + 1][0]
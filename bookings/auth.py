@@ -0,0 +1,186 @@
+# bookings/auth.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+
+class UserCache:
+    """
+    A small per-process LRU of authenticated users keyed by (session key,
+    user id). Entries expire after BOOKINGS_USER_CACHE_TTL seconds. Changes
+    made in other processes arrive through UserCacheInvalidation rows, read
+    at most every BOOKINGS_USER_CACHE_SYNC_INTERVAL seconds by sync().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # Last UserCacheInvalidation applied, and when to look for more
+        self.synced_up_to = None
+        self.next_sync = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        # Each request gets its own copy to modify
+        return copy.copy(user)
+
+    def set(self, key, user):
+        with self.lock:
+            self.entries[key] = (user, time.monotonic() + settings.BOOKINGS_USER_CACHE_TTL)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.BOOKINGS_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[1] == user_id]:
+                del self.entries[key]
+
+    def discard_session(self, session_key):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == session_key]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.synced_up_to = None
+            self.next_sync = 0.0
+
+    def sync(self):
+        """
+        Drop the users and sessions other processes have invalidated since
+        the last sync, also from the session cache. Ids are assigned in
+        commit order because SQLite serialises writers.
+        """
+        # bookings.auth is also loaded as a cache backend, maybe before the models
+        from .models import UserCacheInvalidation
+
+        now = time.monotonic()
+        with self.lock:
+            if now < self.next_sync:
+                return
+            self.next_sync = now + settings.BOOKINGS_USER_CACHE_SYNC_INTERVAL
+            synced_up_to = self.synced_up_to
+        if synced_up_to is None:
+            # Nothing is cached yet, so earlier invalidations don't matter
+            changes = []
+            latest = UserCacheInvalidation.objects.aggregate(latest=Max('id'))['latest'] or 0
+        else:
+            changes = list(UserCacheInvalidation.objects.filter(id__gt=synced_up_to)
+                           .order_by('id').values_list('id', 'user_id', 'session_key'))
+            latest = changes[-1][0] if changes else synced_up_to
+        for _, user_id, session_key in changes:
+            if user_id:
+                self.discard_user(user_id)
+            if session_key:
+                self.discard_session(session_key)
+                forget_cached_session(session_key)
+        with self.lock:
+            self.synced_up_to = max(latest, self.synced_up_to or 0)
+
+
+user_cache = UserCache()
+
+
+class ShortLivedLocMemCache(LocMemCache):
+    """
+    LocMemCache that never keeps an entry longer than its TIMEOUT, whatever
+    the caller asks for. The cached_db session backend caches sessions for
+    their whole lifetime, which is only safe in a cache every process shares;
+    with a per-process cache this bounds how stale a session (e.g. one
+    logged out in another process) can be.
+    """
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        requested = super().get_backend_timeout(timeout)
+        cap = super().get_backend_timeout(DEFAULT_TIMEOUT)
+        if requested is None:
+            return cap
+        if cap is None:
+            return requested
+        return min(requested, cap)
+
+
+def forget_cached_session(session_key):
+    """Drop a session from this process's session cache, if the engine has one."""
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    prefix = getattr(store, 'cache_key_prefix', None)
+    if prefix:
+        caches[settings.SESSION_CACHE_ALIAS].delete(prefix + session_key)
+
+
+def invalidate(user_id='', session_key=''):
+    """Tell every process to drop a user's or a session's cached entries."""
+    from .models import UserCacheInvalidation
+
+    UserCacheInvalidation.objects.create(user_id=user_id, session_key=session_key)
+    # Older rows only concern entries that have expired by now anyway
+    cutoff = timezone.now() - timedelta(seconds=2 * settings.BOOKINGS_USER_CACHE_TTL)
+    UserCacheInvalidation.objects.filter(created_at__lt=cutoff).delete()
+
+
+def get_user(request):
+    """
+    ``django.contrib.auth.get_user`` with the result cached per session. The
+    first request on a session does the full lookup and session-hash check;
+    later ones skip the User query.
+    """
+    session_key = request.session.session_key
+    user_id = request.session.get(SESSION_KEY)
+    if session_key is None or user_id is None:
+        return auth.get_user(request)
+    key = (session_key, str(user_id))
+    user = user_cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            user_cache.set(key, user)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Drop-in for AuthenticationMiddleware that resolves request.user via the user cache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        # Before the session is loaded, so a logout elsewhere is seen
+        user_cache.sync()
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def forget_user(sender, instance, created=False, update_fields=None, **kwargs):
+    """post_save/post_delete on User: a password, staff flag or active flag may have changed."""
+    user_cache.discard_user(str(instance.pk))
+    # New users aren't cached anywhere, and logging in only touches last_login
+    if not created and set(update_fields or ()) != {'last_login'}:
+        invalidate(user_id=str(instance.pk))
+
+
+def forget_session(sender, request, user, **kwargs):
+    """user_logged_out: the session is about to be flushed."""
+    if request is not None and request.session.session_key:
+        user_cache.discard_session(request.session.session_key)
+        invalidate(session_key=request.session.session_key)
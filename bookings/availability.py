@@ -0,0 +1,97 @@
+# bookings/availability.py
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .models import Table
+from .occupancy import occupancy, tables_free_at
+
+
+# Only confirmed (or already seated) bookings block availability
+BLOCKING_STATUSES = ['confirmed', 'seated']
+
+_TABLES_VERSION_KEY = 'bookings:availability:tables'
+
+
+def _date_version_key(booking_date):
+    return f'bookings:availability:date:{booking_date.isoformat()}'
+
+
+def _bump(key):
+    # add() is a no-op if the key exists; incr() then moves it on atomically
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def invalidate_availability():
+    """
+    Forget every cached availability result. Call once after changing the
+    floor plan; entries are dropped by moving their version on, not by
+    deleting them one by one.
+    """
+    _bump(_TABLES_VERSION_KEY)
+
+
+def invalidate_availability_for_date(booking_date):
+    """Forget cached availability results for one date."""
+    _bump(_date_version_key(booking_date))
+
+
+def forget_tables(sender, instance, **kwargs):
+    """post_save/post_delete on Table."""
+    invalidate_availability()
+
+
+def forget_booking_date(sender, instance, **kwargs):
+    """post_save/post_delete on Booking: its date (and, after an edit, its old date)."""
+    invalidate_availability_for_date(instance.booking_date)
+    previous = getattr(instance, '_loaded_booking_date', None)
+    if previous is not None and previous != instance.booking_date:
+        invalidate_availability_for_date(previous)
+
+
+def _floor_plan(tables_version):
+    key = f'bookings:availability:floorplan:{tables_version}'
+    tables = cache.get(key)
+    if tables is None:
+        tables = list(Table.objects.order_by('capacity', 'number'))
+        cache.set(key, tables, settings.BOOKINGS_AVAILABILITY_CACHE_TIMEOUT)
+    return tables
+
+
+def _occupancy(tables_version, date_version, check_date):
+    key = 'bookings:availability:occupancy:{}:{}:{}'.format(
+        tables_version, date_version, check_date.isoformat())
+    held = cache.get(key)
+    if held is not None:
+        metrics.availability_cache.inc(result='hit')
+        return held
+    metrics.availability_cache.inc(result='miss')
+    held = occupancy(check_date, statuses=BLOCKING_STATUSES)
+    cache.set(key, held, settings.BOOKINGS_AVAILABILITY_CACHE_TIMEOUT)
+    return held
+
+
+def available_tables(check_date, check_time, num_guests):
+    """
+    Tables seating ``num_guests`` that no blocking booking holds during the
+    party's turn from the requested time, smallest first.
+
+    The floor plan and each date's occupancy (bookings/occupancy.py) are
+    cached under the current floor-plan and per-date versions, so every
+    time and party size on a date is answered from one cached entry, a
+    booking change only invalidates its own date and a floor-plan change
+    invalidates everything. Invalidation happens in the process that made
+    the change; other processes catch up within
+    BOOKINGS_AVAILABILITY_CACHE_TIMEOUT seconds unless the default cache is
+    shared.
+    """
+    date_key = _date_version_key(check_date)
+    versions = cache.get_many([_TABLES_VERSION_KEY, date_key])
+    tables_version = versions.get(_TABLES_VERSION_KEY, 0)
+    held = _occupancy(tables_version, versions.get(date_key, 0), check_date)
+    return tables_free_at(_floor_plan(tables_version), held, check_time, num_guests)
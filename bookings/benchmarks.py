@@ -0,0 +1,195 @@
+# bookings/benchmarks.py
+import statistics
+import time as clock
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .models import Booking, Table
+from .seeding import SEED_USERNAME_PREFIX, seed_bookings
+
+
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000]
+BENCHMARK_TABLES = 30
+BENCHMARK_USERS = 1000
+# Seeded bookings run this far ahead; new bookings are made beyond it so
+# every make/edit request succeeds instead of hitting a full evening
+SEEDED_DAYS_AHEAD = 30
+
+
+class BenchmarkFixture:
+    """
+    Logged-in clients and a booking to edit, on top of freshly seeded data.
+
+    The guest is a mid-ranked seed user: seed users book with a long-tailed
+    frequency, so the first few have an unrepresentative history.
+    """
+
+    def __init__(self):
+        self.today = timezone.now().date()
+        self.guest = User.objects.get(
+            username=f'{SEED_USERNAME_PREFIX}{BENCHMARK_USERS // 2:06d}')
+        self.staff = User.objects.create_user(
+            username='benchmark-staff', is_staff=True)
+        self.guest_client = Client()
+        self.guest_client.force_login(self.guest)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.editable = Booking.objects.create(
+            user=self.guest,
+            table=Table.objects.order_by('-capacity').first(),
+            booking_date=self.today + timedelta(days=SEEDED_DAYS_AHEAD + 500),
+            booking_time='19:00', number_of_guests=2, status='confirmed')
+
+    def future_day(self, offset):
+        return (self.today + timedelta(days=offset)).isoformat()
+
+
+def _make_booking(fixture, n):
+    return fixture.guest_client.post(reverse('make_booking'), {
+        'booking_date': fixture.future_day(SEEDED_DAYS_AHEAD + 1 + n),
+        'booking_time': '19:00' if n % 2 else '12:30',
+        'number_of_guests': 2,
+    })
+
+
+def _edit_booking(fixture, n):
+    return fixture.guest_client.post(
+        reverse('edit_booking', args=[fixture.editable.id]), {
+            'booking_date': fixture.future_day(SEEDED_DAYS_AHEAD + 1000 + n),
+            'booking_time': '19:00',
+            'number_of_guests': 2,
+        })
+
+
+def _check_availability(fixture, n):
+    return fixture.guest_client.post(reverse('check_availability'), {
+        'check_date': fixture.future_day(1 + n % SEEDED_DAYS_AHEAD),
+        'check_time': '19:00',
+        'num_guests': 2,
+    })
+
+
+def _my_bookings(fixture, n):
+    return fixture.guest_client.get(reverse('my_bookings'))
+
+
+def _staff_booking_list(fixture, n):
+    return fixture.staff_client.get(reverse('staff_booking_list'))
+
+
+def _staff_dashboard(fixture, n):
+    return fixture.staff_client.get(reverse('staff_dashboard'))
+
+
+SCENARIOS = {
+    'make_booking': _make_booking,
+    'edit_booking': _edit_booking,
+    'check_availability': _check_availability,
+    'my_bookings': _my_bookings,
+    'staff_booking_list': _staff_booking_list,
+    'staff_dashboard': _staff_dashboard,
+}
+
+
+def _summarise(timings, query_counts, statuses):
+    timings_ms = [seconds * 1000 for seconds in timings]
+    if len(timings_ms) > 1:
+        cut_points = statistics.quantiles(timings_ms, n=20, method='inclusive')
+        p50, p95 = cut_points[9], cut_points[18]
+    else:
+        p50 = p95 = timings_ms[0]
+    return {
+        'iterations': len(timings_ms),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'mean_ms': round(statistics.fmean(timings_ms), 3),
+        'queries': max(query_counts),
+        'status_codes': sorted(set(statuses)),
+    }
+
+
+def run_scenario(fixture, scenario, iterations, warmup=3):
+    """Time ``iterations`` requests after ``warmup`` untimed ones."""
+    for n in range(warmup):
+        scenario(fixture, iterations + n)
+    timings, query_counts, statuses = [], [], []
+    for n in range(iterations):
+        with CaptureQueriesContext(connection) as queries:
+            started = clock.perf_counter()
+            response = scenario(fixture, n)
+            timings.append(clock.perf_counter() - started)
+        query_counts.append(len(queries))
+        statuses.append(response.status_code)
+    return _summarise(timings, query_counts, statuses)
+
+
+def benchmark_size(size, iterations, views=None, warmup=3, seed=0):
+    """
+    Seed ``size`` bookings into the current (empty, disposable) database and
+    time each view. Returns ``{view: stats}``.
+    """
+    seed_bookings(tables=BENCHMARK_TABLES, users=BENCHMARK_USERS, bookings=size,
+                  days_ahead=SEEDED_DAYS_AHEAD, seed=seed)
+    fixture = BenchmarkFixture()
+    return {
+        name: run_scenario(fixture, SCENARIOS[name], iterations, warmup)
+        for name in (views or SCENARIOS)
+    }
+
+
+def compare_results(results, baseline, threshold=0.25):
+    """
+    Regressions in ``results`` against ``baseline`` (both as written by the
+    benchmark command): p95 latency more than ``threshold`` slower, or any
+    increase in query count. Sizes or views missing from either are skipped.
+    """
+    regressions = []
+    for size, views in results['results'].items():
+        for view, stats in views.items():
+            before = baseline.get('results', {}).get(size, {}).get(view)
+            if not before:
+                continue
+            if stats['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f"{view} @ {size}: p95 {before['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+            if stats['queries'] > before['queries']:
+                regressions.append(
+                    f"{view} @ {size}: queries {before['queries']} -> {stats['queries']}")
+    return regressions
+
+
+# Public pages timed by `manage.py benchmark_templates`: (label, URL name, signed in)
+RENDER_PAGES = [
+    ('home (guest)', 'home', False),
+    ('home (signed in)', 'home', True),
+    ('check_availability (guest)', 'check_availability', False),
+    ('check_availability (signed in)', 'check_availability', True),
+]
+
+
+def time_render(url_name, signed_in, iterations, warmup=3):
+    """
+    Time GETs of a page that needs no database, calling its view directly so
+    the figures are template rendering alone, without middleware.
+    """
+    path = reverse(url_name)
+    view = resolve(path).func
+    user = User(pk=0, username='benchmark-guest') if signed_in else AnonymousUser()
+    factory = RequestFactory()
+    timings, statuses = [], []
+    for n in range(warmup + iterations):
+        request = factory.get(path)
+        request.user = user
+        started = clock.perf_counter()
+        response = view(request)
+        elapsed = clock.perf_counter() - started
+        if n >= warmup:
+            timings.append(elapsed)
+            statuses.append(response.status_code)
+    return _summarise(timings, [0], statuses)
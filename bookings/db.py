@@ -0,0 +1,75 @@
+# bookings/db.py
+import functools
+import logging
+import random
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_ERROR_MESSAGES = ('database is locked', 'database table is locked')
+_PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    ``connection_created`` hook: apply SQLITE_PRAGMAS to every new SQLite
+    connection (WAL journal, synchronous level, busy timeout, cache and mmap
+    sizes). Other database vendors are left alone.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not _PRAGMA_NAME.match(name):
+                raise ValueError(f"Invalid SQLite pragma name: {name!r}")
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(
+        message in str(error) for message in LOCK_ERROR_MESSAGES)
+
+
+def retry_on_lock(func):
+    """
+    Re-run a write transaction that failed because the database was locked,
+    up to BOOKINGS_DB_LOCK_RETRIES more times with jittered exponential
+    backoff. The wrapped function must open its own ``transaction.atomic()``
+    block; inside someone else's transaction there is nothing safe to retry,
+    so the error is raised straight away.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.BOOKINGS_DB_LOCK_RETRIES
+        delay = settings.BOOKINGS_DB_LOCK_RETRY_DELAY
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if (not is_lock_error(e) or attempt == retries
+                        or connection.in_atomic_block):
+                    raise
+                logger.info("Database locked in %s, retry %d of %d",
+                            func.__name__, attempt + 1, retries)
+                time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
+
+
+def copy_sqlite_database(source, target, pages=1024):
+    """
+    Copy the SQLite database at ``source`` over ``target`` with SQLite's
+    online backup API: writers on the source only wait for each batch of
+    ``pages``, and readers of the target see either the old or the new copy.
+    """
+    timeout = settings.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000
+    with closing(sqlite3.connect(source, timeout=timeout)) as src, \
+            closing(sqlite3.connect(target, timeout=timeout)) as dst:
+        src.backup(dst, pages=pages)
@@ -0,0 +1,54 @@
+# bookings/emails.py
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+
+from .jobs import enqueue
+
+
+BOOKING_EMAIL_SUBJECTS = {
+    'confirmed': "Your booking is confirmed",
+    'updated': "Your booking has been updated",
+    'cancelled': "Your booking has been cancelled",
+    'waitlist': "A table opened up for you",
+}
+
+
+def build_booking_email(booking, kind):
+    """Render the guest email for a booking event as a job payload."""
+    return {
+        'subject': BOOKING_EMAIL_SUBJECTS[kind],
+        'body': render_to_string(f'bookings/emails/booking_{kind}.txt', {'booking': booking}),
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'to': [booking.user.email],
+    }
+
+
+def queue_booking_email(booking, kind):
+    """
+    Queue the guest email for a booking event. The job row is written in the
+    caller's transaction, so workers only see it once the booking commits and
+    never for a booking that was rolled back. The message is rendered now so
+    the worker doesn't need to load the booking again.
+    """
+    if not booking.user.email:
+        return None
+    return enqueue('send_booking_email', build_booking_email(booking, kind))
+
+
+def send_batch(payloads):
+    """
+    Send a batch of rendered emails over a single connection. Returns one
+    entry per payload: None once it is sent, or the exception that stopped
+    it, so retrying a failure doesn't resend the rest of the batch.
+    """
+    outcomes = []
+    with get_connection() as connection:
+        for payload in payloads:
+            try:
+                connection.send_messages([EmailMessage(**payload)])
+            except Exception as error:
+                outcomes.append(error)
+            else:
+                outcomes.append(None)
+    return outcomes
@@ -0,0 +1,107 @@
+# bookings/floorplan.py
+import csv
+import io
+import json
+import os
+
+from django.db import transaction
+
+from .availability import invalidate_availability
+from .models import Table
+
+
+class FloorPlanError(Exception):
+    """A floor plan that can't be imported; ``errors`` lists every problem found."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+def _positive_int(value):
+    number = int(str(value).strip())
+    if number < 1:
+        raise ValueError(value)
+    return number
+
+
+def _read_rows(text, format):
+    if format == 'json':
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get('tables')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise FloorPlanError(
+                ['Expected a list of tables, e.g. [{"number": 1, "capacity": 4}].'])
+        return data
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or not {'number', 'capacity'} <= set(reader.fieldnames):
+        raise FloorPlanError(['The CSV needs a header row with "number" and "capacity".'])
+    return list(reader)
+
+
+def parse_floor_plan(content, format=None, filename=None):
+    """
+    Read a floor plan from CSV (a ``number,capacity`` header row) or JSON
+    (a list of ``{"number": .., "capacity": ..}`` objects, optionally under
+    a ``"tables"`` key). ``format`` defaults to the file extension, then to
+    sniffing the content. Returns ``{number: capacity}``; raises
+    FloorPlanError listing every bad row.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if format is None and filename:
+        format = os.path.splitext(filename)[1].lstrip('.').lower() or None
+    if format is None:
+        format = 'json' if content.lstrip()[:1] in ('[', '{') else 'csv'
+    if format not in ('csv', 'json'):
+        raise FloorPlanError([f'Unsupported floor plan format "{format}"; use CSV or JSON.'])
+    try:
+        rows = _read_rows(content, format)
+    except (ValueError, csv.Error) as e:
+        raise FloorPlanError([f'Could not read the floor plan: {e}']) from e
+
+    tables, errors = {}, []
+    for line, row in enumerate(rows, start=1):
+        try:
+            number = _positive_int(row.get('number'))
+            capacity = _positive_int(row.get('capacity'))
+        except (TypeError, ValueError):
+            errors.append(f'Row {line}: number and capacity must be whole numbers of 1 or more.')
+            continue
+        if number in tables:
+            errors.append(f'Row {line}: table {number} appears more than once.')
+            continue
+        tables[number] = capacity
+    if errors:
+        raise FloorPlanError(errors)
+    if not tables:
+        raise FloorPlanError(['The floor plan has no tables.'])
+    return tables
+
+
+def import_floor_plan(tables):
+    """
+    Create or resize tables from ``{number: capacity}`` in one transaction:
+    one query finds the existing tables, then a bulk insert and a bulk
+    update apply the changes. Tables missing from the plan are left alone
+    (they may have bookings). Cached availability is invalidated once, after
+    the commit. Returns counts of created, updated and unchanged tables.
+    """
+    with transaction.atomic():
+        existing = Table.objects.select_for_update().in_bulk(list(tables), field_name='number')
+        to_create, to_update, unchanged = [], [], 0
+        for number, capacity in sorted(tables.items()):
+            table = existing.get(number)
+            if table is None:
+                to_create.append(Table(number=number, capacity=capacity))
+            elif table.capacity != capacity:
+                table.capacity = capacity
+                to_update.append(table)
+            else:
+                unchanged += 1
+        Table.objects.bulk_create(to_create)
+        Table.objects.bulk_update(to_update, ['capacity'])
+        if to_create or to_update:
+            transaction.on_commit(invalidate_availability)
+    return {'created': len(to_create), 'updated': len(to_update), 'unchanged': unchanged}
@@ -1,14 +1,21 @@
 # bookings/forms.py
 from datetime import datetime, time
-from .models import Table, Booking
+from .models import Table, Booking, WaitlistEntry
 from django import forms
 from django.utils import timezone
 from datetime import date, time, datetime, timedelta
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.conf import settings
 from django.contrib.auth.models import User
 from django import forms
 from datetime import date, time
 
+from .floorplan import FloorPlanError, parse_floor_plan
+from .schedule import get_schedule, hours_message, is_open
+
+
+MAX_FLOOR_PLAN_BYTES = 1024 * 1024
+
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
@@ -39,24 +46,77 @@ class BookingForm(forms.ModelForm):
                 # Instead of raising a form-wide error, attach the error to 'booking_date' field
                 self.add_error(
                     'booking_date', "Booking date cannot be in the past.")
+            if not is_open(booking_date, booking_time):
+                self.add_error('booking_time', hours_message(
+                    booking_date, "Booking time must be between {hours}."))
 
         return cleaned_data
 
-    def clean_booking_time(self):
-        booking_time = self.cleaned_data.get('booking_time')
-        if booking_time and not time(9, 0) <= booking_time <= time(22, 0):
-            raise forms.ValidationError(
-                "Booking time must be between 9:00 AM and 10:00 PM.")
-        return booking_time
-        
+
+class WaitlistForm(forms.ModelForm):
+    """Join the waitlist for a date, at any time within a window."""
+    number_of_guests = forms.IntegerField(
+        min_value=1,
+        error_messages={'min_value': 'Number of guests must be at least 1.'},
+        widget=forms.HiddenInput,
+    )
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['booking_date', 'earliest_time', 'latest_time', 'number_of_guests', 'notes']
+        widgets = {
+            'booking_date': forms.HiddenInput,
+            'notes': forms.HiddenInput,
+            'earliest_time': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}),
+            'latest_time': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}),
+        }
+        labels = {
+            'earliest_time': 'Any time from',
+            'latest_time': 'Until',
+        }
+
+    @classmethod
+    def for_booking(cls, cleaned_data):
+        """An unbound form offering a window around a booking that found no table."""
+        booking_date = cleaned_data['booking_date']
+        requested = datetime.combine(booking_date, cleaned_data['booking_time'])
+        window = timedelta(minutes=settings.BOOKINGS_WAITLIST_WINDOW_MINUTES)
+        # The booking form only accepts open times, so there is a period
+        # unless the hours changed in between
+        opens_at, closes_at = (get_schedule().period_at(booking_date, requested.time())
+                               or (requested.time(), requested.time()))
+        return cls(initial={
+            'booking_date': booking_date,
+            'earliest_time': max(requested - window, datetime.combine(booking_date, opens_at)).time(),
+            'latest_time': min(requested + window, datetime.combine(booking_date, closes_at)).time(),
+            'number_of_guests': cleaned_data['number_of_guests'],
+            'notes': cleaned_data.get('notes'),
+        })
+
+    def clean(self):
+        cleaned_data = super().clean()
+        booking_date = cleaned_data.get('booking_date')
+        earliest_time = cleaned_data.get('earliest_time')
+        latest_time = cleaned_data.get('latest_time')
+
+        if earliest_time and latest_time:
+            if earliest_time > latest_time:
+                self.add_error('latest_time', "The window must end after it starts.")
+            elif booking_date and not get_schedule().is_open_between(
+                    booking_date, earliest_time, latest_time):
+                raise forms.ValidationError(hours_message(
+                    booking_date, "Restaurant is open from {hours}.", joiner=' to '))
+            elif booking_date and timezone.make_aware(
+                    datetime.combine(booking_date, latest_time)) < timezone.now():
+                self.add_error('latest_time', "The waitlist window has already passed.")
+        return cleaned_data
 
 
 class AvailabilityForm(forms.Form):
     check_date = forms.DateField(
         label='Date',
         widget=forms.DateInput(
-            attrs={'type': 'date', 'min': date.today().isoformat(), 'class': 'form-control'}),
-        initial=date.today()
+            attrs={'type': 'date', 'class': 'form-control'})
     )
     check_time = forms.TimeField(
         label='Time',
@@ -72,6 +132,15 @@ class AvailabilityForm(forms.Form):
         initial=2
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Worked out per form rather than once at import, so a long-running
+        # process doesn't keep offering yesterday as the earliest date
+        today = timezone.localdate()
+        self.min_date = today.isoformat()
+        self.fields['check_date'].initial = today
+        self.fields['check_date'].widget.attrs['min'] = self.min_date
+
     def clean(self):
         cleaned_data = super().clean()
         check_date = cleaned_data.get('check_date')
@@ -89,9 +158,9 @@ class AvailabilityForm(forms.Form):
                     "You cannot check availability for a past date and time.")
 
             # Restaurant hours validation
-            if not (time(9, 0) <= check_time <= time(22, 0)):
-                raise forms.ValidationError(
-                    "Restaurant is open from 9:00 AM to 10:00 PM.")
+            if not is_open(check_date, check_time):
+                raise forms.ValidationError(hours_message(
+                    check_date, "Restaurant is open from {hours}.", joiner=' to '))
 
         return cleaned_data
 
@@ -109,6 +178,19 @@ class BookingStatusUpdateForm(forms.ModelForm):
         }
 
 
+class CheckInForm(forms.Form):
+    code = forms.CharField(
+        label='Confirmation Code',
+        max_length=Booking._meta.get_field('confirmation_code').max_length,
+        widget=forms.TextInput(
+            attrs={'class': 'form-control', 'autofocus': True, 'autocomplete': 'off'}),
+    )
+
+    def clean_code(self):
+        # Scanners and guests reading codes aloud don't care about case or spacing
+        return self.cleaned_data['code'].strip().upper()
+
+
 class TableForm(forms.ModelForm):
     capacity = forms.IntegerField(
         min_value=1,
@@ -119,13 +201,28 @@ class TableForm(forms.ModelForm):
     class Meta:
         model = Table
         fields = ['number', 'capacity']
+        # The model's unique check (one query, excluding the table being
+        # edited) reports duplicates
+        error_messages = {
+            'number': {'unique': "Table with this Table Number already exists."},
+        }
+
 
-    def clean_number(self):
-        number = self.cleaned_data.get('number')
-        if Table.objects.filter(number=number).exists():
-            raise forms.ValidationError(
-                "Table with this Table Number already exists.")
-        return number
+class FloorPlanImportForm(forms.Form):
+    floor_plan = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}),
+        help_text="CSV with a number,capacity header, or JSON [{\"number\": 1, \"capacity\": 4}, ...].")
+
+    def clean_floor_plan(self):
+        upload = self.cleaned_data['floor_plan']
+        if upload.size > MAX_FLOOR_PLAN_BYTES:
+            raise forms.ValidationError("Floor plan files are limited to 1 MB.")
+        try:
+            return parse_floor_plan(upload.read(), filename=upload.name)
+        except UnicodeDecodeError:
+            raise forms.ValidationError("The floor plan must be UTF-8 text.")
+        except FloorPlanError as e:
+            raise forms.ValidationError(e.errors)
 
 
 # from django import forms
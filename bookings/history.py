@@ -0,0 +1,135 @@
+# bookings/history.py
+import heapq
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, F, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .archive import archived_bookings_for_user
+from .models import Booking
+
+
+PAST_BOOKINGS_PAGE_SIZE = 20
+_CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Set on a browser that just changed its bookings. forget_upcoming only
+# reaches the cache of the process that made the change, so until other
+# processes' copies have expired that browser reads from the database.
+FRESH_UPCOMING_COOKIE = 'bookings_fresh_upcoming'
+
+
+def upcoming_cache_key(user_id, today):
+    return f"bookings:upcoming:{user_id}:{today.isoformat()}"
+
+
+def forget_upcoming(sender, instance, **kwargs):
+    """post_save/post_delete on Booking: drop the owner's cached upcoming list."""
+    cache.delete(upcoming_cache_key(instance.user_id, timezone.localdate()))
+
+
+def mark_upcoming_changed(response):
+    """Have this browser skip cached upcoming bookings for a while; returns the response."""
+    response.set_cookie(
+        FRESH_UPCOMING_COOKIE, '1', max_age=settings.BOOKINGS_UPCOMING_CACHE_TIMEOUT,
+        httponly=True, samesite='Lax')
+    return response
+
+
+def _history_key(booking):
+    # Archived rows keep the id they had in the live table
+    return (booking.booking_date, booking.booking_time,
+            booking.original_id if booking.is_archived else booking.id)
+
+
+def encode_cursor(booking):
+    """Opaque-enough ``?before=`` value: the position of the last row shown."""
+    booking_date, booking_time, booking_id = _history_key(booking)
+    moment = datetime.combine(booking_date, booking_time)
+    return f"{moment.strftime(_CURSOR_FORMAT)}_{booking_id}"
+
+
+def decode_cursor(value):
+    """(date, time, id) from ``encode_cursor``, or None if it doesn't parse."""
+    try:
+        moment, booking_id = value.rsplit('_', 1)
+        moment = datetime.strptime(moment, _CURSOR_FORMAT)
+        return moment.date(), moment.time(), int(booking_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _before(cursor, id_field='id'):
+    """Rows strictly older than the cursor in (date, time, id) order."""
+    if cursor is None:
+        return Q()
+    booking_date, booking_time, booking_id = cursor
+    return (Q(booking_date__lt=booking_date)
+            | Q(booking_date=booking_date, booking_time__lt=booking_time)
+            | Q(booking_date=booking_date, booking_time=booking_time,
+                **{f'{id_field}__lt': booking_id}))
+
+
+def _both_sections(user, today, cursor, limit):
+    """
+    Upcoming bookings and the first ``limit`` past ones in a single query: a
+    row number over the past rows (newest first) caps that section in SQL.
+    """
+    is_upcoming = Case(When(booking_date__gte=today, then=Value(True)),
+                       default=Value(False), output_field=BooleanField())
+    rows = Booking.objects.filter(user=user).filter(
+        Q(booking_date__gte=today) | (Q(booking_date__lt=today) & _before(cursor))
+    ).select_related('table').annotate(
+        past_rank=Window(
+            RowNumber(), partition_by=[is_upcoming],
+            order_by=[F('booking_date').desc(), F('booking_time').desc(), F('id').desc()]),
+    ).annotate(
+        section_rank=Case(When(booking_date__gte=today, then=Value(0)), default=F('past_rank')),
+    ).filter(section_rank__lte=limit).order_by('booking_date', 'booking_time', 'id')
+    upcoming, past = [], []
+    for booking in rows:
+        (upcoming if booking.booking_date >= today else past).append(booking)
+    past.reverse()
+    return upcoming, past
+
+
+def _past_only(user, today, cursor, limit):
+    return list(Booking.objects.filter(
+        _before(cursor), user=user, booking_date__lt=today,
+    ).select_related('table').order_by('-booking_date', '-booking_time', '-id')[:limit])
+
+
+def my_bookings_sections(user, cursor=None, include_archived=False,
+                         page_size=PAST_BOOKINGS_PAGE_SIZE, fresh=False):
+    """
+    What the My Bookings page shows: ``(upcoming, past, next_cursor)``.
+
+    Upcoming bookings are cached per user until they make, edit or cancel a
+    booking; ``fresh`` reads them from the database (and re-caches them)
+    regardless. Past bookings come a page at a time, newest first, keyed on
+    (date, time, id) so deep pages cost the same as the first one;
+    ``next_cursor`` is None on the last page. With ``include_archived`` the
+    user's archived history is merged in.
+    """
+    today = timezone.localdate()
+    key = upcoming_cache_key(user.pk, today)
+    # One row beyond the page tells us whether there is another page
+    limit = page_size + 1
+
+    upcoming = None if fresh else cache.get(key)
+    if upcoming is None:
+        upcoming, past = _both_sections(user, today, cursor, limit)
+        cache.set(key, upcoming, settings.BOOKINGS_UPCOMING_CACHE_TIMEOUT)
+    else:
+        past = _past_only(user, today, cursor, limit)
+
+    if include_archived:
+        archived = archived_bookings_for_user(user).filter(
+            _before(cursor, id_field='original_id')).order_by(
+            '-booking_date', '-booking_time', '-original_id')[:limit]
+        past = list(heapq.merge(past, archived, key=_history_key, reverse=True))[:limit]
+
+    next_cursor = encode_cursor(past[page_size - 1]) if len(past) > page_size else None
+    return upcoming, past[:page_size], next_cursor
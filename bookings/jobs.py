@@ -0,0 +1,291 @@
+# bookings/jobs.py
+"""
+A small database-backed job queue for booking side effects (emails, PDFs,
+rollups). Jobs are rows in the ``Job`` table, so enqueueing inside a booking
+transaction is atomic with the booking itself and needs no external broker.
+
+Handlers are registered with ``@register('kind')`` (see ``bookings/tasks.py``)
+and run by ``manage.py run_jobs``.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobType:
+    """Registry entry describing how jobs of one kind are run."""
+
+    def __init__(self, kind, handler, concurrency=None, batch_size=1, max_attempts=5):
+        self.kind = kind
+        self.handler = handler
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        # Caps how many threads of *this* process run the kind at once
+        self.semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+
+registry = {}
+
+
+def register(kind, concurrency=None, batch_size=1, max_attempts=5):
+    """
+    Register a handler for a job kind.
+
+    Handlers take a job's payload dict. With ``batch_size > 1`` the handler
+    instead receives a list of payloads, so it can share expensive setup such
+    as an SMTP connection. A batch handler may return a list with one entry
+    per payload, the exception for each one that failed (None otherwise), so
+    only those jobs are retried; raising fails the whole batch.
+
+    ``concurrency`` limits how many workers may be running jobs of this kind
+    at once.
+    """
+    def decorator(func):
+        registry[kind] = JobType(kind, func, concurrency, batch_size, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, run_after=None, max_attempts=None):
+    """
+    Add a job. Call it inside the transaction that causes the side effect:
+    the job only becomes visible to workers when that transaction commits.
+    """
+    job_type = registry.get(kind)
+    if job_type is None:
+        raise KeyError(f"No job handler registered for '{kind}'.")
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or job_type.max_attempts,
+    )
+    if settings.BOOKINGS_JOBS_EAGER:
+        transaction.on_commit(lambda: run_jobs([job], job_type))
+    return job
+
+
+def _due(now):
+    # Queued jobs that are due, plus running jobs whose worker lost its lease
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def _busy_workers(kind, now):
+    # Each worker holding a lease counts once, whatever its batch size
+    return Job.objects.filter(
+        kind=kind, status='running', locked_until__gte=now,
+    ).values('locked_by').distinct().count()
+
+
+def claim(kind, worker_id, limit=1):
+    """
+    Lease up to ``limit`` due jobs of one kind for ``worker_id``.
+
+    On backends with ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL,
+    MySQL 8) concurrent workers skip each other's rows. SQLite has no row
+    locks, so there the lease is taken with a single ``UPDATE ... WHERE id IN
+    (SELECT ... LIMIT n)`` statement; SQLite runs it under its write lock,
+    and a job another worker leased first no longer matches.
+
+    For kinds with a ``concurrency`` limit, the count of busy workers is
+    taken in the same transaction as the lease. Idle polls stay out of the
+    write lock: the transaction is only opened after a plain read found a
+    due job and a free slot.
+    """
+    job_type = registry[kind]
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.BOOKINGS_JOBS_LEASE_SECONDS)
+
+    candidates = Job.objects.filter(_due(now), kind=kind).order_by('run_after', 'id')
+    lease = dict(
+        status='running',
+        locked_by=worker_id,
+        locked_until=lease_until,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+
+    # Opening the transaction takes SQLite's write lock (transaction_mode
+    # IMMEDIATE), so don't compete with booking writes just to find nothing
+    if not candidates.exists():
+        return []
+    if job_type.concurrency and _busy_workers(kind, now) >= job_type.concurrency:
+        return []
+
+    with transaction.atomic():
+        if job_type.concurrency:
+            # The count and the lease must happen under one lock, or two
+            # workers can both see a free slot. SQLite already holds its write
+            # lock (transaction_mode IMMEDIATE); elsewhere the kind's oldest
+            # row serves as a per-kind lock.
+            if connection.features.has_select_for_update:
+                list(Job.objects.filter(kind=kind).order_by('id')
+                     .select_for_update().values_list('id', flat=True)[:1])
+            if _busy_workers(kind, now) >= job_type.concurrency:
+                return []
+
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(candidates.select_for_update(skip_locked=True)
+                       .values_list('id', flat=True)[:limit])
+            if not ids:
+                return []
+            Job.objects.filter(id__in=ids).update(**lease)
+        else:
+            claimed = Job.objects.filter(
+                _due(now), id__in=candidates.values('id')[:limit]).update(**lease)
+            if not claimed:
+                return []
+        return list(Job.objects.filter(
+            kind=kind, status='running', locked_by=worker_id, locked_until=lease_until))
+
+
+def _retry_delay(attempts):
+    base = settings.BOOKINGS_JOBS_RETRY_BACKOFF
+    return min(base * (2 ** (attempts - 1)), settings.BOOKINGS_JOBS_RETRY_BACKOFF_MAX)
+
+
+def _record_failure(job, error, now):
+    """Re-queue a failed job with backoff, or give up once it is out of attempts."""
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status='failed', last_error=error, locked_by='',
+            locked_until=None, updated_at=now)
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status='queued', last_error=error, locked_by='', locked_until=None,
+            run_after=now + timedelta(seconds=_retry_delay(job.attempts)),
+            updated_at=now)
+
+
+def run_jobs(jobs, job_type=None):
+    """
+    Run leased jobs of one kind and record the outcome on each row.
+    Returns True if every job succeeded.
+    """
+    if not jobs:
+        return True
+    job_type = job_type or registry[jobs[0].kind]
+    errors = {}
+    if job_type.batch_size > 1:
+        try:
+            outcomes = job_type.handler([job.payload for job in jobs])
+        except Exception:
+            logger.exception("Job(s) %s of kind '%s' failed.",
+                             [job.pk for job in jobs], job_type.kind)
+            error = traceback.format_exc()
+            errors = {job.pk: error for job in jobs}
+        else:
+            # Only the payloads the handler reports as failed are retried
+            for job, outcome in zip(jobs, outcomes or []):
+                if isinstance(outcome, Exception):
+                    logger.error("Job %s of kind '%s' failed.", job.pk, job_type.kind,
+                                 exc_info=outcome)
+                    errors[job.pk] = ''.join(traceback.format_exception(outcome))
+    else:
+        for job in jobs:
+            try:
+                job_type.handler(job.payload)
+            except Exception:
+                logger.exception("Job %s of kind '%s' failed.", job.pk, job_type.kind)
+                errors[job.pk] = traceback.format_exc()
+
+    now = timezone.now()
+    for job in jobs:
+        if job.pk in errors:
+            _record_failure(job, errors[job.pk], now)
+    Job.objects.filter(pk__in=[job.pk for job in jobs if job.pk not in errors]).update(
+        status='done', locked_by='', locked_until=None, updated_at=now)
+    return not errors
+
+
+def prune_jobs(older_than_days=None):
+    """Delete finished jobs older than the retention period."""
+    days = older_than_days if older_than_days is not None else settings.BOOKINGS_JOBS_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status='done', updated_at__lt=cutoff).delete()
+    return deleted
+
+
+class Worker:
+    """
+    Runs registered jobs on a pool of threads until stopped.
+
+    Each thread round-robins over the job kinds, leasing a batch of whichever
+    kind is due and has spare concurrency. In ``burst`` mode the worker
+    returns once there is nothing left to do.
+    """
+
+    def __init__(self, kinds=None, threads=1, poll_interval=None, burst=False):
+        self.kinds = list(kinds or registry)
+        self.threads = threads
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else settings.BOOKINGS_JOBS_POLL_INTERVAL)
+        self.burst = burst
+        self.stop_event = threading.Event()
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run_once(self, worker_id=None):
+        """Lease and run one batch per kind. Returns the number of jobs run."""
+        worker_id = worker_id or f"{self.name}:{threading.get_ident()}"
+        processed = 0
+        for kind in self.kinds:
+            job_type = registry[kind]
+            if job_type.semaphore and not job_type.semaphore.acquire(blocking=False):
+                continue
+            try:
+                jobs = claim(kind, worker_id, limit=job_type.batch_size)
+                run_jobs(jobs, job_type)
+                processed += len(jobs)
+            finally:
+                if job_type.semaphore:
+                    job_type.semaphore.release()
+        return processed
+
+    def _loop(self, index):
+        worker_id = f"{self.name}:{index}"
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    processed = self.run_once(worker_id)
+                except Exception:
+                    logger.exception("Job worker %s crashed while polling.", worker_id)
+                    processed = 0
+                # Counters bumped by jobs (e.g. waitlist bookings) reach /metrics
+                metrics.registry.maybe_flush()
+                if not processed:
+                    if self.burst:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def run(self):
+        pool = [
+            threading.Thread(target=self._loop, args=(index,), name=f"job-worker-{index}")
+            for index in range(self.threads)
+        ]
+        for thread in pool:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in pool):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stop_event.set()
+        for thread in pool:
+            thread.join()
@@ -0,0 +1,56 @@
+# bookings/maintenance.py
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import Booking
+from .rollup import count_rows
+
+
+def _transition_in_batches(from_statuses, to_status, before, batch_size, pause):
+    """
+    Move bookings dated before ``before`` from one set of statuses to another,
+    oldest dates first, in short transactions of at most ``batch_size`` rows
+    so each write lock is held only briefly while service is running.
+    The update skips model signals, so the rows it changed are moved between
+    daily stats buckets in the same transaction.
+    """
+    pending = Booking.objects.filter(
+        status__in=from_statuses, booking_date__lt=before,
+    ).order_by('booking_date', 'id')
+
+    total = 0
+    while True:
+        ids = list(pending.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            # Re-check the status so a concurrent staff edit isn't overwritten
+            rows = list(Booking.objects.select_for_update().filter(
+                id__in=ids, status__in=from_statuses,
+            ).values_list('id', 'booking_date', 'booking_time', 'status', 'number_of_guests'))
+            total += Booking.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=to_status, updated_at=timezone.now())
+            count_rows([row[1:] for row in rows], sign=-1)
+            count_rows([(day, at, to_status, guests) for _, day, at, _, guests in rows])
+        if pause:
+            time.sleep(pause)
+
+
+def complete_past_bookings(today=None, batch_size=500, pause=0.0, stale_pending_days=0):
+    """
+    Close out bookings whose date has passed: confirmed and seated bookings
+    become completed, and pending bookings older than ``stale_pending_days``
+    are cancelled. Returns ``(completed, cancelled)`` row counts.
+    """
+    today = today or timezone.now().date()
+    completed = _transition_in_batches(
+        ['confirmed', 'seated'], 'completed', today, batch_size, pause)
+    cancelled = _transition_in_batches(
+        ['pending'], 'cancelled', today - timedelta(days=stale_pending_days),
+        batch_size, pause)
+    metrics.bookings_cancelled.inc(cancelled, source='expired')
+    return completed, cancelled
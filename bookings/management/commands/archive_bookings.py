@@ -0,0 +1,47 @@
+# bookings/management/commands/archive_bookings.py
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.archive import archive_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed and cancelled bookings older than the retention window "
+        "out of the live bookings table into the archive. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.BOOKINGS_ARCHIVE_AFTER_DAYS,
+            help="Archive bookings dated more than this many days ago "
+                 "(default: BOOKINGS_ARCHIVE_AFTER_DAYS).")
+        parser.add_argument(
+            '--before',
+            help="Archive bookings dated before this day (YYYY-MM-DD); overrides --older-than-days.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Rows moved per transaction (default: 1000).")
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help="Seconds to sleep between batches to let other writers in.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['before']:
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--before must be in YYYY-MM-DD format.")
+        else:
+            if options['older_than_days'] < 0:
+                raise CommandError("--older-than-days cannot be negative.")
+            before = timezone.now().date() - timedelta(days=options['older_than_days'])
+
+        moved = archive_bookings(
+            before=before, batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(f"Archived {moved} booking(s) dated before {before:%Y-%m-%d}.")
@@ -0,0 +1,115 @@
+# bookings/management/commands/benchmark_bookings.py
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from bookings.benchmarks import (
+    BENCHMARK_SIZES, SCENARIOS, benchmark_size, compare_results)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the booking hot paths through the test client against seeded "
+        "data of several sizes, recording p50/p95 latency and query counts. "
+        "Each size runs in a fresh test database (see DATABASES TEST NAME), "
+        "never the real one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(str(size) for size in BENCHMARK_SIZES),
+            help="Comma-separated booking counts to seed (default: %(default)s).")
+        parser.add_argument(
+            '--iterations', type=int, default=30,
+            help="Timed requests per view and size (default: 30).")
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help="Untimed requests before timing each view (default: 3).")
+        parser.add_argument(
+            '--view', action='append', dest='views', choices=sorted(SCENARIOS),
+            help="Only benchmark this view; may be repeated.")
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Random seed for the generated data (default: 0).")
+        parser.add_argument(
+            '--output',
+            help="Write the results as JSON to this file.")
+        parser.add_argument(
+            '--baseline',
+            help="Compare against a previous --output file and fail on regressions.")
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help="Allowed p95 slowdown against the baseline, as a fraction (default: 0.25).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline: {e}")
+
+        results = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+            },
+            'results': {},
+        }
+
+        # Run like production rather than like the dev server: no query log,
+        # and no email leaving the machine
+        with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=['testserver'],
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            for size in sizes:
+                self.stdout.write(f"Seeding {size} bookings...")
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    views = benchmark_size(
+                        size, options['iterations'], options['views'],
+                        warmup=options['warmup'], seed=options['seed'])
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+                results['results'][str(size)] = views
+                self._report(size, views)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    "Performance regressions against the baseline:\n  "
+                    + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _report(self, size, views):
+        self.stdout.write(f"\n{size} bookings")
+        self.stdout.write(f"  {'view':<20} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+        for name, stats in views.items():
+            self.stdout.write(
+                f"  {name:<20} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['queries']:>8}")
+        self.stdout.flush()
@@ -0,0 +1,117 @@
+# bookings/management/commands/benchmark_startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Packages that should only be imported by the code paths that need them
+HEAVY_PACKAGES = ['xhtml2pdf', 'reportlab', 'pyhanko', 'lxml', 'qrcode', 'PIL', 'numpy']
+
+# Boots Django in a fresh interpreter the way a worker does, then loads the
+# whole bookings app (URLconf, views, admin) and reports the timings
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+import bookings.admin, bookings.views
+app_done = time.perf_counter()
+print(json.dumps({
+    'setup': setup_done - started,
+    'app': app_done - setup_done,
+    'heavy': sorted({name.split('.')[0] for name in sys.modules} & set(%r)),
+}))
+""" % HEAVY_PACKAGES
+
+
+def measure_startup(importtime=False):
+    """Run the startup script in a new interpreter; returns (timings, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'restaurant_booking_project.settings')}
+    result = subprocess.run(
+        command + ['-c', STARTUP_SCRIPT], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True)
+    if result.returncode:
+        raise CommandError(f"Startup failed:\n{result.stderr}")
+    *printed, report = result.stdout.strip().splitlines()
+    timings = json.loads(report)
+    # Anything else on stdout was printed as a side effect of importing
+    timings['printed'] = '\n'.join(printed)
+    return timings, result.stderr
+
+
+def slowest_imports(importtime_output, top):
+    """Top-level imports by cumulative time from ``python -X importtime``."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented two spaces per level
+        if name.startswith('   '):
+            continue
+        imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long a fresh process takes to set up Django and import "
+        "the bookings app, list the slowest imports, and flag heavy optional "
+        "packages (PDF, QR) that were loaded at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help="Fresh interpreters to time (default: 5).")
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help="Slowest top-level imports to list (default: 15).")
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs must be at least 1.")
+
+        runs = [measure_startup()[0] for _ in range(options['runs'])]
+        _, importtime = measure_startup(importtime=True)
+        results = {
+            'runs': options['runs'],
+            'setup_ms': round(statistics.median(run['setup'] for run in runs) * 1000, 1),
+            'app_ms': round(statistics.median(run['app'] for run in runs) * 1000, 1),
+            'heavy_packages_loaded': runs[0]['heavy'],
+            'slowest_imports': [
+                {'module': name, 'cumulative_ms': ms}
+                for ms, name in slowest_imports(importtime, options['top'])],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"django.setup(): {results['setup_ms']}ms, bookings URLs/views/admin: "
+            f"{results['app_ms']}ms (median of {options['runs']})")
+        if results['heavy_packages_loaded']:
+            self.stdout.write(self.style.WARNING(
+                "Heavy packages loaded at startup: "
+                + ", ".join(results['heavy_packages_loaded'])))
+        else:
+            self.stdout.write(self.style.SUCCESS("No heavy optional packages loaded at startup."))
+        self.stdout.write("Slowest top-level imports:")
+        for entry in results['slowest_imports']:
+            self.stdout.write(f"  {entry['cumulative_ms']:>9.1f}ms  {entry['module']}")
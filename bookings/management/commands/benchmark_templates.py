@@ -0,0 +1,73 @@
+# bookings/management/commands/benchmark_templates.py
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from bookings.benchmarks import RENDER_PAGES, time_render
+
+
+# (label, cached template loader, fragment cache)
+MODES = [
+    ('uncached', False, False),
+    ('loader', True, False),
+    ('loader+fragments', True, True),
+]
+
+
+def render_settings(cached_loader, fragment_cache):
+    """TEMPLATES and CACHES overrides for one mode, whatever DEBUG is set to here."""
+    template = {key: value for key, value in settings.TEMPLATES[0].items() if key != 'APP_DIRS'}
+    loaders = settings.TEMPLATE_LOADERS
+    template['OPTIONS'] = {
+        **template['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', loaders)] if cached_loader else loaders,
+    }
+    fragments = {
+        'BACKEND': ('django.core.cache.backends.locmem.LocMemCache' if fragment_cache
+                    else 'django.core.cache.backends.dummy.DummyCache'),
+        'LOCATION': 'benchmark-fragments',
+    }
+    return {
+        'TEMPLATES': [template],
+        'CACHES': {**settings.CACHES, 'fragments': fragments},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time how long the public pages (home, check availability) take to "
+        "render, with and without the cached template loader and fragment "
+        "cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=500,
+            help="Timed renders per page (default: 500).")
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        results = {}
+        for mode, cached_loader, fragment_cache in MODES:
+            with override_settings(ALLOWED_HOSTS=['testserver'],
+                                   **render_settings(cached_loader, fragment_cache)):
+                results[mode] = {
+                    label: time_render(url_name, signed_in, options['iterations'])
+                    for label, url_name, signed_in in RENDER_PAGES}
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write("Median render time (ms):")
+        self.stdout.write(f"  {'page':<32}" + "".join(f"{mode:>18}" for mode, _, _ in MODES))
+        for label, _, _ in RENDER_PAGES:
+            self.stdout.write(f"  {label:<32}" + "".join(
+                f"{results[mode][label]['p50_ms']:>18.3f}" for mode, _, _ in MODES))
@@ -0,0 +1,37 @@
+# bookings/management/commands/complete_past_bookings.py
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.maintenance import complete_past_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark past confirmed/seated bookings as completed and cancel stale "
+        "pending ones, in small batches that are safe to run during service. "
+        "Intended to run nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Rows updated per transaction (default: 500).")
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help="Seconds to sleep between batches to let other writers in.")
+        parser.add_argument(
+            '--stale-pending-days', type=int, default=0,
+            help="Only cancel pending bookings at least this many days in the past.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['stale_pending_days'] < 0:
+            raise CommandError("--stale-pending-days cannot be negative.")
+
+        completed, cancelled = complete_past_bookings(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            stale_pending_days=options['stale_pending_days'],
+        )
+        self.stdout.write(
+            f"Marked {completed} booking(s) completed and cancelled {cancelled} stale pending booking(s).")
@@ -0,0 +1,49 @@
+# bookings/management/commands/generate_runsheets.py
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.jobs import enqueue
+from bookings.runsheet import get_runsheet_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generate staff run-sheet PDFs so the morning download is instant. "
+        "Intended to run overnight from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', help="First date to generate (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument(
+            '--days', type=int, default=2,
+            help="Number of consecutive days to generate (default: 2).")
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Re-render even if a current PDF is already stored.")
+        parser.add_argument(
+            '--queue', action='store_true',
+            help="Queue the PDFs as background jobs instead of rendering them now.")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                start = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Invalid date format. Please use YYYY-MM-DD.")
+        else:
+            start = timezone.now().date()
+
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        for offset in range(options['days']):
+            day = start + timedelta(days=offset)
+            if options['queue']:
+                enqueue('generate_runsheet', {'date': day.isoformat(), 'force': options['force']})
+                self.stdout.write(f"Queued run-sheet for {day.isoformat()}")
+                continue
+            pdf = get_runsheet_pdf(day, force=options['force'])
+            self.stdout.write(f"Run-sheet for {day.isoformat()}: {len(pdf)} bytes")
@@ -0,0 +1,35 @@
+# bookings/management/commands/import_floor_plan.py
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.floorplan import FloorPlanError, import_floor_plan, parse_floor_plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Create and resize tables from a CSV (number,capacity) or JSON floor plan "
+        "in one transaction. Tables not in the file are left as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Floor plan file (.csv or .json).")
+        parser.add_argument(
+            '--format', choices=['csv', 'json'],
+            help="File format (default: from the extension, else sniffed).")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        try:
+            tables = parse_floor_plan(content, format=options['format'], filename=options['path'])
+        except FloorPlanError as e:
+            raise CommandError("Floor plan not imported:\n" + "\n".join(e.errors))
+        except UnicodeDecodeError:
+            raise CommandError("The floor plan must be UTF-8 text.")
+
+        counts = import_floor_plan(tables)
+        self.stdout.write(
+            f"Imported {len(tables)} table(s): {counts['created']} added, "
+            f"{counts['updated']} resized, {counts['unchanged']} unchanged.")
@@ -0,0 +1,39 @@
+# bookings/management/commands/rebuild_booking_stats.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.rollup import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the daily booking stats from live and archived bookings, for "
+        "a date range or for every date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from', dest='since',
+            help="First date to recount (YYYY-MM-DD); default: the earliest.")
+        parser.add_argument(
+            '--to', dest='until',
+            help="Last date to recount (YYYY-MM-DD), inclusive; default: the latest.")
+
+    def _date(self, value, option):
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"{option} must be in YYYY-MM-DD format.")
+
+    def handle(self, *args, **options):
+        since = self._date(options['since'], '--from')
+        until = self._date(options['until'], '--to')
+        if since and until and since > until:
+            raise CommandError("--from must not be after --to.")
+
+        rows = rebuild_daily_stats(since, until)
+        span = f"{since or 'the start'} to {until or 'the end'}"
+        self.stdout.write(f"Rebuilt {rows} daily stats row(s) from {span}.")
@@ -0,0 +1,68 @@
+# bookings/management/commands/run_jobs.py
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from bookings.jobs import Worker, prune_jobs, registry
+
+
+def _run_worker(kinds, threads, poll_interval, burst):
+    Worker(kinds=kinds, threads=threads, poll_interval=poll_interval, burst=burst).run()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (booking emails, run-sheets, rollups) from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help="Worker threads per process (default: 4).")
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help="Worker processes to fork, each with --threads threads (default: 1).")
+        parser.add_argument(
+            '--kind', action='append',
+            help="Only run jobs of this kind. Can be given more than once.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help="Seconds an idle thread waits before polling again.")
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once there are no due jobs left (useful from cron).")
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Delete finished jobs older than BOOKINGS_JOBS_RETENTION_DAYS first.")
+
+    def handle(self, *args, **options):
+        unknown = set(options['kind'] or []) - set(registry)
+        if unknown:
+            raise CommandError(f"Unknown job kind(s): {', '.join(sorted(unknown))}. "
+                               f"Registered: {', '.join(sorted(registry))}.")
+        if options['threads'] < 1 or options['processes'] < 1:
+            raise CommandError("--threads and --processes must be at least 1.")
+
+        if options['prune']:
+            self.stdout.write(f"Pruned {prune_jobs()} finished job(s).")
+
+        worker_args = (options['kind'], options['threads'],
+                       options['poll_interval'], options['burst'])
+        if options['processes'] == 1:
+            _run_worker(*worker_args)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_run_worker, args=worker_args, name=f"run_jobs-{n}")
+            for n in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,114 @@
+# bookings/management/commands/stress_bookings.py
+import logging
+import multiprocessing
+import os
+import tempfile
+import time as clock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from bookings.stress import (
+    check_invariants, expected_status_counts, prepare_stress_data, run_workers, summarise)
+from bookings.models import Booking
+
+
+def _run_process(user_ids, operations, days, seed):
+    return run_workers(user_ids, operations, days, seed)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive many concurrent guests booking, editing and cancelling against "
+        "a throwaway on-disk copy of the schema, then check that no table was "
+        "double-booked and no confirmed booking was lost. Reports throughput "
+        "and the rate of 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help="Concurrent guests per process (default: 8).")
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help="Processes to fork, each running --threads guests (default: 1).")
+        parser.add_argument(
+            '--operations', type=int, default=50,
+            help="Requests each guest makes (default: 50).")
+        parser.add_argument(
+            '--days', type=int, default=3,
+            help="Spread bookings over this many days; fewer means more contention (default: 3).")
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Random seed (default: 0).")
+
+    def handle(self, *args, **options):
+        for option in ('threads', 'processes', 'operations', 'days'):
+            if options[option] < 1:
+                raise CommandError(f"--{option} must be at least 1.")
+
+        old_name = connection.settings_dict['NAME']
+        temp_dir = tempfile.mkdtemp(prefix='stress-bookings-')
+        if connection.vendor == 'sqlite':
+            # The default SQLite test database lives in memory; locking
+            # behaviour is only realistic on a file
+            connection.settings_dict['TEST']['NAME'] = os.path.join(temp_dir, 'stress.sqlite3')
+
+        with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=['testserver'],
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self._stress(options)
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                connection.settings_dict['TEST']['NAME'] = None
+                os.rmdir(temp_dir)
+
+    def _stress(self, options):
+        workers = options['threads'] * options['processes']
+        user_ids = prepare_stress_data(workers)
+        self.stdout.write(
+            f"Running {workers} guest(s) x {options['operations']} operations "
+            f"on {connection.vendor}...")
+
+        # Failed requests are counted below; don't log each traceback too
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        # Threads and forked processes must open their own connections
+        connections.close_all()
+        started = clock.monotonic()
+        if options['processes'] == 1:
+            results = run_workers(
+                user_ids, options['operations'], options['days'], options['seed'])
+        else:
+            chunks = [
+                (user_ids[n::options['processes']], options['operations'],
+                 options['days'], options['seed'] + n * options['threads'])
+                for n in range(options['processes'])]
+            with multiprocessing.Pool(options['processes']) as pool:
+                results = [result for chunk in pool.starmap(_run_process, chunks)
+                           for result in chunk]
+        seconds = clock.monotonic() - started
+
+        summary = summarise(results, seconds)
+        self.stdout.write(
+            f"{summary['operations']} operations in {seconds:.1f}s: "
+            f"{summary['throughput']:.1f} ops/s, p50 {summary['p50_ms']:.1f}ms, "
+            f"p95 {summary['p95_ms']:.1f}ms")
+        self.stdout.write(
+            f"'database is locked': {summary['locked']} "
+            f"({summary['locked_rate']:.1%} of operations)")
+        for outcome, count in summary['outcomes'].items():
+            self.stdout.write(f"  {outcome:<20} {count:>6}")
+
+        expected = expected_status_counts(results)
+        actual = {status: Booking.objects.filter(status=status).count() for status in expected}
+        self.stdout.write(f"Status counts: expected {dict(expected)}, stored {actual}")
+
+        violations = check_invariants(results)
+        if violations:
+            raise CommandError(
+                f"{len(violations)} invariant violation(s):\n  " + "\n  ".join(violations[:50]))
+        self.stdout.write(self.style.SUCCESS("All invariants held."))
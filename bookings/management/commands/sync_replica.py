@@ -0,0 +1,42 @@
+# bookings/management/commands/sync_replica.py
+import time as clock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from bookings.db import copy_sqlite_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over the read replica "
+        "(BOOKINGS_REPLICA_DATABASE), once or every --interval seconds. "
+        "For local testing of replica routing; real deployments replicate "
+        "at the database level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Keep copying every this many seconds (default: copy once).")
+
+    def handle(self, *args, **options):
+        replica_db = settings.BOOKINGS_REPLICA_DATABASE
+        if not replica_db:
+            raise CommandError("BOOKINGS_REPLICA_DATABASE is not set.")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[replica_db]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError("sync_replica only copies SQLite databases.")
+        source, target = primary.settings_dict['NAME'], replica.settings_dict['NAME']
+        if options['interval'] < 0:
+            raise CommandError("--interval cannot be negative.")
+
+        while True:
+            started = clock.monotonic()
+            copy_sqlite_database(source, target)
+            self.stdout.write(
+                f"Copied {source} to {target} in {clock.monotonic() - started:.2f}s")
+            if not options['interval']:
+                return
+            clock.sleep(options['interval'])
@@ -0,0 +1,251 @@
+# bookings/metrics.py
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.samples = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self):
+        return {'type': self.type, 'help': self.documentation,
+                'labelnames': list(self.labelnames)}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def snapshot(self):
+        return {**self.describe(),
+                'samples': [[list(key), value] for key, value in self.samples.items()]}
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                # One count per bucket (not cumulative), then +Inf, then the sum
+                sample = self.samples[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(self.buckets)
+            sample[index] += 1
+            sample[-1] += value
+
+    def snapshot(self):
+        return {**self.describe(), 'buckets': list(self.buckets),
+                'samples': [[list(key), list(value)] for key, value in self.samples.items()]}
+
+
+class Registry:
+    """
+    The process's metrics. Updates are a dict write under one lock, cheap
+    enough to do on every request.
+
+    With BOOKINGS_METRICS_DIR set, each process also writes its snapshot to
+    ``<dir>/metrics-<pid>.json`` at most every BOOKINGS_METRICS_FLUSH_INTERVAL
+    seconds (and at exit), and the endpoint adds up every process's file.
+    Clear the directory when the server is restarted.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.last_flush = 0.0
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self, directory=None):
+        directory = directory or getattr(settings, 'BOOKINGS_METRICS_DIR', None)
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        interval = getattr(settings, 'BOOKINGS_METRICS_FLUSH_INTERVAL', 5.0)
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def collect(self):
+        """This process's metrics, or every process's when a directory is set."""
+        directory = getattr(settings, 'BOOKINGS_METRICS_DIR', None)
+        if not directory:
+            return self.snapshot()
+        self.flush(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Being replaced by its process right now
+        return merge_snapshots(snapshots)
+
+
+def merge_snapshots(snapshots):
+    """Add up snapshots from several processes."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, 'samples': {}})
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                if metric['type'] == 'histogram':
+                    current = target['samples'].get(key, [0] * len(value))
+                    target['samples'][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target['samples'][key] = target['samples'].get(key, 0) + value
+    for metric in merged.values():
+        metric['samples'] = [[list(key), value] for key, value in metric['samples'].items()]
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in [*zip(names, values), *extra]]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def render(snapshot):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in sorted(metric['samples']):
+            if metric['type'] == 'histogram':
+                cumulative = 0
+                bounds = [*(repr(float(b)) for b in metric['buckets']), '+Inf']
+                for bound, count in zip(bounds, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket"
+                                 f"{_labels(metric['labelnames'], labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric['labelnames'], labels)} {value[-1]}")
+                lines.append(f"{name}_count{_labels(metric['labelnames'], labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(metric['labelnames'], labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+request_duration = registry.histogram(
+    'bookings_http_request_duration_seconds',
+    "Time spent handling a request, by URL name.", ['view', 'method'])
+db_queries = registry.counter(
+    'bookings_db_queries_total', "Database queries run while handling a request.", ['view'])
+db_query_seconds = registry.counter(
+    'bookings_db_query_seconds_total', "Time spent in database queries.", ['view'])
+bookings_created = registry.counter(
+    'bookings_created_total',
+    "Bookings created, by source: guest (make_booking) or waitlist (a freed "
+    "slot booked for a waiting guest).", ['source'])
+booking_attempts = registry.counter(
+    'bookings_make_booking_outcomes_total',
+    "Outcome of make_booking submissions: created, no_table (nothing free), "
+    "conflict (lost a race for the table) or error.", ['outcome'])
+bookings_cancelled = registry.counter(
+    'bookings_cancelled_total',
+    "Bookings cancelled, by source: guest (cancel_booking), staff (booking "
+    "detail page) or expired (stale pending bookings closed by "
+    "complete_past_bookings).", ['source'])
+availability_cache = registry.counter(
+    'bookings_availability_cache_requests_total',
+    "Availability lookups whose date occupancy came from the cache (hit) or the database (miss).", ['result'])
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Record request latency and database usage per URL name. Goes first in
+    MIDDLEWARE so the timing covers the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        request_duration.observe(elapsed, view=view, method=request.method)
+        db_queries.inc(queries.count, view=view)
+        db_query_seconds.inc(queries.seconds, view=view)
+        registry.maybe_flush()
+        return response
@@ -0,0 +1,46 @@
+import secrets
+
+from django.db import migrations, models
+
+
+CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+
+
+def populate_confirmation_codes(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    used = set()
+    pending = []
+    for booking in Booking.objects.filter(confirmation_code__isnull=True).only('id'):
+        code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(8))
+        while code in used:
+            code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(8))
+        used.add(code)
+        booking.confirmation_code = code
+        pending.append(booking)
+    Booking.objects.bulk_update(pending, ['confirmation_code'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('seated', 'Seated'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], default='confirmed', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='confirmation_code',
+            field=models.CharField(editable=False, max_length=8, null=True),
+        ),
+        migrations.RunPython(populate_confirmation_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='confirmation_code',
+            field=models.CharField(editable=False, help_text='Short code shown to the guest and encoded in their check-in QR code.', max_length=8, unique=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_status_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('user_id', models.IntegerField()),
+                ('username', models.CharField(max_length=150)),
+                ('table_number', models.IntegerField()),
+                ('table_capacity', models.IntegerField()),
+                ('booking_date', models.DateField()),
+                ('booking_time', models.TimeField()),
+                ('number_of_guests', models.IntegerField()),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('seated', 'Seated'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], max_length=20)),
+                ('confirmation_code', models.CharField(blank=True, max_length=8)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-booking_date', '-booking_time'],
+                'indexes': [models.Index(fields=['user_id', 'booking_date'], name='bookings_archive_user_idx'), models.Index(fields=['booking_date'], name='bookings_archive_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+# Two active (not cancelled) bookings on the same table and date must start
+# more than 60 minutes apart. Keep in sync with bookings.allocation.OVERLAP_MINUTES.
+
+SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, 'bookings_booking_no_overlap: table is already booked within 60 minutes')
+    WHERE EXISTS (
+        SELECT 1 FROM bookings_booking AS other
+        WHERE other.table_id = NEW.table_id
+          AND other.booking_date = NEW.booking_date
+          AND other.status <> 'cancelled'
+          AND other.id IS NOT NEW.id
+          AND abs(strftime('%s', other.booking_time) - strftime('%s', NEW.booking_time)) <= 3600
+    );
+"""
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE TRIGGER bookings_booking_no_overlap_insert
+    BEFORE INSERT ON bookings_booking
+    WHEN NEW.status <> 'cancelled'
+    BEGIN {SQLITE_OVERLAP_CHECK} END;
+    """,
+    f"""
+    CREATE TRIGGER bookings_booking_no_overlap_update
+    BEFORE UPDATE OF table_id, booking_date, booking_time, status ON bookings_booking
+    WHEN NEW.status <> 'cancelled'
+    BEGIN {SQLITE_OVERLAP_CHECK} END;
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS bookings_booking_no_overlap_insert;",
+    "DROP TRIGGER IF EXISTS bookings_booking_no_overlap_update;",
+]
+
+# btree_gist provides the "=" operator class for table_id inside a GiST index.
+# Adding the constraint fails if the table already holds overlapping
+# bookings; resolve those first.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist;",
+    """
+    ALTER TABLE bookings_booking ADD CONSTRAINT bookings_booking_no_overlap
+    EXCLUDE USING gist (
+        table_id WITH =,
+        tsrange(booking_date + booking_time,
+                booking_date + booking_time + interval '60 minutes', '[]') WITH &&
+    ) WHERE (status <> 'cancelled');
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "ALTER TABLE bookings_booking DROP CONSTRAINT IF EXISTS bookings_booking_no_overlap;",
+]
+
+
+def _run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+            hints={'model_name': 'booking'},
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:20
+
+import datetime
+
+from django.db import migrations, models
+
+
+def add_default_hours(apps, schema_editor):
+    # The hours that used to be hard-coded: every day, 9:00 AM to 10:00 PM
+    OpeningHours = apps.get_model('bookings', 'OpeningHours')
+    OpeningHours.objects.bulk_create([
+        OpeningHours(weekday=weekday, opens_at=datetime.time(9, 0), closes_at=datetime.time(22, 0))
+        for weekday in range(7)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_unique_active_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('opens_at', models.TimeField(help_text='Earliest booking time.')),
+                ('closes_at', models.TimeField(help_text='Latest booking time (inclusive).')),
+            ],
+            options={
+                'verbose_name_plural': 'opening hours',
+                'ordering': ['weekday', 'opens_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_open', models.BooleanField(default=False, help_text='Open during this period instead of the usual hours.')),
+                ('starts_at', models.TimeField(blank=True, null=True)),
+                ('ends_at', models.TimeField(blank=True, help_text='Inclusive.', null=True)),
+                ('reason', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'ordering': ['date', 'starts_at'],
+                'indexes': [models.Index(fields=['date'], name='bookings_schedule_exc_date_idx')],
+            },
+        ),
+        migrations.RunPython(add_default_hours, migrations.RunPython.noop),
+    ]
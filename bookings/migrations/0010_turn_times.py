@@ -0,0 +1,94 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:26
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Replaces the fixed 60-minute rule from 0006_booking_no_overlap: each
+# booking now holds its table for its own turn_minutes, and two active
+# bookings on the same table and date clash when those periods overlap. A
+# booking may start the minute the previous one ends.
+
+previous = import_module('bookings.migrations.0006_booking_no_overlap')
+
+SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, 'bookings_booking_no_overlap: table is already booked at that time')
+    WHERE EXISTS (
+        SELECT 1 FROM bookings_booking AS other
+        WHERE other.table_id = NEW.table_id
+          AND other.booking_date = NEW.booking_date
+          AND other.status <> 'cancelled'
+          AND other.id IS NOT NEW.id
+          AND CAST(strftime('%s', other.booking_time) AS INTEGER)
+              < strftime('%s', NEW.booking_time) + NEW.turn_minutes * 60
+          AND CAST(strftime('%s', NEW.booking_time) AS INTEGER)
+              < strftime('%s', other.booking_time) + other.turn_minutes * 60
+    );
+"""
+
+# Adding turn_minutes rebuilds the table on SQLite, which drops the old
+# triggers along with it
+SQLITE_FORWARD = previous.SQLITE_REVERSE + [
+    f"""
+    CREATE TRIGGER bookings_booking_no_overlap_insert
+    BEFORE INSERT ON bookings_booking
+    WHEN NEW.status <> 'cancelled'
+    BEGIN {SQLITE_OVERLAP_CHECK} END;
+    """,
+    f"""
+    CREATE TRIGGER bookings_booking_no_overlap_update
+    BEFORE UPDATE OF table_id, booking_date, booking_time, turn_minutes, status ON bookings_booking
+    WHEN NEW.status <> 'cancelled'
+    BEGIN {SQLITE_OVERLAP_CHECK} END;
+    """,
+]
+
+SQLITE_REVERSE = previous.SQLITE_REVERSE + previous.SQLITE_FORWARD
+
+POSTGRES_FORWARD = previous.POSTGRES_REVERSE + [
+    """
+    ALTER TABLE bookings_booking ADD CONSTRAINT bookings_booking_no_overlap
+    EXCLUDE USING gist (
+        table_id WITH =,
+        tsrange(booking_date + booking_time,
+                booking_date + booking_time + turn_minutes * interval '1 minute', '[)') WITH &&
+    ) WHERE (status <> 'cancelled');
+    """,
+]
+
+POSTGRES_REVERSE = previous.POSTGRES_REVERSE + previous.POSTGRES_FORWARD
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_opening_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='turn_minutes',
+            field=models.PositiveSmallIntegerField(default=60, help_text='How long the table is held from the booking time. Set from the turn time rules when a table is chosen.'),
+        ),
+        migrations.CreateModel(
+            name='TurnTimeRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_guests', models.PositiveSmallIntegerField(default=1)),
+                ('max_guests', models.PositiveSmallIntegerField(blank=True, help_text='Leave blank for no upper limit.', null=True)),
+                ('minutes', models.PositiveSmallIntegerField()),
+                ('table', models.ForeignKey(blank=True, help_text='Leave blank to apply to every table.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='turn_time_rules', to='bookings.table')),
+            ],
+            options={
+                'ordering': ['table__number', 'min_guests'],
+            },
+        ),
+        migrations.RunPython(
+            previous._run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            previous._run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+            hints={'model_name': 'booking'},
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour
+
+
+def count_existing_bookings(apps, schema_editor):
+    # An archive on another database is added by `manage.py rebuild_booking_stats`
+    alias = schema_editor.connection.alias
+    sources = [apps.get_model('bookings', 'Booking')]
+    if not settings.BOOKINGS_ARCHIVE_DATABASE:
+        sources.append(apps.get_model('bookings', 'ArchivedBooking'))
+    totals = {}
+    for model in sources:
+        rows = model.objects.using(alias).annotate(hour=ExtractHour('booking_time')).values(
+            'booking_date', 'hour', 'status').annotate(
+            bookings=Count('id'), covers=Sum('number_of_guests')).order_by()
+        for row in rows:
+            key = (row['booking_date'], row['hour'], row['status'])
+            bookings, covers = totals.get(key, (0, 0))
+            totals[key] = (bookings + row['bookings'], covers + row['covers'])
+    DailyBookingStats = apps.get_model('bookings', 'DailyBookingStats')
+    DailyBookingStats.objects.using(alias).bulk_create([
+        DailyBookingStats(date=day, hour=hour, status=status, bookings=bookings, covers=covers)
+        for (day, hour, status), (bookings, covers) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_turn_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('seated', 'Seated'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], max_length=20)),
+                ('bookings', models.IntegerField(default=0)),
+                ('covers', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'daily booking stats',
+                'ordering': ['date', 'hour', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'hour', 'status'), name='bookings_daily_stats_unique')],
+            },
+        ),
+        migrations.RunPython(count_existing_bookings, migrations.RunPython.noop),
+    ]
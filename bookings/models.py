@@ -35,15 +35,24 @@
 
 
 # bookings/models.py
-import os
-print(f"DEBUG: Loading models.py from: {os.path.abspath(__file__)}")
-print(
-    f"DEBUG: on_delete for Booking.table is currently set to PROTECT: {'on_delete=PROTECT' in open(os.path.abspath(__file__)).read()}")
-
+import secrets
+from types import SimpleNamespace
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from datetime import date, time  # Import these if not already present
 from django.db.models import PROTECT
+from django.utils import timezone
+
+
+# Unambiguous characters only (no 0/O, 1/I/L) so codes can be read out loud
+CONFIRMATION_CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+CONFIRMATION_CODE_LENGTH = 8
+
+
+def generate_confirmation_code():
+    return ''.join(secrets.choice(CONFIRMATION_CODE_ALPHABET)
+                   for _ in range(CONFIRMATION_CODE_LENGTH))
 
 
 class Table(models.Model):
@@ -59,6 +68,7 @@ class Booking(models.Model):
     BOOKING_STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
+        ('seated', 'Seated'),  # Checked in at the door
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),  # For past bookings that were honored
     ]
@@ -73,12 +83,320 @@ class Booking(models.Model):
     notes = models.TextField(blank=True, null=True)
     status = models.CharField(
         max_length=20, choices=BOOKING_STATUS_CHOICES, default='confirmed')
+    confirmation_code = models.CharField(
+        max_length=CONFIRMATION_CODE_LENGTH, unique=True, editable=False,
+        help_text="Short code shown to the guest and encoded in their check-in QR code.")
+    turn_minutes = models.PositiveSmallIntegerField(
+        default=60,
+        help_text="How long the table is held from the booking time. Set from the "
+                  "turn time rules when a table is chosen.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('table', 'booking_date', 'booking_time')
         ordering = ['booking_date', 'booking_time']
+        constraints = [
+            # A cancelled booking gives its exact slot back
+            models.UniqueConstraint(
+                fields=['table', 'booking_date', 'booking_time'],
+                condition=~models.Q(status='cancelled'),
+                name='bookings_booking_unique_active_slot'),
+        ]
+        indexes = [
+            # Active-booking queries filter on status and a date range
+            models.Index(fields=['status', 'booking_date'],
+                         name='bookings_status_date_idx'),
+        ]
+
+    is_archived = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The slot as loaded: forms assign new values to the instance before
+        # it is saved, and the caches and waitlist need the one it is leaving
+        # (the daily stats also need the status and party size)
+        instance._loaded_booking_date = instance.__dict__.get('booking_date')
+        instance._loaded_booking_time = instance.__dict__.get('booking_time')
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_number_of_guests = instance.__dict__.get('number_of_guests')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self.confirmation_code:
+            self.confirmation_code = generate_confirmation_code()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Booking by {self.user.username} for Table {self.table.number} on {self.booking_date} at {self.booking_time} ({self.status})"
+
+
+class ArchivedBooking(models.Model):
+    """
+    A completed or cancelled booking moved out of the live Booking table by
+    `manage.py archive_bookings`. Users and tables are copied as plain values
+    rather than foreign keys so the archive can live in a separate database
+    (see BOOKINGS_ARCHIVE_DATABASE).
+    """
+    original_id = models.BigIntegerField(unique=True)
+    user_id = models.IntegerField()
+    username = models.CharField(max_length=150)
+    table_number = models.IntegerField()
+    table_capacity = models.IntegerField()
+    booking_date = models.DateField()
+    booking_time = models.TimeField()
+    number_of_guests = models.IntegerField()
+    notes = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Booking.BOOKING_STATUS_CHOICES)
+    confirmation_code = models.CharField(max_length=CONFIRMATION_CODE_LENGTH, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-booking_date', '-booking_time']
+        indexes = [
+            models.Index(fields=['user_id', 'booking_date'],
+                         name='bookings_archive_user_idx'),
+            models.Index(fields=['booking_date'], name='bookings_archive_date_idx'),
+        ]
+
+    @classmethod
+    def from_booking(cls, booking):
+        return cls(
+            original_id=booking.pk,
+            user_id=booking.user_id,
+            username=booking.user.username,
+            table_number=booking.table.number,
+            table_capacity=booking.table.capacity,
+            booking_date=booking.booking_date,
+            booking_time=booking.booking_time,
+            number_of_guests=booking.number_of_guests,
+            notes=booking.notes,
+            status=booking.status,
+            confirmation_code=booking.confirmation_code,
+            created_at=booking.created_at,
+            updated_at=booking.updated_at,
+        )
+
+    # Read-only stand-ins so templates can treat live and archived bookings alike
+    @property
+    def table(self):
+        return SimpleNamespace(number=self.table_number, capacity=self.table_capacity)
+
+    @property
+    def user(self):
+        return SimpleNamespace(pk=self.user_id, username=self.username)
+
+    def __str__(self):
+        return f"Archived booking {self.original_id} by {self.username} on {self.booking_date} ({self.status})"
+
+
+class WaitlistEntry(models.Model):
+    """
+    A guest waiting for a table on a given date, at any time between
+    ``earliest_time`` and ``latest_time``. When a booking is cancelled or
+    changed, bookings.waitlist books the freed slot for the longest-waiting
+    entry it fits.
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('booked', 'Booked'),  # Given a table from a freed slot
+        ('withdrawn', 'Withdrawn'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    booking_date = models.DateField()
+    earliest_time = models.TimeField()
+    latest_time = models.TimeField()
+    number_of_guests = models.IntegerField()
+    notes = models.TextField(blank=True, null=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='waiting')
+    booking = models.OneToOneField(
+        Booking, null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='waitlist_entry')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Serves the match query: waiting entries for one date whose
+            # window covers a time, in the order they joined
+            models.Index(fields=['booking_date', 'earliest_time', 'number_of_guests'],
+                         condition=models.Q(status='waiting'),
+                         name='bookings_waitlist_match_idx'),
+        ]
+        verbose_name_plural = 'waitlist entries'
+
+    def __str__(self):
+        return (f"{self.user.username} waiting for {self.number_of_guests} on {self.booking_date} "
+                f"{self.earliest_time:%H:%M}-{self.latest_time:%H:%M} ({self.status})")
+
+
+class OpeningHours(models.Model):
+    """
+    A weekly period when bookings may start, e.g. Monday 12:00-14:30. A day
+    can have several (lunch and dinner); a weekday without any is closed.
+    """
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+        (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday'),
+    ]
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    opens_at = models.TimeField(help_text="Earliest booking time.")
+    closes_at = models.TimeField(help_text="Latest booking time (inclusive).")
+
+    class Meta:
+        ordering = ['weekday', 'opens_at']
+        verbose_name_plural = 'opening hours'
+
+    def clean(self):
+        if self.opens_at and self.closes_at and self.opens_at > self.closes_at:
+            raise ValidationError("Closing time must not be before opening time.")
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.opens_at:%H:%M}-{self.closes_at:%H:%M}"
+
+
+class ScheduleException(models.Model):
+    """
+    A change to the weekly hours on one date. Open periods (``is_open``)
+    replace that weekday's hours, e.g. shorter hours on a holiday eve;
+    closures remove a period, or the whole day when no times are given
+    (holidays, private events).
+    """
+    date = models.DateField()
+    is_open = models.BooleanField(
+        default=False, help_text="Open during this period instead of the usual hours.")
+    starts_at = models.TimeField(null=True, blank=True)
+    ends_at = models.TimeField(null=True, blank=True, help_text="Inclusive.")
+    reason = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        ordering = ['date', 'starts_at']
+        indexes = [
+            models.Index(fields=['date'], name='bookings_schedule_exc_date_idx'),
+        ]
+
+    def clean(self):
+        if (self.starts_at is None) != (self.ends_at is None):
+            raise ValidationError("Give both a start and an end time, or neither.")
+        if self.is_open and self.starts_at is None:
+            raise ValidationError("Opening hours need a start and an end time.")
+        if self.starts_at and self.ends_at and self.starts_at > self.ends_at:
+            raise ValidationError("The end time must not be before the start time.")
+
+    def __str__(self):
+        period = (f"{self.starts_at:%H:%M}-{self.ends_at:%H:%M}"
+                  if self.starts_at is not None else "all day")
+        return f"{self.date} {'open' if self.is_open else 'closed'} {period} {self.reason}".rstrip()
+
+
+class DailyBookingStats(models.Model):
+    """
+    Bookings and covers per date, hour and status, kept in step with Booking
+    by bookings/rollup.py so reports read a few rows per day instead of
+    every booking. Archived bookings stay counted.
+    """
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=20, choices=Booking.BOOKING_STATUS_CHOICES)
+    bookings = models.IntegerField(default=0)
+    covers = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'hour', 'status']
+        verbose_name_plural = 'daily booking stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'hour', 'status'], name='bookings_daily_stats_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 {self.status}: {self.bookings} bookings, {self.covers} covers"
+
+
+class TurnTimeRule(models.Model):
+    """
+    How long a party holds a table. A rule for the table itself beats one for
+    any table; among those, the narrowest range of party sizes wins. Parties
+    no rule covers get BOOKINGS_DEFAULT_TURN_MINUTES.
+    """
+    min_guests = models.PositiveSmallIntegerField(default=1)
+    max_guests = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="Leave blank for no upper limit.")
+    table = models.ForeignKey(
+        Table, null=True, blank=True, on_delete=models.CASCADE, related_name='turn_time_rules',
+        help_text="Leave blank to apply to every table.")
+    minutes = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['table__number', 'min_guests']
+
+    def clean(self):
+        if self.min_guests is not None and self.min_guests < 1:
+            raise ValidationError("The smallest party must be at least 1 guest.")
+        if self.max_guests is not None and self.min_guests and self.max_guests < self.min_guests:
+            raise ValidationError("The largest party must not be smaller than the smallest.")
+        if self.minutes is not None and not 0 < self.minutes <= 24 * 60:
+            raise ValidationError("A turn must last between 1 minute and 24 hours.")
+
+    def __str__(self):
+        guests = (f"{self.min_guests}+" if self.max_guests is None
+                  else f"{self.min_guests}-{self.max_guests}")
+        tables = f"table {self.table.number}" if self.table_id else "any table"
+        return f"{guests} guests at {tables}: {self.minutes} min"
+
+
+class Job(models.Model):
+    """A unit of background work, leased and run by `manage.py run_jobs`."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),  # Gave up after max_attempts
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Serves the claim query: next due jobs of one kind
+            models.Index(fields=['kind', 'status', 'run_after'],
+                         name='bookings_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} {self.kind} ({self.status})"
+
+
+class UserCacheInvalidation(models.Model):
+    """
+    A logout or user change that every process must drop from its
+    per-process user and session caches (bookings/auth.py).
+    """
+    user_id = models.CharField(max_length=64, blank=True)
+    session_key = models.CharField(max_length=40, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        target = f"user {self.user_id}" if self.user_id else f"session {self.session_key}"
+        return f"Invalidate {target} at {self.created_at}"
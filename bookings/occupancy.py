@@ -0,0 +1,140 @@
+# bookings/occupancy.py
+"""
+Turn times and per-date table occupancy.
+
+A booking holds its table from its start time for its turn: how long a
+party of that size keeps that table, from the most specific TurnTimeRule or
+BOOKINGS_DEFAULT_TURN_MINUTES. The turn is resolved once, when a table is
+chosen, and stored on the booking as ``turn_minutes``, so later rule changes
+don't move existing bookings. The overlap trigger/exclusion constraint
+(migration 0010_turn_times) enforces the same periods.
+
+A date's occupancy is one integer per table whose bit ``m`` is set while the
+table is held at minute ``m`` of the day, built from a single query. A table
+is free for a party when the mask of the party's own turn on that table
+doesn't intersect it, so each check is a dictionary lookup, a shift and an
+AND however many rules or bookings there are.
+
+The rules are compiled per process into a lookup by table and party size.
+Saving or deleting a rule rebuilds it in the process that made the change;
+other processes rebuild within BOOKINGS_TURN_TIME_TTL seconds.
+"""
+import threading
+import time as clock
+
+from django.conf import settings
+
+from .models import Booking, TurnTimeRule
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def turn_mask(start, minutes):
+    """
+    Mask with the minutes from ``start`` for ``minutes`` set. Turns running
+    past midnight are cut off there, as the overlap constraint only compares
+    bookings on the same date.
+    """
+    first = start.hour * 60 + start.minute
+    last = min(first + minutes, MINUTES_PER_DAY)
+    return ((1 << (last - first)) - 1) << first
+
+
+def _width(rule):
+    if rule.max_guests is None:
+        return float('inf')
+    return rule.max_guests - rule.min_guests
+
+
+class TurnTimes:
+    """Compiled TurnTimeRules; see the module docstring."""
+
+    def __init__(self, rules, default):
+        # Every party larger than the biggest bound matches the same rules,
+        # so one entry past it stands for all of them
+        bounds = [rule.min_guests for rule in rules]
+        bounds += [rule.max_guests for rule in rules if rule.max_guests is not None]
+        self.largest = max(bounds, default=0) + 1
+        self.any_table = self._resolve(
+            [rule for rule in rules if rule.table_id is None], [default] * (self.largest + 1))
+        self.by_table = {}
+        for rule in rules:
+            if rule.table_id is not None and rule.table_id not in self.by_table:
+                self.by_table[rule.table_id] = self._resolve(
+                    [r for r in rules if r.table_id == rule.table_id], self.any_table)
+
+    def _resolve(self, rules, fallback):
+        minutes = list(fallback)
+        # Widest first so narrower rules overwrite it; the newest of equals wins
+        for rule in sorted(rules, key=lambda rule: (-_width(rule), rule.pk or 0)):
+            last = self.largest if rule.max_guests is None else rule.max_guests
+            for guests in range(rule.min_guests, last + 1):
+                minutes[guests] = rule.minutes
+        return minutes
+
+    def minutes(self, table_id, number_of_guests):
+        """How long a party of ``number_of_guests`` holds table ``table_id``."""
+        return self.by_table.get(table_id, self.any_table)[min(number_of_guests, self.largest)]
+
+
+_lock = threading.Lock()
+_compiled = None
+
+
+def get_turn_times():
+    """The compiled rules, rebuilt when invalidated or older than BOOKINGS_TURN_TIME_TTL."""
+    global _compiled
+    current = _compiled
+    if current is not None and current[1] > clock.monotonic():
+        return current[0]
+    with _lock:
+        if _compiled is current:
+            turn_times = TurnTimes(
+                list(TurnTimeRule.objects.all()), settings.BOOKINGS_DEFAULT_TURN_MINUTES)
+            _compiled = (turn_times, clock.monotonic() + settings.BOOKINGS_TURN_TIME_TTL)
+        return _compiled[0]
+
+
+def invalidate_turn_times():
+    global _compiled
+    with _lock:
+        _compiled = None
+
+
+def forget_turn_times(sender, instance, **kwargs):
+    """post_save/post_delete on TurnTimeRule."""
+    invalidate_turn_times()
+
+
+def occupancy(booking_date, statuses=None, exclude=None):
+    """
+    ``{table_id: mask}`` of the minutes each table is held on a date, by
+    bookings with one of ``statuses`` (default: any but cancelled).
+    ``exclude`` is a booking being moved, which shouldn't block itself.
+    """
+    bookings = Booking.objects.filter(booking_date=booking_date)
+    if statuses is None:
+        bookings = bookings.exclude(status='cancelled')
+    else:
+        bookings = bookings.filter(status__in=statuses)
+    if exclude is not None:
+        bookings = bookings.exclude(id=exclude.id)
+    held = {}
+    for table_id, start, minutes in bookings.values_list('table_id', 'booking_time', 'turn_minutes'):
+        held[table_id] = held.get(table_id, 0) | turn_mask(start, minutes)
+    return held
+
+
+def tables_free_at(tables, held, start, number_of_guests):
+    """
+    The tables, in the order given, that seat the party and are not held
+    at any point during its turn from ``start``.
+    """
+    turn_times = get_turn_times()
+    return [
+        table for table in tables
+        if table.capacity >= number_of_guests
+        and not held.get(table.id, 0) & turn_mask(
+            start, turn_times.minutes(table.id, number_of_guests))
+    ]
@@ -0,0 +1,166 @@
+# bookings/profiling.py
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Other middleware wraps query execution too; their frames say nothing
+# about which code issued a query
+INSTRUMENTATION_FILES = {__file__, metrics.__file__}
+
+PROFILE_QUERY_PARAM = '_profile'
+
+
+def _project_frames():
+    """
+    The call stack below the current frame, keeping only the project's own
+    code (not Django or other installed packages), outermost first.
+    """
+    base = str(settings.BASE_DIR)
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base) and 'site-packages' not in filename
+                and filename not in INSTRUMENTATION_FILES):
+            frames.append(
+                f"{os.path.relpath(filename, base)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class QueryRecorder:
+    """
+    A ``connection.execute_wrapper`` that times every query and notes its
+    caller. Only the SQL text is kept, with its placeholders: the bound
+    parameters carry guest names, emails and session keys.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stack = _project_frames()
+            self.queries.append({
+                'database': self.alias,
+                'sql': sql,
+                'many': many,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                'frame': stack[-1] if stack else None,
+                'stack': stack,
+            })
+
+
+class ProfilingMiddleware:
+    """
+    Profile individual requests with cProfile and record their SQL.
+
+    Staff switch it on for one request with an ``X-Profile: 1`` header or a
+    ``?_profile=1`` query flag; BOOKINGS_PROFILING_SAMPLE_RATE (0.0-1.0)
+    additionally profiles that fraction of all requests. Each profile is a
+    directory under BOOKINGS_PROFILE_ROOT holding ``profile.prof`` (open with
+    pstats or snakeviz), ``queries.json`` and a ``summary.txt``; its name is
+    returned in the ``X-Profile-Id`` response header.
+
+    Profiles stay on the server's disk and record URL paths, code paths and
+    SQL without its parameters. Only active with BOOKINGS_PROFILING_ENABLED,
+    which is independent of DEBUG so slow pages can be diagnosed in
+    production; see the settings for how to do that safely.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.BOOKINGS_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        requested = (request.headers.get('X-Profile') == '1'
+                     or request.GET.get(PROFILE_QUERY_PARAM) == '1')
+        user = getattr(request, 'user', None)
+        if requested and user is not None and user.is_staff:
+            return True
+        sample_rate = getattr(settings, 'BOOKINGS_PROFILING_SAMPLE_RATE', 0.0)
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        recorders = [QueryRecorder(connection.alias) for connection in connections.all()]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection, recorder in zip(connections.all(), recorders):
+                stack.enter_context(connection.execute_wrapper(recorder))
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already running in this thread
+                logger.warning("Could not start profiler for %s", request.path)
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        queries = [query for recorder in recorders for query in recorder.queries]
+        try:
+            profile_id = self.save(request, response, profiler, queries, elapsed)
+        except OSError:
+            logger.exception("Could not save profile for %s", request.path)
+        else:
+            response['X-Profile-Id'] = profile_id
+        return response
+
+    def save(self, request, response, profiler, queries, elapsed):
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        profile_id = '{}-{}-{}'.format(
+            timezone.now().strftime('%Y%m%dT%H%M%S%f'),
+            view_name.replace(':', '_'), os.getpid())
+        directory = os.path.join(settings.BOOKINGS_PROFILE_ROOT, profile_id)
+        os.makedirs(directory)
+
+        profiler.dump_stats(os.path.join(directory, 'profile.prof'))
+        with open(os.path.join(directory, 'queries.json'), 'w') as f:
+            json.dump(queries, f, indent=2)
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(40)
+        query_ms = sum(query['duration_ms'] for query in queries)
+        with open(os.path.join(directory, 'summary.txt'), 'w') as f:
+            # The path only: query strings can carry personal details
+            f.write(f"{request.method} {request.path}\n")
+            f.write(f"view: {view_name}  status: {response.status_code}\n")
+            f.write(f"total: {elapsed * 1000:.1f}ms  "
+                    f"queries: {len(queries)} in {query_ms:.1f}ms\n\n")
+            for query in sorted(queries, key=lambda q: q['duration_ms'], reverse=True)[:10]:
+                f.write(f"{query['duration_ms']:>9.3f}ms  {query['frame']}\n    {query['sql']}\n")
+            f.write("\n")
+            f.write(stats_text.getvalue())
+        return profile_id
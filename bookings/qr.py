@@ -0,0 +1,36 @@
+# bookings/qr.py
+from io import BytesIO
+
+from django.core.cache import cache
+
+
+QR_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # Codes never change, keep them a month
+
+
+def _qr_cache_key(code):
+    return f"bookings:qr:{code}"
+
+
+def render_qr_code(code):
+    """Render a confirmation code as a PNG QR image."""
+    import qrcode  # Loads Pillow; most requests never need it
+
+    image = qrcode.make(code, box_size=8, border=2)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def get_qr_code(code):
+    """Return the PNG for a confirmation code, rendering it only on a cache miss."""
+    png = cache.get(_qr_cache_key(code))
+    if png is None:
+        png = prerender_qr_code(code)
+    return png
+
+
+def prerender_qr_code(code):
+    """Render a code's QR image ahead of time so the first view is a cache hit."""
+    png = render_qr_code(code)
+    cache.set(_qr_cache_key(code), png, QR_CACHE_TIMEOUT)
+    return png
@@ -0,0 +1,170 @@
+# bookings/rollup.py
+"""
+DailyBookingStats: bookings and covers per date, hour and status.
+
+Every Booking save or delete moves one booking's count and covers from the
+bucket it was in to the one it is in now, in the same transaction as the
+write. Writes that skip model signals keep the rollup in step themselves:
+the status transitions in bookings/maintenance.py and the seeder pass the
+rows they wrote to count_rows(), and archiving pauses the rollup because
+archived bookings stay counted.
+
+The bucket a booking is leaving comes from the values it was loaded with.
+Once an instance has been saved those may be out of date (and a rolled-back
+save leaves no trace on the instance), so later writes through it read the
+row back instead.
+
+``manage.py rebuild_booking_stats`` recounts a date range from Booking and
+ArchivedBooking, e.g. after editing bookings with raw SQL.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour
+
+from .models import ArchivedBooking, Booking, DailyBookingStats
+
+
+_paused = threading.local()
+
+
+@contextmanager
+def rollup_paused():
+    """Leave DailyBookingStats alone for booking writes in this block (this thread only)."""
+    previous = getattr(_paused, 'active', False)
+    _paused.active = True
+    try:
+        yield
+    finally:
+        _paused.active = previous
+
+
+def _state(booking_date, booking_time, status, number_of_guests):
+    return (
+        Booking._meta.get_field('booking_date').to_python(booking_date),
+        Booking._meta.get_field('booking_time').to_python(booking_time).hour,
+        status,
+        int(number_of_guests),
+    )
+
+
+def _current_state(booking):
+    return _state(booking.booking_date, booking.booking_time, booking.status,
+                  booking.number_of_guests)
+
+
+def _stored_state(booking):
+    """The state the booking's row holds before this write."""
+    if getattr(booking, '_rollup_saved', False) or not hasattr(booking, '_loaded_status'):
+        # Saved since it was loaded (the save may since have been rolled
+        # back), or not loaded through the ORM at all: ask the database
+        stored = Booking.objects.filter(pk=booking.pk).values_list(
+            'booking_date', 'booking_time', 'status', 'number_of_guests').first()
+        return _state(*stored) if stored else None
+    # Fields deferred when the booking was loaded haven't been changed by this save
+    loaded = [
+        (booking._loaded_booking_date, 'booking_date'),
+        (booking._loaded_booking_time, 'booking_time'),
+        (booking._loaded_status, 'status'),
+        (booking._loaded_number_of_guests, 'number_of_guests'),
+    ]
+    return _state(*[getattr(booking, name) if value is None else value for value, name in loaded])
+
+
+def _add_to_bucket(day, hour, status, bookings, covers):
+    bucket = DailyBookingStats.objects.filter(date=day, hour=hour, status=status)
+    if bucket.update(bookings=F('bookings') + bookings, covers=F('covers') + covers):
+        if bookings < 0:
+            bucket.filter(bookings__lte=0).delete()
+        return
+    try:
+        with transaction.atomic():
+            DailyBookingStats.objects.create(
+                date=day, hour=hour, status=status, bookings=bookings, covers=covers)
+    except IntegrityError:
+        # Another writer created the bucket first
+        bucket.update(bookings=F('bookings') + bookings, covers=F('covers') + covers)
+
+
+def _add(state, bookings):
+    day, hour, status, guests = state
+    _add_to_bucket(day, hour, status, bookings, bookings * guests)
+
+
+def count_rows(rows, sign=1):
+    """
+    Add (``sign=-1``: remove) bookings given as (date, time, status, guests)
+    rows to DailyBookingStats, one update per bucket they fall in. For
+    writes that skip model signals; call it in the same transaction.
+    """
+    totals = {}
+    for row in rows:
+        day, hour, status, guests = _state(*row)
+        bookings, covers = totals.get((day, hour, status), (0, 0))
+        totals[(day, hour, status)] = (bookings + sign, covers + sign * guests)
+    for (day, hour, status), (bookings, covers) in totals.items():
+        _add_to_bucket(day, hour, status, bookings, covers)
+
+
+def remember_stored_state(sender, instance, **kwargs):
+    """pre_save and pre_delete on Booking: what the row holds before this write."""
+    if instance.pk is not None and not getattr(_paused, 'active', False):
+        instance._rollup_previous = _stored_state(instance)
+
+
+def count_booking(sender, instance, created, **kwargs):
+    """post_save on Booking."""
+    if getattr(_paused, 'active', False):
+        return
+    previous = None if created else instance.__dict__.pop('_rollup_previous', None)
+    current = _current_state(instance)
+    if previous != current:
+        with transaction.atomic():
+            if previous is not None:
+                _add(previous, -1)
+            _add(current, 1)
+    instance._rollup_saved = True
+
+
+def uncount_booking(sender, instance, **kwargs):
+    """post_delete on Booking."""
+    if getattr(_paused, 'active', False):
+        return
+    state = instance.__dict__.pop('_rollup_previous', None)
+    _add(state or _current_state(instance), -1)
+
+
+def _in_range(queryset, field, since, until):
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{field}__lte': until})
+    return queryset
+
+
+def rebuild_daily_stats(since=None, until=None):
+    """
+    Recount DailyBookingStats for the dates from ``since`` to ``until``
+    (inclusive; open-ended where None) from live and archived bookings.
+    Returns the number of rows written.
+    """
+    with transaction.atomic():
+        # Deleting first takes the write lock, so no booking changes in between
+        _in_range(DailyBookingStats.objects.all(), 'date', since, until).delete()
+        totals = {}
+        for model in (Booking, ArchivedBooking):
+            rows = _in_range(model.objects.all(), 'booking_date', since, until).annotate(
+                hour=ExtractHour('booking_time')).values(
+                'booking_date', 'hour', 'status').annotate(
+                bookings=Count('id'), covers=Sum('number_of_guests')).order_by()
+            for row in rows:
+                key = (row['booking_date'], row['hour'], row['status'])
+                bookings, covers = totals.get(key, (0, 0))
+                totals[key] = (bookings + row['bookings'], covers + row['covers'])
+        DailyBookingStats.objects.bulk_create([
+            DailyBookingStats(date=day, hour=hour, status=status, bookings=bookings, covers=covers)
+            for (day, hour, status), (bookings, covers) in totals.items()
+        ], batch_size=1000)
+    return len(totals)
@@ -0,0 +1,128 @@
+# bookings/routers.py
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class ArchiveRouter:
+    """
+    Sends ArchivedBooking to BOOKINGS_ARCHIVE_DATABASE when one is configured,
+    and keeps every other bookings model off that database.
+    """
+    archive_model = 'archivedbooking'
+
+    def _archive_db(self):
+        return getattr(settings, 'BOOKINGS_ARCHIVE_DATABASE', None)
+
+    def _is_archive(self, model):
+        return (model._meta.app_label == 'bookings'
+                and model._meta.model_name == self.archive_model)
+
+    def db_for_read(self, model, **hints):
+        if self._archive_db() and self._is_archive(model):
+            return self._archive_db()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive_db = self._archive_db()
+        if not archive_db:
+            return None
+        if app_label == 'bookings' and model_name == self.archive_model:
+            return db == archive_db
+        if db == archive_db:
+            return False
+        return None
+
+
+# Per-request routing state, set by ReplicaMiddleware
+_state = Local()
+
+
+class ReplicaRouter:
+    """
+    Sends reads to BOOKINGS_REPLICA_DATABASE during safe (GET/HEAD) requests
+    and everything else to the primary:
+
+    - writes, and every read after the first write in a request;
+    - reads inside a transaction on the primary;
+    - reads from a browser that wrote something within the last
+      BOOKINGS_REPLICA_STICKY_SECONDS, so guests see their own bookings;
+    - sessions, background jobs and user cache invalidations, which are
+      always read fresh.
+
+    Outside of requests (management commands, the job worker) nothing is
+    routed to the replica.
+    """
+    primary_only = {('sessions', 'session'), ('bookings', 'job'),
+                    ('bookings', 'usercacheinvalidation')}
+
+    def _replica_db(self):
+        return getattr(settings, 'BOOKINGS_REPLICA_DATABASE', None)
+
+    def _is_primary_only(self, model):
+        return (model._meta.app_label, model._meta.model_name) in self.primary_only
+
+    def db_for_read(self, model, **hints):
+        replica_db = self._replica_db()
+        if (not replica_db
+                or not getattr(_state, 'use_replica', False)
+                or getattr(_state, 'wrote', False)
+                or self._is_primary_only(model)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return replica_db
+
+    def db_for_write(self, model, **hints):
+        if not self._replica_db():
+            return None
+        if not self._is_primary_only(model):
+            _state.wrote = True
+        # Explicit, or saving an instance read from the replica would
+        # follow it back there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        replica_db = self._replica_db()
+        if not replica_db:
+            return None
+        # The replica holds the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, replica_db}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, schema included
+        if db == self._replica_db():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Turns on replica reads for safe requests and, after a request that
+    wrote, sets a short-lived cookie that keeps that browser on the primary
+    until the replica has caught up.
+    """
+    cookie_name = 'bookings_primary'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.use_replica = (request.method in self.safe_methods
+                              and self.cookie_name not in request.COOKIES)
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            if _state.wrote:
+                response.set_cookie(
+                    self.cookie_name, '1', max_age=settings.BOOKINGS_REPLICA_STICKY_SECONDS,
+                    httponly=True, samesite='Lax')
+            return response
+        finally:
+            _state.use_replica = False
+            _state.wrote = False
@@ -0,0 +1,111 @@
+# bookings/runsheet.py
+import os
+from collections import Counter
+from io import BytesIO
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Booking
+
+
+def runsheet_queryset(day):
+    """All non-cancelled bookings for a day, with table and user in one query."""
+    return (
+        Booking.objects.filter(booking_date=day)
+        .exclude(status='cancelled')
+        .select_related('table', 'user')
+        .order_by('table__number', 'booking_time')
+    )
+
+
+def build_runsheet(day):
+    """
+    Build the run-sheet context for a day: bookings grouped by table and
+    time, plus covers per hour. Everything comes from a single query.
+    """
+    bookings = list(runsheet_queryset(day))
+
+    tables = [
+        {'table': table, 'bookings': list(group)}
+        for table, group in groupby(bookings, key=lambda b: b.table)
+    ]
+
+    covers = Counter()
+    for booking in bookings:
+        covers[booking.booking_time.hour] += booking.number_of_guests
+    covers_by_hour = [
+        {'hour': hour, 'covers': covers[hour]} for hour in sorted(covers)]
+
+    return {
+        'day': day,
+        'tables': tables,
+        'covers_by_hour': covers_by_hour,
+        'total_bookings': len(bookings),
+        'total_covers': sum(covers.values()),
+        'generated_at': timezone.now(),
+    }
+
+
+def runsheet_fingerprint(day):
+    """
+    A cheap fingerprint of a day's bookings. Any create, edit or status change
+    bumps ``updated_at`` or the row count, so a stored PDF is still current
+    as long as its fingerprint matches.
+    """
+    stats = Booking.objects.filter(booking_date=day).aggregate(
+        count=Count('id'), last_update=Max('updated_at'))
+    last_update = stats['last_update']
+    stamp = last_update.strftime('%Y%m%d%H%M%S%f') if last_update else '0'
+    return f"{stats['count']}-{stamp}"
+
+
+def render_runsheet_pdf(day):
+    """Render the run-sheet for a day into PDF bytes with one pisa call."""
+    # xhtml2pdf pulls in reportlab, pyHanko, lxml and more; only pay for
+    # that in the process that actually renders a PDF
+    from xhtml2pdf import pisa
+
+    html = get_template('bookings/staff_runsheet_pdf.html').render(
+        build_runsheet(day))
+    result = BytesIO()
+    pdf = pisa.CreatePDF(html, dest=result)
+    if pdf.err:
+        raise RuntimeError(f"Could not render run-sheet for {day}.")
+    return result.getvalue()
+
+
+def _runsheet_path(day, fingerprint):
+    return os.path.join(
+        settings.RUNSHEET_ROOT, f"runsheet-{day.isoformat()}-{fingerprint}.pdf")
+
+
+def get_runsheet_pdf(day, force=False):
+    """
+    Return the run-sheet PDF for a day, serving the pre-generated file when it
+    is still current and rendering (and storing) a fresh one otherwise.
+    """
+    fingerprint = runsheet_fingerprint(day)
+    path = _runsheet_path(day, fingerprint)
+
+    if not force and os.path.exists(path):
+        with open(path, 'rb') as fh:
+            return fh.read()
+
+    pdf = render_runsheet_pdf(day)
+    os.makedirs(settings.RUNSHEET_ROOT, exist_ok=True)
+
+    # Drop stale copies for the same day before writing the new one
+    prefix = f"runsheet-{day.isoformat()}-"
+    for name in os.listdir(settings.RUNSHEET_ROOT):
+        if name.startswith(prefix):
+            os.remove(os.path.join(settings.RUNSHEET_ROOT, name))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(pdf)
+    os.replace(tmp_path, path)
+    return pdf
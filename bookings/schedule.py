@@ -0,0 +1,180 @@
+# bookings/schedule.py
+"""
+Opening hours, compiled for fast lookups.
+
+The weekly OpeningHours and upcoming ScheduleExceptions are read once (two
+queries) and turned into one integer per date whose bit ``m`` is set when a
+booking may start at minute ``m`` of the day. Validating a booking time is
+then a shift and a mask, with no queries.
+
+The compiled schedule is kept per process. Saving or deleting hours or an
+exception rebuilds it in the process that made the change; other processes
+rebuild within BOOKINGS_SCHEDULE_TTL seconds.
+"""
+import threading
+import time as clock
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OpeningHours, ScheduleException
+
+
+# Compiled dates kept per schedule before the memo starts over
+MAX_MEMOISED_DATES = 1000
+
+
+def _minute(t):
+    return t.hour * 60 + t.minute
+
+
+def _span(start, end):
+    """Mask with the minutes from ``start`` to ``end`` (inclusive) set."""
+    first, last = _minute(start), _minute(end)
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def _periods(mask):
+    """The runs of set minutes in a mask, as (start, end) times."""
+    periods = []
+    minute = 0
+    while mask >> minute:
+        if not (mask >> minute) & 1:
+            # Jump to the next set bit
+            minute += ((mask >> minute) & -(mask >> minute)).bit_length() - 1
+            continue
+        start = minute
+        while (mask >> minute) & 1:
+            minute += 1
+        end = minute - 1
+        periods.append((time(start // 60, start % 60), time(end // 60, end % 60)))
+    return periods
+
+
+def format_time(t):
+    """9:00 AM, 10:30 PM."""
+    return t.strftime('%I:%M %p').lstrip('0')
+
+
+class Schedule:
+    """Compiled weekly hours plus exceptions; see the module docstring."""
+
+    def __init__(self, hours, exceptions):
+        self.weekly = [0] * 7
+        for period in hours:
+            self.weekly[period.weekday] |= _span(period.opens_at, period.closes_at)
+        self.exceptions = {}
+        for exception in exceptions:
+            self.exceptions.setdefault(exception.date, []).append(exception)
+        self.lock = threading.Lock()
+        self.masks = {}
+
+    def _compile(self, day):
+        exceptions = self.exceptions.get(day, [])
+        openings = [e for e in exceptions if e.is_open]
+        if openings:
+            mask = 0
+            for exception in openings:
+                mask |= _span(exception.starts_at, exception.ends_at)
+        else:
+            mask = self.weekly[day.weekday()]
+        for exception in exceptions:
+            if exception.is_open:
+                continue
+            if exception.starts_at is None:
+                return 0
+            mask &= ~_span(exception.starts_at, exception.ends_at)
+        return mask
+
+    def mask_for(self, day):
+        mask = self.masks.get(day)
+        if mask is None:
+            mask = self._compile(day)
+            with self.lock:
+                if len(self.masks) >= MAX_MEMOISED_DATES:
+                    self.masks.clear()
+                self.masks[day] = mask
+        return mask
+
+    def is_open(self, day, at):
+        """Whether a booking may start at ``at`` on ``day``."""
+        return bool((self.mask_for(day) >> _minute(at)) & 1)
+
+    def is_open_between(self, day, start, end):
+        """Whether a booking may start at any time from ``start`` to ``end``."""
+        return bool(self.mask_for(day) & _span(start, end))
+
+    def periods(self, day):
+        """The day's booking periods as (start, end) times, in order."""
+        return _periods(self.mask_for(day))
+
+    def period_at(self, day, at):
+        """The (start, end) period containing ``at``, or None."""
+        for start, end in self.periods(day):
+            if start <= at <= end:
+                return start, end
+        return None
+
+    def describe(self, day, joiner=' and '):
+        """
+        The day's hours for messages: "9:00 AM and 10:00 PM", or with
+        ``joiner=' to '`` "9:00 AM to 10:00 PM"; several periods are joined
+        with "or"; None when closed all day.
+        """
+        periods = self.periods(day)
+        if not periods:
+            return None
+        return ', or '.join(
+            f"{format_time(start)}{joiner}{format_time(end)}" for start, end in periods)
+
+
+_lock = threading.Lock()
+_compiled = None
+
+
+def get_schedule():
+    """The compiled schedule, rebuilt when invalidated or older than BOOKINGS_SCHEDULE_TTL."""
+    global _compiled
+    current = _compiled
+    if current is not None and current[1] > clock.monotonic():
+        return current[0]
+    with _lock:
+        if _compiled is current:
+            # Exceptions already in the past no longer matter
+            since = timezone.localdate() - timedelta(days=1)
+            schedule = Schedule(
+                list(OpeningHours.objects.all()),
+                list(ScheduleException.objects.filter(date__gte=since)))
+            _compiled = (schedule, clock.monotonic() + settings.BOOKINGS_SCHEDULE_TTL)
+        return _compiled[0]
+
+
+def invalidate_schedule():
+    global _compiled
+    with _lock:
+        _compiled = None
+
+
+def forget_schedule(sender, instance, **kwargs):
+    """post_save/post_delete on OpeningHours and ScheduleException."""
+    invalidate_schedule()
+
+
+def is_open(day, at):
+    return get_schedule().is_open(day, at)
+
+
+def hours_message(day, template, joiner=' and '):
+    """
+    A validation message naming the day's hours: ``template`` "Bookings can
+    only be made between {hours}." becomes "... between 9:00 AM and 10:00
+    PM." (pass ``joiner=' to '`` for "from {hours}" phrasing). On a day with
+    no hours at all the message says the restaurant is closed instead.
+    """
+    hours = get_schedule().describe(day, joiner=joiner)
+    if hours is None:
+        return f"The restaurant is closed on {day:%B %d, %Y}."
+    return template.format(hours=hours)
@@ -0,0 +1,226 @@
+# bookings/seeding.py
+import math
+import random
+import time as clock
+from datetime import time, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .availability import invalidate_availability
+from .models import (
+    Booking, Table, CONFIRMATION_CODE_ALPHABET, CONFIRMATION_CODE_LENGTH)
+from .rollup import count_rows
+
+
+SEED_USERNAME_PREFIX = 'seed-user-'
+SEED_PASSWORD = 'seed-password'
+
+# Table sizes in a typical dining room, and how often each occurs
+TABLE_CAPACITIES = [2, 4, 6, 8]
+TABLE_CAPACITY_WEIGHTS = [35, 40, 18, 7]
+
+# Party sizes 1..8; couples dominate, large groups are rare
+PARTY_SIZES = list(range(1, 9))
+PARTY_SIZE_WEIGHTS = [6, 45, 12, 22, 6, 6, 2, 1]
+
+# Bookable start times every 15 minutes within opening hours (9:00-22:00)
+START_TIMES = [time(9 + m // 60, m % 60) for m in range(0, 13 * 60 + 1, 15)]
+# Minimum gap between two sittings at one table. A booking holds its table
+# for its turn (turn_minutes, from the turn time rules for the table and
+# party size, else BOOKINGS_DEFAULT_TURN_MINUTES) and the database rejects
+# overlapping turns. Seeded rows keep the model's default turn, so any gap
+# at least that long is safe; this one leaves room for a changeover.
+TURN_MINUTES = 90
+
+# Sittings per table per day: weekdays are quieter than Friday/Saturday
+SITTINGS = [0, 1, 2, 3, 4]
+WEEKDAY_SITTING_WEIGHTS = [20, 30, 30, 15, 5]
+WEEKEND_SITTING_WEIGHTS = [5, 15, 35, 30, 15]
+
+PAST_STATUSES = (['completed', 'cancelled'], [88, 12])
+FUTURE_STATUSES = (['confirmed', 'pending', 'cancelled'], [80, 12, 8])
+TODAY_STATUSES = (['confirmed', 'seated', 'pending', 'cancelled'], [55, 25, 10, 10])
+
+NOTES = [
+    'Birthday celebration', 'Window seat if possible', 'High chair needed',
+    'Vegetarian in the party', 'Nut allergy', 'Anniversary', 'Wheelchair access',
+    'Running late, please hold the table',
+]
+NOTES_RATE = 0.1
+
+
+def _time_weight(t):
+    """Relative popularity of a start time: a lunch peak and a bigger dinner peak."""
+    minutes = t.hour * 60 + t.minute
+    lunch = math.exp(-((minutes - 12.75 * 60) / 45) ** 2)
+    dinner = math.exp(-((minutes - 19.5 * 60) / 60) ** 2)
+    return 0.05 + 1.0 * lunch + 2.0 * dinner
+
+
+START_TIME_CUM_WEIGHTS = list(accumulate(_time_weight(t) for t in START_TIMES))
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def _pick_times(rng, count):
+    """``count`` start times, popular times favoured, a full turn apart."""
+    chosen = []
+    for _ in range(count * 4):
+        if len(chosen) == count:
+            break
+        candidate = rng.choices(START_TIMES, cum_weights=START_TIME_CUM_WEIGHTS)[0]
+        if all(abs(_minutes(candidate) - _minutes(t)) >= TURN_MINUTES for t in chosen):
+            chosen.append(candidate)
+    # Unlucky draws: fill any remaining sittings from the first free slots
+    for candidate in START_TIMES:
+        if len(chosen) == count:
+            break
+        if all(abs(_minutes(candidate) - _minutes(t)) >= TURN_MINUTES for t in chosen):
+            chosen.append(candidate)
+    return sorted(chosen)
+
+
+def _sitting_counts(rng, table_count, total, last_day):
+    """
+    Decide how many sittings each table gets on each day, walking back from
+    ``last_day`` until ``total`` bookings are placed. Returns
+    ``[(day, [count per table]), ...]`` oldest day first.
+    """
+    days = []
+    placed = 0
+    day = last_day
+    while placed < total:
+        weights = (WEEKEND_SITTING_WEIGHTS if day.weekday() in (4, 5)
+                   else WEEKDAY_SITTING_WEIGHTS)
+        counts = rng.choices(SITTINGS, weights=weights, k=table_count)
+        for index, count in enumerate(counts):
+            # Trim the final (oldest) day so the total comes out exact
+            counts[index] = min(count, total - placed)
+            placed += counts[index]
+        days.append((day, counts))
+        day -= timedelta(days=1)
+    days.reverse()
+    return days
+
+
+def _confirmation_codes(rng, taken):
+    while True:
+        code = ''.join(rng.choices(CONFIRMATION_CODE_ALPHABET, k=CONFIRMATION_CODE_LENGTH))
+        if code not in taken:
+            taken.add(code)
+            yield code
+
+
+def _create_users(count):
+    """Create (or reuse) ``count`` seed users; returns their ids."""
+    usernames = [f'{SEED_USERNAME_PREFIX}{n:06d}' for n in range(1, count + 1)]
+    # Hashing is deliberately slow, so every seed user shares one hash
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create(
+        [User(username=name, email=f'{name}@example.com', password=password)
+         for name in usernames],
+        batch_size=1000, ignore_conflicts=True)
+    ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    return [ids[name] for name in usernames]
+
+
+def _create_tables(rng, count):
+    """Add ``count`` tables numbered after the existing ones."""
+    start = (Table.objects.aggregate(Max('number'))['number__max'] or 0) + 1
+    capacities = rng.choices(TABLE_CAPACITIES, weights=TABLE_CAPACITY_WEIGHTS, k=count)
+    Table.objects.bulk_create(
+        [Table(number=start + n, capacity=capacities[n]) for n in range(count)])
+    return list(Table.objects.filter(number__gte=start).order_by('number'))
+
+
+def seed_bookings(tables=30, users=1000, bookings=100_000, days_ahead=30,
+                  seed=0, batch_size=5000, progress=None):
+    """
+    Fill the database with realistic synthetic bookings for scale testing.
+
+    New tables are added alongside any existing ones and the bookings are
+    spread back in time from ``days_ahead`` days in the future, busier at
+    lunch, dinner and weekends, with party sizes that fit each table and
+    statuses that match whether the date has passed. The same ``seed``
+    always produces the same data. ``progress`` is called with the running
+    total after every batch.
+
+    Rows are written with ``bulk_create`` and so skip ``Booking.save()`` and
+    model signals; confirmation codes are generated here instead,
+    ``created_at`` is the time of the run, each batch is added to the daily
+    stats, and cached availability is invalidated once at the
+    end.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+
+    user_ids = _create_users(users)
+    # A few regulars book far more often than everyone else
+    user_cum_weights = list(accumulate(1 / (n + 1) ** 0.8 for n in range(len(user_ids))))
+    seeded_tables = _create_tables(rng, tables)
+
+    codes = _confirmation_codes(
+        rng, set(Booking.objects.values_list('confirmation_code', flat=True)))
+
+    def rows():
+        for day, counts in _sitting_counts(
+                rng, len(seeded_tables), bookings, today + timedelta(days=days_ahead)):
+            if day < today:
+                statuses, status_weights = PAST_STATUSES
+            elif day == today:
+                statuses, status_weights = TODAY_STATUSES
+            else:
+                statuses, status_weights = FUTURE_STATUSES
+            day_user_ids = rng.choices(user_ids, cum_weights=user_cum_weights, k=sum(counts))
+            for table, count in zip(seeded_tables, counts):
+                for booking_time in _pick_times(rng, count):
+                    yield Booking(
+                        user_id=day_user_ids.pop(),
+                        table_id=table.id,
+                        booking_date=day,
+                        booking_time=booking_time,
+                        number_of_guests=rng.choices(
+                            PARTY_SIZES[:table.capacity],
+                            weights=PARTY_SIZE_WEIGHTS[:table.capacity])[0],
+                        notes=rng.choice(NOTES) if rng.random() < NOTES_RATE else '',
+                        status=rng.choices(statuses, weights=status_weights)[0],
+                        confirmation_code=next(codes),
+                    )
+
+    started = clock.monotonic()
+    created = 0
+    batch = []
+    for booking in rows():
+        batch.append(booking)
+        if len(batch) == batch_size:
+            created += _write_batch(batch)
+            batch = []
+            if progress:
+                progress(created)
+    if batch:
+        created += _write_batch(batch)
+        if progress:
+            progress(created)
+    invalidate_availability()
+
+    return {
+        'tables': len(seeded_tables),
+        'users': len(user_ids),
+        'bookings': created,
+        'seconds': clock.monotonic() - started,
+    }
+
+
+def _write_batch(batch):
+    with transaction.atomic():
+        Booking.objects.bulk_create(batch)
+        count_rows([(booking.booking_date, booking.booking_time, booking.status,
+                     booking.number_of_guests) for booking in batch])
+    return len(batch)
@@ -0,0 +1,155 @@
+# bookings/staticfiles.py
+import gzip
+import logging
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico',
+    '.eot', '.ttf', '.otf',
+}
+# Compressed variants only worth keeping below this share of the original
+MAX_COMPRESSED_RATIO = 0.95
+# Variants in order of preference: (Accept-Encoding token, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+_ACCEPT_ENCODING_TOKEN = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q=([0-9.]+))?', re.I)
+
+
+def _brotli():
+    try:
+        import brotli  # Optional; only collectstatic needs it
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress_file(path):
+    """
+    Write ``path.gz`` and (with the brotli package) ``path.br`` next to a
+    static file, keeping only the variants that are meaningfully smaller.
+    Returns the suffixes written.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    variants = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    brotli = _brotli()
+    if brotli is not None:
+        variants.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+
+    written = []
+    for suffix, compress in variants:
+        compressed = compress(content)
+        if len(compressed) < len(content) * MAX_COMPRESSED_RATIO:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes gzip and brotli copies of
+    every compressible file, hashed and unhashed, during collectstatic.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        if _brotli() is None:
+            logger.warning("brotli is not installed; writing gzip variants only")
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                compress_file(self.path(name))
+
+
+def accepted_encodings(header):
+    """The content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    for token in header.split(','):
+        match = _ACCEPT_ENCODING_TOKEN.match(token)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serves STATIC_ROOT at STATIC_URL before the rest of the stack runs (no
+    session, user or database work). Fingerprinted names from the manifest
+    are sent as immutable for a year; anything else gets a short max-age
+    and Last-Modified revalidation. Precompressed .br/.gz variants are used
+    when the client accepts them.
+
+    Enabled by BOOKINGS_SERVE_STATIC; in development runserver serves static
+    files itself.
+    """
+    unhashed_max_age = 60
+
+    def __init__(self, get_response):
+        if not settings.BOOKINGS_SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = settings.STATIC_ROOT
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        self.immutable = set(hashed_files.values()) - set(hashed_files)
+
+    def __call__(self, request):
+        if request.path.startswith(self.prefix) and request.method in ('GET', 'HEAD'):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        immutable = name in self.immutable
+        if not immutable and not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, encoding = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        served_path, content_encoding = path, encoding
+        if encoding is None:
+            for token, suffix in ENCODINGS:
+                if token in accepted and os.path.isfile(path + suffix):
+                    served_path, content_encoding = path + suffix, token
+                    break
+
+        response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        response['Vary'] = 'Accept-Encoding'
+        if immutable:
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response['Cache-Control'] = f'public, max-age={self.unhashed_max_age}'
+            response['Last-Modified'] = http_date(stat.st_mtime)
+        return response
@@ -0,0 +1,258 @@
+# bookings/stress.py
+import random
+import statistics
+import threading
+import time as clock
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.base import UpdateError
+from django.db import OperationalError, connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Booking, Table
+
+
+STRESS_USERNAME_PREFIX = 'stress-user-'
+# A small, busy dining room: few tables and a handful of evening slots, so
+# concurrent requests keep landing on the same table at the same time
+STRESS_TABLE_CAPACITIES = [2, 2, 4, 4, 6]
+STRESS_TIMES = [time(hour, minute) for hour in range(18, 22) for minute in (0, 30)]
+# How often each operation is picked; edits and cancels need an own booking
+OPERATIONS = ['book', 'edit', 'cancel']
+OPERATION_WEIGHTS = [70, 15, 15]
+
+
+def _settle(func, attempts=20):
+    """
+    Run a bookkeeping query, waiting out lock errors. Only the requests under
+    test should be exposed to contention, not the harness's own reads.
+    """
+    for attempt in range(attempts):
+        try:
+            return func()
+        except (OperationalError, UpdateError):
+            if attempt == attempts - 1:
+                raise
+            clock.sleep(0.05 * (attempt + 1))
+
+
+def prepare_stress_data(workers):
+    """Create the tables and one user per worker; returns the user ids."""
+    Table.objects.bulk_create([
+        Table(number=n, capacity=capacity)
+        for n, capacity in enumerate(STRESS_TABLE_CAPACITIES, start=1)])
+    User.objects.bulk_create([
+        User(username=f'{STRESS_USERNAME_PREFIX}{n:04d}') for n in range(workers)])
+    return list(User.objects.filter(
+        username__startswith=STRESS_USERNAME_PREFIX).order_by('username')
+        .values_list('id', flat=True))
+
+
+class StressWorker:
+    """
+    One simulated guest hammering the booking views through the test client.
+
+    It remembers what the server told it: every booking it was told was
+    made, with the date, time and status it should now have. Requests that
+    died with an exception may or may not have been applied, so they are
+    counted per worker and let the invariant checks allow for either outcome.
+    """
+
+    def __init__(self, user_id, operations, days, seed):
+        self.user = _settle(lambda: User.objects.get(id=user_id))
+        self.operations = operations
+        self.days = days
+        self.rng = random.Random(seed)
+        self.client = Client(raise_request_exception=True)
+        _settle(lambda: self.client.force_login(self.user))
+        self.bookings = {}
+        self.uncertain_creates = 0
+        self.uncertain_ids = set()
+        self.outcomes = Counter()
+        self.locked = 0
+        self.timings = []
+
+    def _slot(self):
+        day = timezone.now().date() + timedelta(days=self.rng.randint(1, self.days))
+        return day, self.rng.choice(STRESS_TIMES)
+
+    def _request(self, path, data):
+        """POST and classify as ('ok' | 'rejected' | 'failed' | 'error', locked?)."""
+        try:
+            response = self.client.post(path, data)
+        except Exception as e:
+            return 'error', 'locked' in str(e)
+        if response.status_code == 302:
+            return 'ok', False
+        content = response.content
+        if b'An error occurred' in content:
+            # The view caught a database error and rolled back
+            return 'failed', b'locked' in content
+        return 'rejected', False
+
+    def book(self):
+        day, slot = self._slot()
+        outcome, locked = self._request(reverse('make_booking'), {
+            'booking_date': day.isoformat(),
+            'booking_time': slot.strftime('%H:%M'),
+            'number_of_guests': self.rng.randint(1, 4),
+        })
+        if outcome == 'ok':
+            created = _settle(lambda: Booking.objects.filter(
+                user=self.user, booking_date=day, booking_time=slot,
+            ).exclude(id__in=self.bookings).values_list('id', flat=True).first())
+            self.bookings[created] = (day, slot, 'confirmed')
+        elif outcome == 'error':
+            self.uncertain_creates += 1
+        return outcome, locked
+
+    def _own_active(self):
+        return [pk for pk, (_, _, status) in self.bookings.items() if status != 'cancelled']
+
+    def edit(self):
+        pk = self.rng.choice(self._own_active())
+        day, slot = self._slot()
+        outcome, locked = self._request(reverse('edit_booking', args=[pk]), {
+            'booking_date': day.isoformat(),
+            'booking_time': slot.strftime('%H:%M'),
+            'number_of_guests': self.rng.randint(1, 4),
+        })
+        if outcome == 'ok':
+            self.bookings[pk] = (day, slot, self.bookings[pk][2])
+        elif outcome == 'error':
+            self.uncertain_ids.add(pk)
+        return outcome, locked
+
+    def cancel(self):
+        pk = self.rng.choice(self._own_active())
+        outcome, locked = self._request(reverse('cancel_booking', args=[pk]), {})
+        if outcome == 'ok':
+            day, slot, _ = self.bookings[pk]
+            self.bookings[pk] = (day, slot, 'cancelled')
+        elif outcome == 'error':
+            self.uncertain_ids.add(pk)
+        return outcome, locked
+
+    def run(self):
+        for _ in range(self.operations):
+            operation = self.rng.choices(OPERATIONS, weights=OPERATION_WEIGHTS)[0]
+            if operation != 'book' and not self._own_active():
+                operation = 'book'
+            started = clock.perf_counter()
+            outcome, locked = getattr(self, operation)()
+            self.timings.append(clock.perf_counter() - started)
+            self.outcomes[f'{operation}:{outcome}'] += 1
+            self.locked += locked
+        return self.result()
+
+    def result(self):
+        return {
+            'user_id': self.user.id,
+            'bookings': {pk: state for pk, state in self.bookings.items()},
+            'uncertain_creates': self.uncertain_creates,
+            'uncertain_ids': sorted(self.uncertain_ids),
+            'outcomes': dict(self.outcomes),
+            'locked': self.locked,
+            'timings': self.timings,
+        }
+
+
+def run_workers(user_ids, operations, days, seed):
+    """Run one worker thread per user id and collect their results."""
+    results = []
+    lock = threading.Lock()
+
+    def target(index, user_id):
+        try:
+            result = StressWorker(user_id, operations, days, seed + index).run()
+            with lock:
+                results.append(result)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=target, args=(index, user_id))
+               for index, user_id in enumerate(user_ids)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_invariants(results):
+    """
+    Compare the database with what the workers were told. Returns a list of
+    violations: overlapping active bookings on a table, bookings that were
+    confirmed to a guest but are missing or different, and bookings nobody
+    was told about.
+    """
+    violations = []
+
+    # Sorted by start, a booking clashes with the earlier one on its table
+    # and date that holds the table longest
+    active = Booking.objects.exclude(status='cancelled').order_by(
+        'table_id', 'booking_date', 'booking_time').values_list(
+        'id', 'table_id', 'booking_date', 'booking_time', 'turn_minutes')
+    holder = None
+    for row in active:
+        start = datetime.combine(row[2], row[3])
+        end = start + timedelta(minutes=row[4])
+        if holder and holder[0][1:3] == row[1:3] and start < holder[1]:
+            violations.append(
+                f"double booking: #{holder[0][0]} and #{row[0]} on table id "
+                f"{row[1]} at {holder[0][3]:%H:%M}/{row[3]:%H:%M} on {row[2]}")
+        if not holder or holder[0][1:3] != row[1:3] or end > holder[1]:
+            holder = (row, end)
+
+    for result in results:
+        stored = {
+            pk: (day, slot, status) for pk, day, slot, status in
+            Booking.objects.filter(user_id=result['user_id']).values_list(
+                'id', 'booking_date', 'booking_time', 'status')}
+        for pk, expected in result['bookings'].items():
+            if pk not in stored:
+                violations.append(f"lost booking: #{pk}")
+            elif stored[pk] != tuple(expected) and pk not in result['uncertain_ids']:
+                violations.append(f"booking #{pk} is {stored[pk]}, guest was told {tuple(expected)}")
+        unknown = set(stored) - set(result['bookings'])
+        if len(unknown) > result['uncertain_creates']:
+            violations.append(
+                f"user id {result['user_id']} has {len(unknown)} booking(s) they were never "
+                f"told about: {sorted(unknown)}")
+    return violations
+
+
+def expected_status_counts(results):
+    counts = Counter()
+    for result in results:
+        counts.update(status for _, _, status in result['bookings'].values())
+    return counts
+
+
+def summarise(results, seconds):
+    """Throughput, latency and error rates for a run."""
+    outcomes = Counter()
+    for result in results:
+        outcomes.update(result['outcomes'])
+    timings = sorted(t * 1000 for result in results for t in result['timings'])
+    total = len(timings)
+    locked = sum(result['locked'] for result in results)
+    if total > 1:
+        cut_points = statistics.quantiles(timings, n=20, method='inclusive')
+        p50, p95 = cut_points[9], cut_points[18]
+    else:
+        p50 = p95 = timings[0] if timings else 0.0
+    return {
+        'operations': total,
+        'seconds': seconds,
+        'throughput': total / seconds if seconds else 0.0,
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'locked': locked,
+        'locked_rate': locked / total if total else 0.0,
+        'outcomes': dict(sorted(outcomes.items())),
+    }
@@ -0,0 +1,28 @@
+# bookings/tasks.py
+# Background job handlers, registered on app start (see BookingsConfig.ready)
+from datetime import date, time
+
+from django.conf import settings
+
+from .emails import send_batch
+from .jobs import register
+from .runsheet import get_runsheet_pdf
+from .waitlist import match_waitlist
+
+
+@register('send_booking_email', batch_size=settings.BOOKING_EMAIL_BATCH_SIZE,
+          concurrency=settings.BOOKING_EMAIL_CONCURRENCY)
+def send_booking_emails(payloads):
+    return send_batch(payloads)
+
+
+@register('generate_runsheet', concurrency=1)
+def generate_runsheet(payload):
+    get_runsheet_pdf(date.fromisoformat(payload['date']), force=payload.get('force', False))
+
+
+# One matcher at a time; place_booking would reject a double booking anyway
+@register('match_waitlist', concurrency=1)
+def match_waitlist_slot(payload):
+    match_waitlist(date.fromisoformat(payload['date']), time.fromisoformat(payload['time']),
+                   payload['capacity'])
@@ -0,0 +1,124 @@
+# bookings/tests/test_allocation.py
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from bookings.allocation import (
+    BookingConflict, NoTableAvailable, free_tables, is_overlap_error, place_booking)
+from bookings.models import Booking, Table
+
+User = get_user_model()
+
+
+class OverlapConstraintTest(TestCase):
+    """
+    Tests for the database-level guarantee that a table is never held by two
+    bookings at once.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='password123')
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.day = date.today() + timedelta(days=3)
+        self.booking = self._book(time(19, 0))
+
+    def _book(self, at, table=None, status='confirmed', turn_minutes=60):
+        return Booking.objects.create(
+            user=self.user, table=table or self.table, booking_date=self.day,
+            booking_time=at, number_of_guests=2, status=status, turn_minutes=turn_minutes)
+
+    def test_overlapping_insert_is_rejected(self):
+        """
+        The 19:00 booking holds the table until 20:00; a booking ending after
+        19:00 or starting before 20:00 overlaps it.
+        """
+        for at, turn_minutes in [(time(19, 30), 60), (time(18, 1), 60), (time(17, 0), 150)]:
+            with self.assertRaises(IntegrityError) as caught, transaction.atomic():
+                self._book(at, turn_minutes=turn_minutes)
+            self.assertTrue(is_overlap_error(caught.exception))
+
+    def test_turns_may_meet_end_to_start(self):
+        self._book(time(18, 0))
+        self._book(time(20, 0), turn_minutes=180)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._book(time(22, 30))
+
+    def test_non_overlapping_bookings_are_allowed(self):
+        self._book(time(20, 15))
+        self._book(time(19, 30), table=Table.objects.create(number=2, capacity=4))
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_cancelled_bookings_do_not_block(self):
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        self._book(time(19, 30))
+        self.assertEqual(Booking.objects.exclude(status='cancelled').count(), 1)
+
+    def test_overlapping_update_is_rejected(self):
+        """
+        Moving a booking into another's hour, or reinstating a cancelled one
+        whose slot was rebooked, fails; saving it where it is does not.
+        """
+        later = self._book(time(21, 0))
+        later.notes = "Window seat"
+        later.save()
+
+        later.booking_time = time(19, 45)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            later.save()
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        self._book(time(19, 30))
+        self.booking.status = 'confirmed'
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.booking.save()
+
+
+class PlaceBookingTest(TestCase):
+    """
+    Tests for choosing a table and saving a booking against the constraint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='password123')
+        self.small = Table.objects.create(number=1, capacity=2)
+        self.large = Table.objects.create(number=2, capacity=6)
+        self.day = date.today() + timedelta(days=3)
+
+    def _new(self, at=time(19, 0), guests=2):
+        return Booking(user=self.user, booking_date=self.day, booking_time=at,
+                       number_of_guests=guests, status='confirmed')
+
+    def test_smallest_free_table_is_chosen(self):
+        with transaction.atomic():
+            self.assertEqual(place_booking(self._new()), self.small)
+            self.assertEqual(place_booking(self._new(time(19, 30))), self.large)
+        self.assertEqual(list(free_tables(self.day, time(19, 15), 2)), [])
+
+    def test_lost_race_falls_through_to_next_table(self):
+        """
+        If the table read as free was taken meanwhile, the insert fails and
+        the next candidate is used.
+        """
+        Booking.objects.create(
+            user=self.user, table=self.small, booking_date=self.day,
+            booking_time=time(19, 0), number_of_guests=2)
+        stale = [self.small, self.large]
+        with mock.patch('bookings.allocation.free_tables', return_value=stale):
+            with transaction.atomic():
+                booking = self._new(time(19, 30))
+                self.assertEqual(place_booking(booking), self.large)
+        self.assertEqual(Booking.objects.get(pk=booking.pk).table, self.large)
+
+        with mock.patch('bookings.allocation.free_tables', return_value=stale):
+            with self.assertRaises(BookingConflict), transaction.atomic():
+                place_booking(self._new(time(19, 15)))
+
+    def test_no_table_available(self):
+        with self.assertRaises(NoTableAvailable), transaction.atomic():
+            place_booking(self._new(guests=8))
+        self.assertFalse(Booking.objects.exists())
@@ -0,0 +1,104 @@
+# bookings/tests/test_analytics.py
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.analytics import compute_analytics, load_columns
+from bookings.models import Booking, Table
+
+
+User = get_user_model()
+
+
+class AnalyticsTest(TestCase):
+    """
+    Tests for the occupancy heatmap, cancellation rates and demand forecast.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='staff', password='password123', is_staff=True)
+        cls.guest = User.objects.create_user(username='guest', password='password123')
+        cls.four = Table.objects.create(number=1, capacity=4)
+        cls.six = Table.objects.create(number=2, capacity=6)
+        cls.today = timezone.localdate()
+        # The most recent Monday before today
+        cls.monday = cls.today - timedelta(days=cls.today.weekday() or 7)
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, day, at, table, guests, status='completed', booked_days_ahead=None):
+        booking = Booking.objects.create(
+            user=self.guest, table=table, booking_date=day, booking_time=at,
+            number_of_guests=guests, status=status)
+        if booked_days_ahead is not None:
+            booked_at = timezone.make_aware(
+                datetime.combine(day - timedelta(days=booked_days_ahead), time(12, 0)))
+            Booking.objects.filter(pk=booking.pk).update(created_at=booked_at)
+        return booking
+
+    def test_columns_come_from_one_query(self):
+        self.book(self.monday, time(19, 15), self.four, 3, booked_days_ahead=5)
+        with self.assertNumQueries(1):
+            columns = load_columns(self.monday, self.today)
+        self.assertEqual(columns['slot'].tolist(), [38])
+        self.assertEqual(columns['guests'].tolist(), [3])
+        self.assertEqual(columns['lead'].tolist(), [5])
+
+    def test_heatmap_spreads_covers_over_the_turn(self):
+        self.book(self.monday, time(19, 0), self.four, 4)
+        self.book(self.monday, time(19, 0), self.six, 6, status='cancelled')
+        heatmap = compute_analytics(self.today, weeks=4)['heatmap']
+        self.assertEqual(heatmap['slots'], ['19:00', '19:30'])
+        # 4 of 10 seats, on one of the 4 Mondays in the window
+        self.assertEqual(heatmap['occupancy'][0], [0.1, 0.1])
+        self.assertEqual(heatmap['occupancy'][1], [0.0, 0.0])
+
+    def test_cancellation_rates(self):
+        self.book(self.monday, time(12, 0), self.four, 2)
+        self.book(self.monday, time(14, 0), self.four, 2)
+        self.book(self.monday, time(16, 0), self.four, 2)
+        self.book(self.monday, time(18, 0), self.four, 2, status='cancelled', booked_days_ahead=10)
+        rates = compute_analytics(self.today, weeks=4)['cancellations']
+        self.assertEqual(rates['overall'], 0.25)
+        self.assertEqual(rates['by_weekday']['Monday'], 0.25)
+        self.assertIsNone(rates['by_weekday']['Tuesday'])
+        by_lead = {bucket['lead_time']: bucket for bucket in rates['by_lead_time']}
+        self.assertEqual(by_lead['8-14 days'], {'lead_time': '8-14 days', 'bookings': 1, 'rate': 1.0})
+        self.assertEqual(by_lead['Same day']['rate'], 0.0)
+
+    def test_forecast_adds_expected_pickup_to_booked_covers(self):
+        target = self.today + timedelta(days=2)
+        # The same weekday last week was busy, all booked a day ahead
+        self.book(target - timedelta(days=7), time(19, 0), self.four, 4, booked_days_ahead=1)
+        self.book(target - timedelta(days=7), time(19, 0), self.six, 4, booked_days_ahead=1)
+        self.book(target, time(19, 0), self.six, 6, status='confirmed')
+
+        forecast = {day['date']: day for day in compute_analytics(self.today, weeks=1)['forecast']}
+        day = forecast[target.isoformat()]
+        # Two days out, last week's 8 covers are all still to come
+        self.assertEqual((day['on_books'], day['expected']), (6, 14.0))
+        self.assertEqual(day['peak_slot'], '19:00')
+        self.assertTrue(day['sells_out'])
+        quiet = forecast[(target + timedelta(days=1)).isoformat()]
+        self.assertEqual((quiet['expected'], quiet['sells_out']), (0.0, False))
+
+    def test_staff_page_and_json(self):
+        self.book(self.monday, time(19, 0), self.six, 6)
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('staff_analytics'))
+        self.assertContains(response, 'Average Occupancy by Weekday and Time')
+        self.assertContains(response, '<th>19:00</th>', html=True)
+
+        response = self.client.get(reverse('staff_analytics_json'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['seats'], 10)
+        self.assertEqual(len(response.json()['forecast']), 14)
+
+        self.client.login(username='guest', password='password123')
+        self.assertRedirects(self.client.get(reverse('staff_analytics_json')), reverse('home'))
@@ -0,0 +1,132 @@
+# bookings/tests/test_archive.py
+from datetime import date, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from bookings.archive import archive_bookings
+from bookings.models import ArchivedBooking, Booking, Table
+from bookings.routers import ArchiveRouter
+
+
+User = get_user_model()
+
+
+class ArchiveBookingsTest(TestCase):
+    """
+    Tests for moving old bookings out of the live table.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='regular', password='password123')
+        cls.other = User.objects.create_user(username='other', password='password123')
+        cls.staff = User.objects.create_user(
+            username='staff', password='password123', is_staff=True)
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.today = date.today()
+
+        def book(days, status, user=None):
+            return Booking.objects.create(
+                user=user or cls.user, table=cls.table,
+                booking_date=cls.today + timedelta(days=days),
+                booking_time=time(19, 0), number_of_guests=2, status=status)
+
+        cls.old = [book(-400 - d, 'completed') for d in range(3)]
+        cls.old_cancelled = book(-300, 'cancelled')
+        cls.old_other_user = book(-350, 'completed', user=cls.other)
+        cls.old_confirmed = book(-500, 'confirmed')
+        cls.recent = book(-5, 'completed')
+
+    def test_only_old_finished_bookings_are_moved(self):
+        """
+        Completed/cancelled bookings past the cut-off move to the archive
+        with their details; everything else stays live.
+        """
+        moved = archive_bookings(before=self.today - timedelta(days=180), batch_size=2)
+        self.assertEqual(moved, 5)
+        self.assertEqual(
+            set(Booking.objects.values_list('id', flat=True)),
+            {self.old_confirmed.id, self.recent.id})
+
+        archived = ArchivedBooking.objects.get(original_id=self.old_cancelled.id)
+        self.assertEqual(archived.username, 'regular')
+        self.assertEqual(archived.table_number, 1)
+        self.assertEqual(archived.status, 'cancelled')
+        self.assertEqual(archived.confirmation_code, self.old_cancelled.confirmation_code)
+
+    def test_rerun_is_harmless(self):
+        """
+        Rows already in the archive are skipped rather than duplicated.
+        """
+        ArchivedBooking.objects.create(**{
+            field.name: getattr(ArchivedBooking.from_booking(self.old[0]), field.name)
+            for field in ArchivedBooking._meta.concrete_fields if field.name != 'id'})
+        archive_bookings(before=self.today - timedelta(days=180))
+        self.assertEqual(ArchivedBooking.objects.count(), 5)
+        self.assertFalse(Booking.objects.filter(id=self.old[0].id).exists())
+
+    def test_command(self):
+        """
+        The command reports how many bookings it archived.
+        """
+        out = StringIO()
+        call_command('archive_bookings', older_than_days=320, stdout=out)
+        self.assertIn("Archived 4 booking(s)", out.getvalue())
+
+    def test_my_bookings_shows_archive_on_request(self):
+        """
+        Archived history is hidden by default and merged in newest first
+        when asked for; other users' archived bookings never appear.
+        """
+        archive_bookings(before=self.today - timedelta(days=180))
+        self.client.login(username='regular', password='password123')
+
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(response.context['past_bookings']), 2)
+
+        response = self.client.get(reverse('my_bookings') + '?archived=1')
+        past = response.context['past_bookings']
+        self.assertEqual(len(past), 6)
+        dates = [booking.booking_date for booking in past]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(
+            [booking.is_archived for booking in past],
+            [False, True, True, True, True, False])
+
+    def test_staff_list_includes_archive_on_request(self):
+        """
+        The staff list pages through live and archived bookings together.
+        """
+        archive_bookings(before=self.today - timedelta(days=180))
+        self.client.login(username='staff', password='password123')
+
+        response = self.client.get(reverse('staff_booking_list'))
+        self.assertEqual(response.context['bookings'].paginator.count, 2)
+
+        response = self.client.get(
+            reverse('staff_booking_list') + '?archived=1&q=other')
+        page = response.context['bookings']
+        self.assertEqual(page.paginator.count, 1)
+        self.assertEqual(page[0].original_id, self.old_other_user.id)
+        self.assertContains(response, 'Archived')
+
+
+class ArchiveRouterTest(TestCase):
+    """
+    Tests for routing the archive to its own database.
+    """
+
+    def test_routes_only_when_configured(self):
+        router = ArchiveRouter()
+        with self.settings(BOOKINGS_ARCHIVE_DATABASE=None):
+            self.assertIsNone(router.db_for_read(ArchivedBooking))
+            self.assertIsNone(router.allow_migrate('default', 'bookings', 'archivedbooking'))
+        with self.settings(BOOKINGS_ARCHIVE_DATABASE='archive'):
+            self.assertEqual(router.db_for_write(ArchivedBooking), 'archive')
+            self.assertIsNone(router.db_for_read(Booking))
+            self.assertFalse(router.allow_migrate('default', 'bookings', 'archivedbooking'))
+            self.assertTrue(router.allow_migrate('archive', 'bookings', 'archivedbooking'))
+            self.assertFalse(router.allow_migrate('archive', 'bookings', 'booking'))
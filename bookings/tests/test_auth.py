@@ -0,0 +1,130 @@
+# bookings/tests/test_auth.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.contrib.sessions.models import Session
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from bookings.auth import ShortLivedLocMemCache, UserCache, user_cache
+from bookings.models import UserCacheInvalidation
+
+User = get_user_model()
+
+
+class CachedAuthenticationTest(TestCase):
+    """
+    Tests for serving request.session and request.user without queries.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='regular', password='password123')
+        self.client.login(username='regular', password='password123')
+        self.url = reverse('my_bookings')
+
+    def _auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries
+                if 'auth_user' in query['sql'] or 'django_session' in query['sql']]
+
+    def test_repeat_requests_skip_session_and_user_queries(self):
+        """
+        The first request on a session looks the user up; later ones need
+        neither the session nor the user row.
+        """
+        self.assertEqual(len(self._auth_queries()), 1)
+        self.assertEqual(self._auth_queries(), [])
+
+    def test_logout_forgets_the_user(self):
+        self._auth_queries()
+        self.client.post(reverse('logout'))
+        self.assertEqual(len(user_cache.entries), 0)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_password_change_and_deactivation_take_effect(self):
+        """
+        Saving the user drops its cached entry, so the session hash is checked
+        again and a changed password signs the session out.
+        """
+        self._auth_queries()
+        self.user.set_password('another-password')
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        self.client.login(username='regular', password='another-password')
+        self._auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+    @override_settings(BOOKINGS_USER_CACHE_SYNC_INTERVAL=0)
+    def test_changes_in_another_process_take_effect(self):
+        """
+        A deactivation or logout handled by another process reaches this
+        one's user and session caches through UserCacheInvalidation.
+        """
+        self._auth_queries()
+        # The other process only clears its own cache, not this one's
+        with mock.patch.object(user_cache, 'discard_user'):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(len(user_cache.entries), 1)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.login(username='regular', password='password123')
+        self._auth_queries()
+        session_key = self.client.session.session_key
+        with mock.patch.object(user_cache, 'discard_session'):
+            request = mock.Mock(session=mock.Mock(session_key=session_key))
+            user_logged_out.send(sender=User, request=request, user=self.user)
+            Session.objects.filter(session_key=session_key).delete()
+        self.assertEqual(len(user_cache.entries), 1)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_logging_in_invalidates_nothing(self):
+        UserCacheInvalidation.objects.all().delete()
+        self.client.login(username='regular', password='password123')
+        self.assertFalse(UserCacheInvalidation.objects.exists())
+
+
+class UserCacheTest(SimpleTestCase):
+    """
+    Tests for the per-process LRU and the capped session cache.
+    """
+
+    @override_settings(BOOKINGS_USER_CACHE_SIZE=2, BOOKINGS_USER_CACHE_TTL=60)
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache()
+        cache.set(('a', '1'), User(pk=1))
+        cache.set(('b', '2'), User(pk=2))
+        cache.get(('a', '1'))
+        cache.set(('c', '3'), User(pk=3))
+        self.assertIsNone(cache.get(('b', '2')))
+        self.assertEqual(cache.get(('a', '1')).pk, 1)
+        self.assertIsNot(cache.get(('a', '1')), cache.get(('a', '1')))
+
+    @override_settings(BOOKINGS_USER_CACHE_SIZE=10, BOOKINGS_USER_CACHE_TTL=60)
+    def test_entries_expire(self):
+        cache = UserCache()
+        with mock.patch('bookings.auth.time.monotonic', return_value=1000):
+            cache.set(('a', '1'), User(pk=1))
+        with mock.patch('bookings.auth.time.monotonic', return_value=1061):
+            self.assertIsNone(cache.get(('a', '1')))
+
+    def test_session_cache_caps_timeouts(self):
+        cache = ShortLivedLocMemCache('test-sessions', {'TIMEOUT': 60})
+        with mock.patch('django.core.cache.backends.base.time.time', return_value=0):
+            self.assertEqual(cache.get_backend_timeout(14 * 24 * 3600), 60)
+            self.assertEqual(cache.get_backend_timeout(None), 60)
+            self.assertEqual(cache.get_backend_timeout(10), 10)
+            self.assertEqual(cache.get_backend_timeout(DEFAULT_TIMEOUT), 60)
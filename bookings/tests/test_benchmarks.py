@@ -0,0 +1,50 @@
+# bookings/tests/test_benchmarks.py
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from bookings.benchmarks import benchmark_size, compare_results
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class BenchmarkTest(TestCase):
+    """
+    Tests for the benchmark harness (not for the numbers it produces).
+    """
+
+    def test_benchmark_size_reports_latency_and_queries(self):
+        """
+        Each view gets p50/p95 timings and a query count, and the write
+        paths actually succeed.
+        """
+        results = benchmark_size(
+            200, iterations=3, warmup=1,
+            views=['make_booking', 'edit_booking', 'staff_dashboard'])
+        self.assertEqual(set(results), {'make_booking', 'edit_booking', 'staff_dashboard'})
+        for stats in results.values():
+            self.assertEqual(stats['iterations'], 3)
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertGreater(stats['queries'], 0)
+        self.assertEqual(results['make_booking']['status_codes'], [302])
+        self.assertEqual(results['edit_booking']['status_codes'], [302])
+
+    def test_compare_results(self):
+        """
+        Slower p95 beyond the threshold, or extra queries, are regressions.
+        """
+        baseline = {'results': {'1000': {
+            'my_bookings': {'p95_ms': 10.0, 'queries': 3},
+            'staff_dashboard': {'p95_ms': 10.0, 'queries': 3},
+        }}}
+        results = {'results': {'1000': {
+            'my_bookings': {'p95_ms': 12.0, 'queries': 3},
+            'staff_dashboard': {'p95_ms': 20.0, 'queries': 4},
+            'make_booking': {'p95_ms': 99.0, 'queries': 9},
+        }}}
+        self.assertEqual(compare_results(results, baseline, threshold=0.25), [
+            "staff_dashboard @ 1000: p95 10.0ms -> 20.0ms",
+            "staff_dashboard @ 1000: queries 3 -> 4",
+        ])
+
+    def test_command_rejects_bad_sizes(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_bookings', sizes='ten')
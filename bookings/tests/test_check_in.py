@@ -0,0 +1,98 @@
+# bookings/tests/test_check_in.py
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from bookings.models import Table, Booking, CONFIRMATION_CODE_LENGTH
+
+
+User = get_user_model()
+
+
+class ConfirmationCodeCheckInTest(TestCase):
+    """
+    Tests for booking confirmation codes, QR images and the staff check-in page.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='doorstaff', password='password123', is_staff=True)
+        cls.guest = User.objects.create_user(
+            username='qrguest', password='password123')
+        cls.table = Table.objects.create(number=7, capacity=4)
+        cls.booking = Booking.objects.create(
+            user=cls.guest, table=cls.table,
+            booking_date=date.today() + timedelta(days=1),
+            booking_time=time(19, 0), number_of_guests=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_booking_gets_unique_confirmation_code(self):
+        """
+        Every saved booking gets a short code, and saving again keeps it.
+        """
+        code = self.booking.confirmation_code
+        self.assertEqual(len(code), CONFIRMATION_CODE_LENGTH)
+        self.booking.notes = 'Changed'
+        self.booking.save()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.confirmation_code, code)
+
+        other = Booking.objects.create(
+            user=self.guest, table=self.table, booking_date=self.booking.booking_date,
+            booking_time=time(12, 0), number_of_guests=2)
+        self.assertNotEqual(other.confirmation_code, code)
+
+    def test_qr_code_is_served_to_owner_and_cached(self):
+        """
+        The owner gets a PNG; the second request is served from the cache.
+        """
+        self.client.login(username='qrguest', password='password123')
+        url = reverse('booking_qr_code', args=[self.booking.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+
+        with self.assertNumQueries(1):  # booking only: session and user are cached, no rendering
+            self.client.get(url)
+
+        self.client.login(username='doorstaff', password='password123')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_staff_check_in_lookup_and_mark_seated(self):
+        """
+        Staff resolve a code with one indexed lookup and mark the booking seated.
+        """
+        self.client.login(username='doorstaff', password='password123')
+        code = self.booking.confirmation_code
+
+        response = self.client.get(reverse('staff_check_in'), {'code': code.lower()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['booking'], self.booking)
+
+        response = self.client.post(
+            reverse('staff_check_in'), {'code': code, 'status': 'seated'}, follow=True)
+        self.assertRedirects(response, reverse('staff_check_in'))
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'seated')
+
+    def test_staff_check_in_unknown_or_cancelled(self):
+        """
+        Unknown codes and cancelled bookings are reported, not checked in.
+        """
+        self.client.login(username='doorstaff', password='password123')
+        response = self.client.get(reverse('staff_check_in'), {'code': 'NOPE2345'})
+        self.assertIsNone(response.context['booking'])
+        self.assertContains(response, "No booking found for that confirmation code.")
+
+        Booking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        response = self.client.post(reverse('staff_check_in'), {
+            'code': self.booking.confirmation_code, 'status': 'completed'})
+        self.assertContains(response, "This booking has been cancelled.")
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
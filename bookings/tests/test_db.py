@@ -0,0 +1,68 @@
+# bookings/tests/test_db.py
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, override_settings
+
+from bookings.db import retry_on_lock
+
+
+@override_settings(BOOKINGS_DB_LOCK_RETRIES=2, BOOKINGS_DB_LOCK_RETRY_DELAY=0)
+class SQLiteTuningTest(TestCase):
+    """
+    Tests for the SQLite connection pragmas and lock retries.
+    """
+
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def _flaky(self, failures, message='database is locked'):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return 'saved'
+        return write, calls
+
+    def test_lock_errors_are_retried(self):
+        """
+        A write that hits a lock succeeds on a later attempt.
+        """
+        write, calls = self._flaky(failures=2)
+        # TestCase wraps each test in a transaction; retries only make sense
+        # outside one, as they would in a request
+        with _outside_atomic():
+            self.assertEqual(retry_on_lock(write)(), 'saved')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_the_retries(self):
+        write, calls = self._flaky(failures=5)
+        with _outside_atomic(), self.assertRaises(OperationalError):
+            retry_on_lock(write)()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_and_outer_transactions_are_not_retried(self):
+        write, calls = self._flaky(failures=1, message='no such table: bookings_booking')
+        with _outside_atomic(), self.assertRaises(OperationalError):
+            retry_on_lock(write)()
+        self.assertEqual(len(calls), 1)
+
+        write, calls = self._flaky(failures=1)
+        with transaction.atomic(), self.assertRaises(OperationalError):
+            retry_on_lock(write)()
+        self.assertEqual(len(calls), 1)
+
+
+class _outside_atomic:
+    """Pretend the test's wrapping transaction isn't there."""
+
+    def __enter__(self):
+        self.saved = connection.in_atomic_block
+        connection.in_atomic_block = False
+
+    def __exit__(self, *exc_info):
+        connection.in_atomic_block = self.saved
@@ -0,0 +1,130 @@
+# bookings/tests/test_emails.py
+from datetime import date, time, timedelta
+from smtplib import SMTPRecipientsRefused
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.jobs import Worker
+from bookings.models import Table, Booking, Job
+
+
+User = get_user_model()
+
+
+class BookingEmailTest(TestCase):
+    """
+    Tests for booking emails queued as background jobs and sent in batches.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='mailguest', email='guest@example.com', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.future_date = date.today() + timedelta(days=5)
+
+    def setUp(self):
+        self.client.login(username='mailguest', password='password123')
+
+    def make_booking(self):
+        return self.client.post(reverse('make_booking'), {
+            'booking_date': self.future_date.isoformat(),
+            'booking_time': '19:00',
+            'number_of_guests': 2,
+        })
+
+    def test_confirmation_email_is_queued_not_sent_inline(self):
+        """
+        Making a booking queues the email; the worker sends it.
+        """
+        self.make_booking()
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get(kind='send_booking_email')
+        self.assertEqual(job.payload['to'], ['guest@example.com'])
+
+        Worker(burst=True).run_once()
+        booking = Booking.objects.get(user=self.user)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Your booking is confirmed")
+        self.assertIn(booking.confirmation_code, mail.outbox[0].body)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+    @override_settings(BOOKINGS_JOBS_EAGER=True)
+    def test_eager_mode_sends_on_commit(self):
+        """
+        In eager mode the job runs as soon as the booking transaction commits.
+        """
+        booking = Booking.objects.create(
+            user=self.user, table=self.table, booking_date=self.future_date,
+            booking_time=time(19, 0), number_of_guests=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Your booking has been cancelled")
+
+    def test_no_email_without_address(self):
+        """
+        Guests without an email address are skipped silently.
+        """
+        User.objects.filter(pk=self.user.pk).update(email='')
+        self.make_booking()
+        self.assertFalse(Job.objects.filter(kind='send_booking_email').exists())
+
+    def test_emails_are_batched_over_one_connection(self):
+        """
+        Queued emails are sent in one batch over a single connection.
+        """
+        for hour in (12, 15, 19):
+            booking = Booking.objects.create(
+                user=self.user, table=self.table, booking_date=self.future_date,
+                booking_time=time(hour, 0), number_of_guests=2)
+            self.client.post(reverse('cancel_booking', args=[booking.pk]))
+
+        with patch('bookings.emails.get_connection', wraps=get_connection) as connect:
+            Worker(burst=True).run_once()
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failure_in_a_batch_only_retries_that_email(self):
+        """
+        When one message of a batch fails, the ones already sent are done and
+        only the failed one is retried.
+        """
+        for hour in (12, 15, 19, 21):
+            booking = Booking.objects.create(
+                user=self.user, table=self.table, booking_date=self.future_date,
+                booking_time=time(hour, 0), number_of_guests=2)
+            self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        jobs = list(Job.objects.filter(kind='send_booking_email').order_by('id'))
+
+        send_messages = locmem.EmailBackend.send_messages
+        attempts = []
+
+        def refuse_third(backend, messages):
+            attempts.append(messages)
+            if len(attempts) == 3:
+                raise SMTPRecipientsRefused({'guest@example.com': (550, b'Mailbox full')})
+            return send_messages(backend, messages)
+
+        with patch.object(locmem.EmailBackend, 'send_messages', autospec=True,
+                          side_effect=refuse_third):
+            with self.assertLogs('bookings.jobs', level='ERROR'):
+                Worker(burst=True).run_once()
+        self.assertEqual(len(mail.outbox), 3)
+        statuses = dict(Job.objects.filter(kind='send_booking_email').values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            jobs[0].pk: 'done', jobs[1].pk: 'done', jobs[2].pk: 'queued', jobs[3].pk: 'done'})
+        jobs[2].refresh_from_db()
+        self.assertIn('Mailbox full', jobs[2].last_error)
+
+        Job.objects.filter(pk=jobs[2].pk).update(run_after=timezone.now())
+        Worker(burst=True).run_once()
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertFalse(Job.objects.filter(kind='send_booking_email').exclude(status='done').exists())
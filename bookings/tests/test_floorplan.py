@@ -0,0 +1,161 @@
+# bookings/tests/test_floorplan.py
+import json
+import os
+import tempfile
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings import metrics
+from bookings.availability import available_tables
+from bookings.floorplan import FloorPlanError, import_floor_plan, parse_floor_plan
+from bookings.forms import TableForm
+from bookings.models import Booking, Table
+
+
+User = get_user_model()
+
+
+class ParseFloorPlanTest(TestCase):
+    """
+    Tests for reading CSV and JSON floor plans.
+    """
+
+    def test_csv_and_json(self):
+        self.assertEqual(parse_floor_plan(b'\xef\xbb\xbfnumber,capacity\n1,2\n2, 4\n'), {1: 2, 2: 4})
+        self.assertEqual(parse_floor_plan('[{"number": 1, "capacity": 2}]'), {1: 2})
+        self.assertEqual(
+            parse_floor_plan('{"tables": [{"number": "3", "capacity": 6}]}', filename='plan.json'),
+            {3: 6})
+
+    def test_every_bad_row_is_reported(self):
+        with self.assertRaises(FloorPlanError) as raised:
+            parse_floor_plan('number,capacity\n1,2\nx,2\n3,0\n1,4\n')
+        self.assertEqual(len(raised.exception.errors), 3)
+        self.assertIn('Row 4: table 1 appears more than once.', raised.exception.errors)
+
+    def test_unreadable_files(self):
+        for content, kwargs in [
+                ('table,seats\n1,2\n', {}),
+                ('[1, 2]', {}),
+                ('{"tables": ', {}),
+                ('number,capacity\n', {}),
+                ('number,capacity\n1,2\n', {'filename': 'plan.xlsx'})]:
+            with self.subTest(content=content), self.assertRaises(FloorPlanError):
+                parse_floor_plan(content, **kwargs)
+
+
+class ImportFloorPlanTest(TestCase):
+    """
+    Tests for applying a floor plan with bulk writes.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='staff', password='password123', is_staff=True)
+        cls.small = Table.objects.create(number=1, capacity=2)
+        cls.large = Table.objects.create(number=2, capacity=6)
+
+    def test_creates_and_resizes_in_a_few_queries(self):
+        plan = {1: 2, 2: 8}
+        plan.update({number: 4 for number in range(3, 203)})
+        # Savepoint, lookup, insert, update, release
+        with self.assertNumQueries(5):
+            counts = import_floor_plan(plan)
+        self.assertEqual(counts, {'created': 200, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(Table.objects.count(), 202)
+        self.large.refresh_from_db()
+        self.assertEqual(self.large.capacity, 8)
+
+    def test_availability_is_invalidated_once_after_commit(self):
+        with mock.patch('bookings.floorplan.invalidate_availability') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                import_floor_plan({number: 4 for number in range(3, 50)})
+        invalidate.assert_called_once_with()
+
+    def test_staff_upload(self):
+        self.client.login(username='staff', password='password123')
+        upload = SimpleUploadedFile('plan.csv', b'number,capacity\n2,4\n3,2\n')
+        response = self.client.post(reverse('staff_table_import'), {'floor_plan': upload})
+        self.assertRedirects(response, reverse('staff_table_list'))
+        self.assertEqual(dict(Table.objects.values_list('number', 'capacity')), {1: 2, 2: 4, 3: 2})
+
+        upload = SimpleUploadedFile('plan.csv', b'number,capacity\n4,2\n5,none\n')
+        response = self.client.post(reverse('staff_table_import'), {'floor_plan': upload})
+        self.assertContains(response, 'Row 2: number and capacity must be whole numbers')
+        self.assertFalse(Table.objects.filter(number=4).exists())
+
+    def test_import_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'plan.json')
+            with open(path, 'w') as f:
+                json.dump([{'number': 1, 'capacity': 2}, {'number': 9, 'capacity': 10}], f)
+            out = StringIO()
+            call_command('import_floor_plan', path, stdout=out)
+            self.assertIn('1 added, 0 resized, 1 unchanged', out.getvalue())
+
+            with open(path, 'w') as f:
+                f.write('[{"number": 0, "capacity": 2}]')
+            with self.assertRaises(CommandError):
+                call_command('import_floor_plan', path)
+
+    def test_table_keeps_its_own_number_on_edit(self):
+        form = TableForm(data={'number': 2, 'capacity': 5}, instance=self.large)
+        self.assertTrue(form.is_valid(), form.errors)
+        form = TableForm(data={'number': 1, 'capacity': 5}, instance=self.large)
+        self.assertIn("Table with this Table Number already exists.", form.errors['number'])
+
+
+class AvailabilityCacheTest(TestCase):
+    """
+    Tests for the versioned cache in front of check_availability.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='regular', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def _hits(self, result):
+        return metrics.availability_cache.samples.get((result,), 0)
+
+    def test_repeat_lookups_hit_the_cache(self):
+        hits = self._hits('hit')
+        self.assertEqual(available_tables(self.day, time(19, 0), 2), [self.table])
+        with self.assertNumQueries(0):
+            self.assertEqual(available_tables(self.day, time(19, 0), 2), [self.table])
+        self.assertEqual(self._hits('hit'), hits + 1)
+
+    def test_bookings_invalidate_their_date(self):
+        available_tables(self.day, time(19, 0), 2)
+        other_day = self.day + timedelta(days=1)
+        available_tables(other_day, time(19, 0), 2)
+        booking = Booking.objects.create(
+            user=self.user, table=self.table, booking_date=self.day,
+            booking_time=time(19, 30), number_of_guests=2, status='confirmed')
+        self.assertEqual(available_tables(self.day, time(19, 0), 2), [])
+        with self.assertNumQueries(0):
+            available_tables(other_day, time(19, 0), 2)
+
+        # Moving the booking frees the date it left
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.booking_date = other_day
+        booking.save()
+        self.assertEqual(available_tables(self.day, time(19, 0), 2), [self.table])
+        self.assertEqual(available_tables(other_day, time(19, 0), 2), [])
+
+    def test_table_changes_invalidate_everything(self):
+        available_tables(self.day, time(19, 0), 2)
+        added = Table.objects.create(number=2, capacity=2)
+        self.assertEqual(available_tables(self.day, time(19, 0), 2), [added, self.table])
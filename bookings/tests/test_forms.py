@@ -1,4 +1,6 @@
 # bookings/tests/test_forms.py
+from unittest import mock
+
 from django.test import TestCase
 from django import forms
 from datetime import date, time, timedelta, datetime
@@ -260,6 +262,18 @@ class AvailabilityFormTest(TestCase):
         self.assertIn("Number of guests must be at least 1.",
                       form.errors['num_guests'])
 
+    def test_availability_form_earliest_date_follows_the_clock(self):
+        """
+        The date picker's minimum and initial value are today's date when the
+        form is built, not when the module was imported.
+        """
+        for today in (date(2031, 3, 1), date(2031, 3, 2)):
+            with mock.patch('bookings.forms.timezone.localdate', return_value=today):
+                form = AvailabilityForm()
+                self.assertEqual(form.min_date, today.isoformat())
+                self.assertIn(f'min="{today.isoformat()}"', str(form['check_date']))
+                self.assertIn(f'value="{today.isoformat()}"', str(form['check_date']))
+
 
 class BookingStatusUpdateFormTest(TestCase):
     """
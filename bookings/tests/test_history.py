@@ -0,0 +1,145 @@
+# bookings/tests/test_history.py
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.archive import archive_bookings
+from bookings.history import (
+    FRESH_UPCOMING_COOKIE, decode_cursor, encode_cursor, my_bookings_sections,
+    upcoming_cache_key)
+from bookings.models import Booking, Table
+
+
+User = get_user_model()
+
+
+class MyBookingsHistoryTest(TestCase):
+    """
+    Tests for the paginated past bookings and cached upcoming bookings.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='regular', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.today = timezone.localdate()
+        cls.past = [
+            Booking.objects.create(
+                user=cls.user, table=cls.table, booking_date=cls.today - timedelta(days=days),
+                booking_time=time(19, 0), number_of_guests=2, status='completed')
+            for days in range(1, 8)
+        ]
+        cls.upcoming = Booking.objects.create(
+            user=cls.user, table=cls.table, booking_date=cls.today + timedelta(days=2),
+            booking_time=time(19, 0), number_of_guests=2, status='confirmed')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sections_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            upcoming, past, next_cursor = my_bookings_sections(self.user, page_size=3)
+            [booking.table.number for booking in upcoming + past]
+        self.assertEqual(upcoming, [self.upcoming])
+        self.assertEqual(past, self.past[:3])
+        self.assertIsNotNone(next_cursor)
+
+    def test_cursor_walks_through_every_past_booking(self):
+        seen, cursor = [], None
+        while True:
+            _, past, cursor = my_bookings_sections(
+                self.user, cursor=decode_cursor(cursor), page_size=3)
+            seen.extend(past)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.past)
+
+    def test_cached_upcoming_skips_the_combined_query(self):
+        my_bookings_sections(self.user, page_size=3)
+        with self.assertNumQueries(1):
+            upcoming, past, _ = my_bookings_sections(self.user, page_size=3)
+        self.assertEqual(upcoming, [self.upcoming])
+        self.assertEqual(past, self.past[:3])
+
+    def test_saving_a_booking_invalidates_the_cache(self):
+        """
+        Making, editing and cancelling a booking all show up straight away.
+        """
+        my_bookings_sections(self.user)
+        made = Booking.objects.create(
+            user=self.user, table=self.table, booking_date=self.today + timedelta(days=1),
+            booking_time=time(12, 0), number_of_guests=2, status='pending')
+        self.assertEqual(my_bookings_sections(self.user)[0], [made, self.upcoming])
+
+        made.number_of_guests = 3
+        made.save()
+        self.assertEqual(my_bookings_sections(self.user)[0][0].number_of_guests, 3)
+
+        made.status = 'cancelled'
+        made.save()
+        self.assertEqual(my_bookings_sections(self.user)[0][0].status, 'cancelled')
+
+    def test_guest_sees_own_change_when_another_process_has_it_cached(self):
+        """
+        After a cancellation, the guest's browser skips the upcoming cache, so
+        a stale copy left in another process's cache isn't shown to them.
+        """
+        booking = Booking.objects.create(
+            user=self.user, table=self.table, booking_date=self.today + timedelta(days=5),
+            booking_time=time(12, 0), number_of_guests=2, status='confirmed')
+        self.client.login(username='regular', password='password123')
+        stale = self.client.get(reverse('my_bookings')).context['upcoming_bookings']
+
+        response = self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        self.assertIn(FRESH_UPCOMING_COOKIE, response.cookies)
+        # What another process that didn't handle the cancellation still holds
+        cache.set(upcoming_cache_key(self.user.pk, self.today), stale)
+        upcoming = self.client.get(reverse('my_bookings')).context['upcoming_bookings']
+        self.assertEqual([b.status for b in upcoming if b.pk == booking.pk], ['cancelled'])
+
+        self.client.cookies.pop(FRESH_UPCOMING_COOKIE)
+        cache.set(upcoming_cache_key(self.user.pk, self.today), stale)
+        upcoming = self.client.get(reverse('my_bookings')).context['upcoming_bookings']
+        self.assertEqual([b.status for b in upcoming if b.pk == booking.pk], ['confirmed'])
+
+    def test_archived_history_is_merged_into_pages(self):
+        archive_bookings(before=self.today - timedelta(days=4))
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 5)
+        seen, cursor = [], None
+        while True:
+            _, past, cursor = my_bookings_sections(
+                self.user, cursor=decode_cursor(cursor), include_archived=True, page_size=2)
+            seen.extend(past)
+            if cursor is None:
+                break
+        self.assertEqual([booking.booking_date for booking in seen],
+                         [booking.booking_date for booking in self.past])
+
+    def test_bad_cursor_is_ignored(self):
+        self.assertIsNone(decode_cursor('yesterday'))
+        self.assertIsNone(decode_cursor(None))
+        cursor = encode_cursor(self.past[0])
+        self.assertEqual(decode_cursor(cursor),
+                         (self.past[0].booking_date, time(19, 0), self.past[0].pk))
+
+    def test_page_links_to_older_bookings(self):
+        self.client.login(username='regular', password='password123')
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(response.context['past_bookings']), 7)
+        self.assertIsNone(response.context['next_cursor'])
+
+        for days in range(10, 40):
+            Booking.objects.create(
+                user=self.user, table=self.table, booking_date=self.today - timedelta(days=days),
+                booking_time=time(12, 0), number_of_guests=2, status='completed')
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(response.context['past_bookings']), 20)
+        self.assertContains(response, 'Older bookings')
+
+        response = self.client.get(reverse('my_bookings'), {'before': response.context['next_cursor']})
+        self.assertEqual(len(response.context['past_bookings']), 17)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, 'Most recent')
@@ -0,0 +1,160 @@
+# bookings/tests/test_jobs.py
+from datetime import timedelta
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookings.jobs import (
+    Worker, claim, enqueue, prune_jobs, register, registry, run_jobs)
+from bookings.models import Job
+
+
+calls = []
+
+
+@override_settings(BOOKINGS_JOBS_RETRY_BACKOFF=10)
+class JobQueueTest(TestCase):
+    """
+    Tests for the database-backed job queue: leasing, retries and limits.
+    """
+
+    def setUp(self):
+        calls.clear()
+        self.saved_registry = dict(registry)
+
+        @register('test_echo')
+        def echo(payload):
+            calls.append(payload['n'])
+
+        @register('test_flaky', max_attempts=2)
+        def flaky(payload):
+            raise RuntimeError("SMTP down")
+
+        @register('test_limited', concurrency=1)
+        def limited(payload):
+            calls.append(payload['n'])
+
+    def tearDown(self):
+        registry.clear()
+        registry.update(self.saved_registry)
+
+    def test_enqueue_unknown_kind(self):
+        """
+        Enqueueing a kind with no handler fails loudly.
+        """
+        with self.assertRaises(KeyError):
+            enqueue('no_such_job')
+
+    def test_claim_leases_each_job_once(self):
+        """
+        A leased job is not handed to a second worker until its lease expires.
+        """
+        job = enqueue('test_echo', {'n': 1})
+        first = claim('test_echo', 'worker-a', limit=5)
+        self.assertEqual([j.pk for j in first], [job.pk])
+        self.assertEqual(first[0].attempts, 1)
+        self.assertEqual(claim('test_echo', 'worker-b', limit=5), [])
+
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        second = claim('test_echo', 'worker-b', limit=5)
+        self.assertEqual([j.locked_by for j in second], ['worker-b'])
+
+    def test_future_jobs_wait(self):
+        """
+        Jobs scheduled for later are not claimed early.
+        """
+        enqueue('test_echo', {'n': 1}, run_after=timezone.now() + timedelta(hours=1))
+        self.assertEqual(claim('test_echo', 'worker-a'), [])
+
+    def test_failed_job_is_retried_with_backoff_then_marked_failed(self):
+        """
+        A failing job is re-queued with a delay, then given up on.
+        """
+        job = enqueue('test_flaky')
+        with self.assertLogs('bookings.jobs', level='ERROR'):
+            run_jobs(claim('test_flaky', 'worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+        self.assertIn("SMTP down", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('bookings.jobs', level='ERROR'):
+            run_jobs(claim('test_flaky', 'worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+
+    def test_concurrency_limit(self):
+        """
+        No more than `concurrency` workers run a kind at once.
+        """
+        enqueue('test_limited', {'n': 1})
+        enqueue('test_limited', {'n': 2})
+        self.assertEqual(len(claim('test_limited', 'worker-a')), 1)
+        self.assertEqual(claim('test_limited', 'worker-b'), [])
+
+    def test_concurrency_check_and_lease_share_a_transaction(self):
+        """
+        The busy-worker count is taken inside the leasing transaction, so a
+        second worker can't slip in between the check and the lease.
+        """
+        enqueue('test_limited', {'n': 1})
+        enqueue('test_limited', {'n': 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(claim('test_limited', 'worker-a')), 1)
+        sql = [query['sql'] for query in queries.captured_queries]
+        savepoint = next(i for i, query in enumerate(sql) if query.startswith('SAVEPOINT'))
+        self.assertTrue(any('COUNT(' in query for query in sql[savepoint:]))
+        self.assertEqual(claim('test_limited', 'worker-b'), [])
+
+        # Once worker-a's lease lapses the slot is free again
+        Job.objects.filter(locked_by='worker-a').update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(
+            {job.locked_by for job in claim('test_limited', 'worker-b', limit=2)}, {'worker-b'})
+
+    def test_idle_poll_takes_no_write_lock(self):
+        """
+        Polling a kind with nothing due, or no free slot, is a plain read:
+        no transaction is opened.
+        """
+        enqueue('test_limited', {'n': 1}, run_after=timezone.now() + timedelta(hours=1))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(claim('test_limited', 'worker-a'), [])
+        self.assertEqual(len(queries), 1)
+
+        enqueue('test_limited', {'n': 2})
+        enqueue('test_limited', {'n': 3})
+        claim('test_limited', 'worker-a')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(claim('test_limited', 'worker-b'), [])
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('SAVEPOINT')])
+
+    def test_burst_worker_and_prune(self):
+        """
+        A burst worker drains due jobs; old finished jobs are pruned.
+        """
+        for n in range(3):
+            enqueue('test_echo', {'n': n})
+        # Worker threads use their own DB connections and can't see the test
+        # transaction, so drive the polling loop from this thread
+        worker = Worker(kinds=['test_echo'], burst=True)
+        while worker.run_once():
+            pass
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertEqual(Job.objects.filter(status='done').count(), 3)
+
+        Job.objects.update(updated_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune_jobs(), 3)
+
+    def test_run_jobs_rejects_unknown_kind(self):
+        """
+        The worker command refuses kinds that have no handler.
+        """
+        with self.assertRaises(CommandError):
+            call_command('run_jobs', kind=['no_such_job'], burst=True)
@@ -0,0 +1,76 @@
+# bookings/tests/test_maintenance.py
+from datetime import date, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bookings.maintenance import complete_past_bookings
+from bookings.models import Table, Booking
+
+
+User = get_user_model()
+
+
+class CompletePastBookingsTest(TestCase):
+    """
+    Tests for the nightly auto-completion of past bookings.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='regular', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.today = date.today()
+
+        def book(days, hour, status):
+            return Booking.objects.create(
+                user=cls.user, table=cls.table,
+                booking_date=cls.today + timedelta(days=days),
+                booking_time=time(hour, 0), number_of_guests=2, status=status)
+
+        cls.past_confirmed = [book(-d, 19, 'confirmed') for d in range(1, 6)]
+        cls.past_seated = book(-1, 12, 'seated')
+        cls.past_pending = book(-3, 12, 'pending')
+        cls.old_pending = book(-10, 12, 'pending')
+        cls.past_cancelled = book(-2, 12, 'cancelled')
+        cls.today_confirmed = book(0, 19, 'confirmed')
+        cls.future_pending = book(2, 19, 'pending')
+
+    def test_past_bookings_are_closed_out_in_batches(self):
+        """
+        Past confirmed/seated become completed and past pending are cancelled;
+        today's and future bookings are untouched.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            completed, cancelled = complete_past_bookings(batch_size=2)
+        self.assertEqual((completed, cancelled), (6, 2))
+        # 6 rows completed in batches of 2, then 2 rows cancelled in one batch
+        updates = [q for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "bookings_booking"')]
+        self.assertEqual(len(updates), 4)
+        # The daily stats are moved by delta, not recounted from the bookings
+        self.assertFalse([q for q in queries.captured_queries
+                          if 'bookings_archivedbooking' in q['sql'] or 'COUNT(' in q['sql']])
+
+        statuses = dict(Booking.objects.values_list('id', 'status'))
+        for booking in self.past_confirmed + [self.past_seated]:
+            self.assertEqual(statuses[booking.id], 'completed')
+        self.assertEqual(statuses[self.past_pending.id], 'cancelled')
+        self.assertEqual(statuses[self.past_cancelled.id], 'cancelled')
+        self.assertEqual(statuses[self.today_confirmed.id], 'confirmed')
+        self.assertEqual(statuses[self.future_pending.id], 'pending')
+
+    def test_command_with_stale_pending_grace(self):
+        """
+        Only pending bookings older than the grace period are cancelled.
+        """
+        out = StringIO()
+        call_command('complete_past_bookings', stale_pending_days=7, stdout=out)
+        self.assertIn("Marked 6 booking(s) completed and cancelled 1", out.getvalue())
+        self.past_pending.refresh_from_db()
+        self.old_pending.refresh_from_db()
+        self.assertEqual(self.past_pending.status, 'pending')
+        self.assertEqual(self.old_pending.status, 'cancelled')
@@ -0,0 +1,135 @@
+# bookings/tests/test_metrics.py
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookings import metrics
+from bookings.models import Booking, Table, WaitlistEntry
+from bookings.waitlist import match_waitlist
+
+
+User = get_user_model()
+
+
+def sample(name, labels=()):
+    """Current value of one sample in this process's registry."""
+    return dict(
+        (tuple(key), value) for key, value in
+        metrics.registry.snapshot()[name]['samples']).get(tuple(labels), 0)
+
+
+class MetricsTest(TestCase):
+    """
+    Tests for the Prometheus metrics endpoint and booking counters.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='regular', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=2)
+
+    def setUp(self):
+        self.client.login(username='regular', password='password123')
+
+    def book(self, guests=2):
+        return self.client.post(reverse('make_booking'), {
+            'booking_date': (date.today() + timedelta(days=3)).isoformat(),
+            'booking_time': '19:00',
+            'number_of_guests': guests,
+        })
+
+    def test_booking_outcomes_are_counted(self):
+        """
+        Successful bookings count once committed; no free table is its own outcome.
+        """
+        created = sample('bookings_created_total', ['guest'])
+        no_table = sample('bookings_make_booking_outcomes_total', ['no_table'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book()
+        self.book(guests=6)
+        self.assertEqual(sample('bookings_created_total', ['guest']), created + 1)
+        self.assertEqual(
+            sample('bookings_make_booking_outcomes_total', ['no_table']), no_table + 1)
+
+    def test_staff_and_waitlist_changes_are_counted_by_source(self):
+        """
+        Cancellations by staff and bookings made from the waitlist count too.
+        """
+        User.objects.create_user(username='staff', password='password123', is_staff=True)
+        day = date.today() + timedelta(days=3)
+        booking = Booking.objects.create(
+            user=self.user, table=self.table, booking_date=day,
+            booking_time=time(19, 0), number_of_guests=2, status='confirmed')
+        WaitlistEntry.objects.create(
+            user=User.objects.create_user(username='waiting', password='password123'),
+            booking_date=day, earliest_time=time(18, 30), latest_time=time(19, 30),
+            number_of_guests=2)
+        cancelled = sample('bookings_cancelled_total', ['staff'])
+        created = sample('bookings_created_total', ['waitlist'])
+
+        self.client.login(username='staff', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('staff_booking_detail', args=[booking.pk]), {
+                'status': 'cancelled', 'notes': ''})
+        with self.captureOnCommitCallbacks(execute=True):
+            match_waitlist(day, time(19, 0), 2)
+        self.assertEqual(sample('bookings_cancelled_total', ['staff']), cancelled + 1)
+        self.assertEqual(sample('bookings_created_total', ['waitlist']), created + 1)
+
+    def test_endpoint_exposes_latency_and_queries(self):
+        """
+        The endpoint reports a latency histogram and query counts per URL name.
+        """
+        self.client.get(reverse('my_bookings'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE bookings_http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'bookings_http_request_duration_seconds_bucket{view="my_bookings",method="GET",le="+Inf"}',
+            body)
+        self.assertIn('bookings_db_queries_total{view="my_bookings"}', body)
+
+    def test_endpoint_is_restricted(self):
+        self.client.logout()
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(response.status_code, 403)
+
+    def test_processes_are_aggregated(self):
+        """
+        With a shared directory, every process's snapshot is added up.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        other = {
+            'bookings_cancelled_total': {
+                'type': 'counter', 'help': 'Bookings cancelled.',
+                'labelnames': ['source'], 'samples': [[['guest'], 5]]},
+        }
+        with open(os.path.join(directory, 'metrics-999999.json'), 'w') as f:
+            json.dump(other, f)
+
+        with override_settings(BOOKINGS_METRICS_DIR=directory):
+            collected = metrics.registry.collect()
+        total = dict((tuple(k), v) for k, v in collected['bookings_cancelled_total']['samples'])
+        self.assertEqual(total[('guest',)], sample('bookings_cancelled_total', ['guest']) + 5)
+        self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+
+    def test_histogram_rendering(self):
+        registry = metrics.Registry()
+        histogram = registry.histogram('demo_seconds', "Demo.", ['view'], buckets=(0.1, 1.0))
+        histogram.observe(0.05, view='a')
+        histogram.observe(0.5, view='a')
+        histogram.observe(5, view='a')
+        body = metrics.render(registry.snapshot())
+        self.assertIn('demo_seconds_bucket{view="a",le="0.1"} 1', body)
+        self.assertIn('demo_seconds_bucket{view="a",le="1.0"} 2', body)
+        self.assertIn('demo_seconds_bucket{view="a",le="+Inf"} 3', body)
+        self.assertIn('demo_seconds_count{view="a"} 3', body)
+        self.assertIn('demo_seconds_sum{view="a"} 5.55', body)
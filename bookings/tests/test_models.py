@@ -119,6 +119,7 @@ class BookingModelTest(TestCase):
         expected_choices = [
             ('pending', 'Pending'),
             ('confirmed', 'Confirmed'),
+            ('seated', 'Seated'),
             ('cancelled', 'Cancelled'),
             ('completed', 'Completed'),
         ]
@@ -0,0 +1,95 @@
+# bookings/tests/test_profiling.py
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookings.auth import user_cache
+
+
+User = get_user_model()
+
+
+@override_settings(BOOKINGS_PROFILING_ENABLED=True)
+class ProfilingMiddlewareTest(TestCase):
+    """
+    Tests for on-demand request profiling.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='staff', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(username='regular', password='password123')
+
+    def setUp(self):
+        self.profile_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_root)
+        overrides = self.settings(BOOKINGS_PROFILE_ROOT=self.profile_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_staff_can_profile_a_request(self):
+        """
+        The query flag saves a profile with the SQL attributed to the view.
+        """
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('staff_dashboard') + '?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        directory = os.path.join(self.profile_root, response['X-Profile-Id'])
+        self.assertEqual(
+            sorted(os.listdir(directory)), ['profile.prof', 'queries.json', 'summary.txt'])
+
+        with open(os.path.join(directory, 'queries.json')) as f:
+            queries = json.load(f)
+        self.assertTrue(any(
+            query['frame'] and query['frame'].startswith('bookings/views.py')
+            and query['frame'].endswith('in staff_dashboard')
+            for query in queries))
+
+    def test_query_parameters_are_not_written(self):
+        """
+        Profiles keep the SQL text but not the values bound to it.
+        """
+        self.client.login(username='staff', password='password123')
+        session_key = self.client.session.session_key
+        # Make the request look the session up in the database
+        caches['sessions'].clear()
+        user_cache.clear()
+        response = self.client.get(
+            reverse('staff_dashboard') + '?_profile=1&email=guest@example.com')
+        directory = os.path.join(self.profile_root, response['X-Profile-Id'])
+        for name in ('queries.json', 'summary.txt'):
+            with open(os.path.join(directory, name)) as f:
+                written = f.read()
+            self.assertNotIn(session_key, written)
+            self.assertNotIn('guest@example.com', written)
+        with open(os.path.join(directory, 'queries.json')) as f:
+            self.assertTrue(all('params' not in query for query in json.load(f)))
+
+    def test_header_also_enables_profiling(self):
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('staff_dashboard'), HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-Id', response)
+
+    def test_non_staff_cannot_profile(self):
+        self.client.login(username='regular', password='password123')
+        response = self.client.get(reverse('my_bookings') + '?_profile=1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.profile_root), [])
+
+    @override_settings(BOOKINGS_PROFILING_SAMPLE_RATE=1.0)
+    def test_sampling_profiles_any_request(self):
+        response = self.client.get(reverse('home'))
+        self.assertIn('X-Profile-Id', response)
+
+    @override_settings(BOOKINGS_PROFILING_ENABLED=False, BOOKINGS_PROFILING_SAMPLE_RATE=1.0)
+    def test_off_unless_enabled(self):
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('staff_dashboard') + '?_profile=1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.profile_root), [])
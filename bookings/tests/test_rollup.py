@@ -0,0 +1,138 @@
+# bookings/tests/test_rollup.py
+from datetime import date, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.archive import archive_bookings
+from bookings.maintenance import complete_past_bookings
+from bookings.models import Booking, DailyBookingStats, Table
+from bookings.rollup import rebuild_daily_stats
+from bookings.seeding import seed_bookings
+
+
+User = get_user_model()
+
+
+class DailyBookingStatsTest(TestCase):
+    """
+    Tests for keeping the daily rollup in step with bookings.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='guest', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=6)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def book(self, at, guests=2, day=None, status='confirmed'):
+        return Booking.objects.create(
+            user=self.user, table=self.table, booking_date=day or self.day,
+            booking_time=at, number_of_guests=guests, status=status)
+
+    def stats(self):
+        return sorted(DailyBookingStats.objects.values_list(
+            'date', 'hour', 'status', 'bookings', 'covers'))
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats()
+        rebuild_daily_stats()
+        self.assertEqual(incremental, self.stats())
+
+    def test_saves_and_deletes_move_bookings_between_buckets(self):
+        self.book(time(12, 0), guests=2)
+        booking = self.book('19:30', guests=4)
+        self.assertEqual(self.stats(), [
+            (self.day, 12, 'confirmed', 1, 2),
+            (self.day, 19, 'confirmed', 1, 4),
+        ])
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.booking_time = time(13, 15)
+        booking.number_of_guests = 5
+        booking.save()
+        # Saving the same instance again must not count it twice
+        booking.status = 'cancelled'
+        booking.save()
+        booking.save()
+        self.assertEqual(self.stats(), [
+            (self.day, 12, 'confirmed', 1, 2),
+            (self.day, 13, 'cancelled', 1, 5),
+        ])
+
+        booking.delete()
+        self.assertEqual(self.stats(), [(self.day, 12, 'confirmed', 1, 2)])
+        self.assertMatchesRebuild()
+
+    def test_rolled_back_save_is_not_remembered(self):
+        booking = Booking.objects.get(pk=self.book(time(12, 0), guests=2).pk)
+        booking.status = 'cancelled'
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                booking.save()
+                raise RuntimeError("database is locked")
+        # A retry saves the same instance again
+        booking.save()
+        self.assertEqual(self.stats(), [(self.day, 12, 'cancelled', 1, 2)])
+        self.assertMatchesRebuild()
+
+        booking.number_of_guests = 3
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                booking.save()
+                raise RuntimeError("database is locked")
+        booking.delete()
+        self.assertEqual(self.stats(), [])
+        self.assertMatchesRebuild()
+
+    def test_writes_that_skip_signals_keep_it_in_step(self):
+        today = timezone.localdate()
+        for days_ago, at, status in [(200, time(19, 0), 'confirmed'),
+                                     (200, time(19, 30), 'cancelled'),
+                                     (1, time(19, 0), 'seated')]:
+            self.book(at, day=today - timedelta(days=days_ago), status=status)
+        complete_past_bookings(today=today, batch_size=1)
+        archive_bookings(before=today - timedelta(days=180))
+        self.assertFalse(Booking.objects.filter(booking_date__lt=today - timedelta(days=180)).exists())
+        self.assertEqual(self.stats(), [
+            (today - timedelta(days=200), 19, 'cancelled', 1, 2),
+            (today - timedelta(days=200), 19, 'completed', 1, 2),
+            (today - timedelta(days=1), 19, 'completed', 1, 2),
+        ])
+        self.assertMatchesRebuild()
+
+        seed_bookings(tables=3, users=10, bookings=200, batch_size=64)
+        self.assertEqual(
+            DailyBookingStats.objects.filter(date__gt=today - timedelta(days=100)).aggregate(
+                total=Sum('bookings'))['total'],
+            Booking.objects.filter(booking_date__gt=today - timedelta(days=100)).count())
+        self.assertMatchesRebuild()
+
+    def test_rebuild_command_by_date_range(self):
+        self.book(time(19, 0), day=date(2030, 1, 1))
+        self.book(time(19, 0), day=date(2030, 1, 2))
+        DailyBookingStats.objects.update(bookings=99)
+        out = StringIO()
+        call_command('rebuild_booking_stats', '--from', '2030-01-02', '--to', '2030-01-05', stdout=out)
+        self.assertIn('Rebuilt 1 daily stats row(s) from 2030-01-02 to 2030-01-05.', out.getvalue())
+        self.assertEqual(
+            dict(DailyBookingStats.objects.values_list('date', 'bookings')),
+            {date(2030, 1, 1): 99, date(2030, 1, 2): 1})
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_booking_stats', '--from', '2030-01-05', '--to', '2030-01-02')
+        with self.assertRaises(CommandError):
+            call_command('rebuild_booking_stats', '--from', 'yesterday')
+
+    def test_dashboard_counts_come_from_the_rollup(self):
+        User.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.book(time(12, 0))
+        self.book(time(19, 0), status='pending')
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('staff_dashboard'))
+        self.assertEqual(response.context['upcoming_active_bookings_count'], 2)
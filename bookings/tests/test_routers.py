@@ -0,0 +1,101 @@
+# bookings/tests/test_routers.py
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from bookings.db import copy_sqlite_database
+from bookings.models import Booking, Job
+from bookings.routers import ReplicaMiddleware, ReplicaRouter
+
+
+@override_settings(BOOKINGS_REPLICA_DATABASE='replica', BOOKINGS_REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTest(SimpleTestCase):
+    """
+    Tests for sending safe-request reads to the replica and keeping writes
+    and read-after-write on the primary.
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _request(self, method='get', cookies=None, write=False):
+        """Run a request through the middleware, noting where reads went."""
+        routed = {}
+
+        def view(request):
+            routed['booking'] = self.router.db_for_read(Booking)
+            routed['session'] = self.router.db_for_read(Session)
+            routed['job'] = self.router.db_for_read(Job)
+            if write:
+                routed['write'] = self.router.db_for_write(Booking)
+                routed['after_write'] = self.router.db_for_read(Booking)
+            return HttpResponse()
+
+        request = getattr(self.factory, method)('/my-bookings/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaMiddleware(view)(request)
+        return routed, response
+
+    def test_safe_request_reads_from_replica(self):
+        routed, response = self._request()
+        self.assertEqual(routed['booking'], 'replica')
+        self.assertIsNone(routed['session'])
+        self.assertIsNone(routed['job'])
+        self.assertNotIn(ReplicaMiddleware.cookie_name, response.cookies)
+
+    def test_write_pins_request_and_browser_to_primary(self):
+        """
+        After a write the rest of the request reads the primary, and the
+        browser gets a cookie that keeps it there for the sticky window.
+        """
+        routed, response = self._request(write=True)
+        self.assertEqual(routed['write'], 'default')
+        self.assertIsNone(routed['after_write'])
+        cookie = response.cookies[ReplicaMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 10)
+
+        routed, _ = self._request(cookies={ReplicaMiddleware.cookie_name: '1'})
+        self.assertIsNone(routed['booking'])
+
+    def test_unsafe_requests_and_commands_use_primary(self):
+        routed, _ = self._request(method='post')
+        self.assertIsNone(routed['booking'])
+        # Outside a request, e.g. in a management command
+        self.assertIsNone(self.router.db_for_read(Booking))
+
+    @override_settings(BOOKINGS_REPLICA_DATABASE=None)
+    def test_no_replica_configured(self):
+        routed, response = self._request(write=True)
+        self.assertIsNone(routed['booking'])
+        self.assertIsNone(routed['write'])
+        self.assertNotIn(ReplicaMiddleware.cookie_name, response.cookies)
+
+
+class CopySQLiteDatabaseTest(SimpleTestCase):
+    """
+    Tests for the copy step behind `manage.py sync_replica`.
+    """
+
+    def test_copy_replaces_replica_contents(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            with closing(sqlite3.connect(primary)) as db, db:
+                db.execute("CREATE TABLE booking (id INTEGER PRIMARY KEY)")
+                db.executemany("INSERT INTO booking VALUES (?)", [(1,), (2,)])
+            with closing(sqlite3.connect(replica)) as db, db:
+                db.execute("CREATE TABLE stale (id INTEGER)")
+
+            copy_sqlite_database(primary, replica)
+
+            with closing(sqlite3.connect(replica)) as db:
+                tables = [row[0] for row in db.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'")]
+                self.assertEqual(tables, ['booking'])
+                self.assertEqual(db.execute("SELECT count(*) FROM booking").fetchone()[0], 2)
@@ -0,0 +1,108 @@
+# bookings/tests/test_runsheet.py
+import os
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookings.models import Table, Booking
+from bookings.runsheet import build_runsheet, get_runsheet_pdf
+
+
+User = get_user_model()
+
+
+class RunSheetTest(TestCase):
+    """
+    Tests for the staff run-sheet builder, PDF download and pre-generation.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='runsheetstaff', password='password123', is_staff=True)
+        cls.guest = User.objects.create_user(
+            username='runsheetguest', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=6)
+        cls.day = date.today() + timedelta(days=3)
+        Booking.objects.create(
+            user=cls.guest, table=cls.table2, booking_date=cls.day,
+            booking_time=time(19, 30), number_of_guests=5, notes='Birthday')
+        Booking.objects.create(
+            user=cls.guest, table=cls.table1, booking_date=cls.day,
+            booking_time=time(19, 0), number_of_guests=2)
+        Booking.objects.create(
+            user=cls.guest, table=cls.table1, booking_date=cls.day,
+            booking_time=time(12, 0), number_of_guests=2, status='cancelled')
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.override = override_settings(RUNSHEET_ROOT=self.tmpdir.name)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.tmpdir.cleanup()
+
+    def test_build_runsheet_groups_and_covers(self):
+        """
+        Bookings are grouped by table, cancelled ones are left out and covers
+        are summed per hour, all from a single query.
+        """
+        with self.assertNumQueries(1):
+            sheet = build_runsheet(self.day)
+        self.assertEqual([g['table'].number for g in sheet['tables']], [1, 2])
+        self.assertEqual(sheet['total_bookings'], 2)
+        self.assertEqual(sheet['total_covers'], 7)
+        self.assertEqual(sheet['covers_by_hour'], [{'hour': 19, 'covers': 7}])
+
+    def test_pdf_is_stored_and_reused_until_bookings_change(self):
+        """
+        A stored PDF is served as-is until a booking for that day changes.
+        """
+        first = get_runsheet_pdf(self.day)
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+        with patch('bookings.runsheet.render_runsheet_pdf') as render:
+            get_runsheet_pdf(self.day)
+            render.assert_not_called()
+
+        booking = Booking.objects.get(table=self.table1, status='confirmed')
+        booking.number_of_guests = 1
+        booking.save()
+        with patch('bookings.runsheet.render_runsheet_pdf',
+                   return_value=b'%PDF-test') as render:
+            get_runsheet_pdf(self.day)
+            render.assert_called_once()
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+    def test_staff_runsheet_view(self):
+        """
+        Staff can download the PDF; other users are redirected.
+        """
+        self.client.login(username='runsheetstaff', password='password123')
+        response = self.client.get(
+            reverse('staff_runsheet'), {'date': self.day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        self.client.login(username='runsheetguest', password='password123')
+        response = self.client.get(reverse('staff_runsheet'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_generate_runsheets_command(self):
+        """
+        The overnight command writes one PDF per requested day.
+        """
+        out = StringIO()
+        call_command('generate_runsheets', date=self.day.isoformat(),
+                     days=2, stdout=out)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 2)
+        self.assertIn(self.day.isoformat(), out.getvalue())
+
@@ -0,0 +1,100 @@
+# bookings/tests/test_schedule.py
+from datetime import date, time, timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bookings.forms import AvailabilityForm, BookingForm
+from bookings.models import OpeningHours, ScheduleException
+from bookings.schedule import Schedule, get_schedule, invalidate_schedule
+
+
+def next_weekday(weekday):
+    day = date.today() + timedelta(days=1)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+class ScheduleTest(SimpleTestCase):
+    """
+    Tests for compiling hours and exceptions into per-date masks.
+    """
+
+    def setUp(self):
+        self.monday = date(2030, 1, 7)
+        self.hours = [
+            OpeningHours(weekday=0, opens_at=time(12, 0), closes_at=time(14, 30)),
+            OpeningHours(weekday=0, opens_at=time(18, 0), closes_at=time(22, 0)),
+            OpeningHours(weekday=1, opens_at=time(9, 0), closes_at=time(22, 0)),
+        ]
+
+    def test_weekly_hours(self):
+        schedule = Schedule(self.hours, [])
+        self.assertTrue(schedule.is_open(self.monday, time(12, 0)))
+        self.assertTrue(schedule.is_open(self.monday, time(14, 30)))
+        self.assertFalse(schedule.is_open(self.monday, time(14, 31)))
+        self.assertFalse(schedule.is_open(self.monday, time(22, 1)))
+        self.assertFalse(schedule.is_open(self.monday + timedelta(days=2), time(12, 0)))
+        self.assertEqual(schedule.describe(self.monday),
+                         "12:00 PM and 2:30 PM, or 6:00 PM and 10:00 PM")
+        self.assertEqual(schedule.period_at(self.monday, time(19, 0)), (time(18, 0), time(22, 0)))
+        self.assertIsNone(schedule.describe(self.monday + timedelta(days=2)))
+
+    def test_exceptions(self):
+        tuesday = self.monday + timedelta(days=1)
+        schedule = Schedule(self.hours, [
+            # Private event on Monday evening
+            ScheduleException(date=self.monday, starts_at=time(19, 0), ends_at=time(22, 0)),
+            # Short hours on Tuesday
+            ScheduleException(date=tuesday, is_open=True, starts_at=time(10, 0), ends_at=time(15, 0)),
+            # Closed all day the week after
+            ScheduleException(date=self.monday + timedelta(days=7)),
+        ])
+        self.assertEqual(schedule.periods(self.monday),
+                         [(time(12, 0), time(14, 30)), (time(18, 0), time(18, 59))])
+        self.assertEqual(schedule.periods(tuesday), [(time(10, 0), time(15, 0))])
+        self.assertEqual(schedule.periods(self.monday + timedelta(days=7)), [])
+        self.assertTrue(schedule.is_open_between(self.monday, time(14, 0), time(17, 0)))
+        self.assertFalse(schedule.is_open_between(self.monday, time(14, 45), time(17, 0)))
+
+
+class ScheduleValidationTest(TestCase):
+    """
+    Tests for validating bookings against the configured hours.
+    """
+
+    def setUp(self):
+        invalidate_schedule()
+        self.addCleanup(invalidate_schedule)
+
+    def test_lookups_need_no_queries_once_compiled(self):
+        day = date.today() + timedelta(days=3)
+        get_schedule()
+        with self.assertNumQueries(0):
+            form = BookingForm(data={
+                'booking_date': day, 'booking_time': time(8, 0), 'number_of_guests': 2})
+            self.assertFalse(form.is_valid())
+        self.assertIn('Booking time must be between 9:00 AM and 10:00 PM.',
+                      form.errors['booking_time'])
+
+    def test_edits_take_effect_immediately(self):
+        sunday = next_weekday(6)
+        get_schedule()
+        hours = OpeningHours.objects.get(weekday=6)
+        hours.opens_at = time(11, 0)
+        hours.save()
+        form = AvailabilityForm(data={'check_date': sunday, 'check_time': '10:00', 'num_guests': 2})
+        self.assertIn("Restaurant is open from 11:00 AM to 10:00 PM.", form.errors['__all__'])
+
+    def test_closed_dates(self):
+        holiday = next_weekday(2)
+        ScheduleException.objects.create(date=holiday, reason='Private event')
+        form = BookingForm(data={
+            'booking_date': holiday, 'booking_time': time(19, 0), 'number_of_guests': 2})
+        self.assertIn(f"The restaurant is closed on {holiday:%B %d, %Y}.",
+                      form.errors['booking_time'])
+
+    @override_settings(BOOKINGS_SCHEDULE_TTL=0)
+    def test_other_processes_catch_up_after_the_ttl(self):
+        get_schedule()
+        # As if another process made the change: no signal reaches this one
+        OpeningHours.objects.filter(weekday=0).update(closes_at=time(10, 0))
+        self.assertEqual(get_schedule().periods(next_weekday(0)), [(time(9, 0), time(10, 0))])
@@ -0,0 +1,32 @@
+# bookings/tests/test_startup.py
+from django.test import SimpleTestCase
+
+from bookings.management.commands.benchmark_startup import (
+    HEAVY_PACKAGES, measure_startup, slowest_imports)
+
+
+class StartupTest(SimpleTestCase):
+    """
+    Tests that booting the app stays free of heavy imports and side effects.
+    """
+
+    def test_startup_loads_no_heavy_packages(self):
+        """
+        PDF and QR libraries are only imported when something is rendered,
+        numpy only when staff analytics are computed, and importing the app
+        prints nothing.
+        """
+        self.assertIn('numpy', HEAVY_PACKAGES)
+        timings, stderr = measure_startup()
+        self.assertEqual(timings['heavy'], [])
+        self.assertEqual(timings['printed'], '')
+        self.assertEqual(stderr, '')
+
+    def test_slowest_imports_skips_nested_modules(self):
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |       1500 | django.urls",
+            "import time:        50 |        900 |   django.urls.base",
+            "import time:       300 |        300 | site",
+        ])
+        self.assertEqual(slowest_imports(output, 5), [(1.5, 'django.urls'), (0.3, 'site')])
@@ -0,0 +1,103 @@
+# bookings/tests/test_staticfiles.py
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from bookings.staticfiles import IMMUTABLE_CACHE_CONTROL, accepted_encodings, compress_file
+
+
+STATIC_ROOT = tempfile.mkdtemp(prefix='bookings-static-')
+MANIFEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'bookings.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, STORAGES=MANIFEST_STORAGES,
+                   BOOKINGS_SERVE_STATIC=True, DEBUG=False)
+class StaticFilesTest(TestCase):
+    """
+    Tests for fingerprinted, precompressed static files and how they are served.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Only the app's own files; admin and DRF assets are slow to brotli
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin', 'rest_framework'])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.hashed = staticfiles_storage.stored_name('bookings/css/site.css')
+
+    def test_collectstatic_writes_hashed_and_compressed_copies(self):
+        self.assertRegex(self.hashed, r'^bookings/css/site\.[0-9a-f]{12}\.css$')
+        for name in (self.hashed, 'bookings/css/site.css'):
+            path = os.path.join(STATIC_ROOT, name)
+            for suffix in ('.gz', '.br'):
+                self.assertLess(os.path.getsize(path + suffix), os.path.getsize(path))
+
+    def test_pages_link_to_hashed_names(self):
+        response = self.client.get('/')
+        self.assertContains(response, f'/static/{self.hashed}')
+
+    def test_hashed_files_are_immutable_and_precompressed(self):
+        url = f'/static/{self.hashed}'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'.main-content-wrapper', b''.join(response.streaming_content))
+
+    def test_unhashed_files_revalidate(self):
+        url = '/static/bookings/css/site.css'
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        mtime = os.path.getmtime(os.path.join(STATIC_ROOT, 'bookings/css/site.css'))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(mtime))
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_paths_fall_through(self):
+        self.assertEqual(self.client.get('/static/nope.css').status_code, 404)
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.client.get('/')['ETag']
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+
+class CompressionTest(TestCase):
+    """
+    Tests for the compression helpers.
+    """
+
+    def test_incompressible_files_get_no_variants(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'noise.js')
+            with open(path, 'wb') as f:
+                f.write(os.urandom(4096))
+            self.assertEqual(compress_file(path), [])
+            self.assertEqual(os.listdir(directory), ['noise.js'])
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('br;q=0, gzip;q=0.5'), {'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
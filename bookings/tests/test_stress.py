@@ -0,0 +1,58 @@
+# bookings/tests/test_stress.py
+from datetime import date, time, timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from bookings.models import Booking, Table
+from bookings.stress import StressWorker, check_invariants, prepare_stress_data
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class StressHarnessTest(TestCase):
+    """
+    Tests for the concurrency stress harness's bookkeeping and checks.
+    """
+
+    def test_single_worker_run_holds_invariants(self):
+        """
+        A guest running alone ends with exactly the bookings it was told about.
+        """
+        user_id, = prepare_stress_data(1)
+        result = StressWorker(user_id, operations=25, days=2, seed=1).run()
+        self.assertEqual(sum(result['outcomes'].values()), 25)
+        self.assertTrue(result['bookings'])
+        self.assertEqual(check_invariants([result]), [])
+
+    def test_detects_double_booking_and_lost_booking(self):
+        """
+        Overlapping active bookings on one table and confirmed bookings that
+        vanished are both reported.
+        """
+        # The database refuses overlaps, so drop the guard for this test
+        # (rolled back with the test transaction) to plant one
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER bookings_booking_no_overlap_insert")
+        user_id, = prepare_stress_data(1)
+        table = Table.objects.get(number=1)
+        day = date.today() + timedelta(days=1)
+        first = Booking.objects.create(
+            user_id=user_id, table=table, booking_date=day,
+            booking_time=time(19, 0), number_of_guests=2, status='confirmed')
+        second = Booking.objects.create(
+            user_id=user_id, table=table, booking_date=day,
+            booking_time=time(19, 30), number_of_guests=2, status='confirmed')
+        result = {
+            'user_id': user_id,
+            'bookings': {
+                first.id: (day, time(19, 0), 'confirmed'),
+                second.id: (day, time(19, 30), 'confirmed'),
+                999999: (day, time(21, 0), 'confirmed'),
+            },
+            'uncertain_creates': 0,
+            'uncertain_ids': [],
+        }
+        violations = check_invariants([result])
+        self.assertEqual(len(violations), 2)
+        self.assertTrue(violations[0].startswith("double booking"))
+        self.assertEqual(violations[1], "lost booking: #999999")
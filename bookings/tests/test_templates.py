@@ -0,0 +1,87 @@
+# bookings/tests/test_templates.py
+import json
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+FRAGMENT_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                 'LOCATION': 'test-sessions'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                  'LOCATION': 'test-fragments'},
+}
+
+
+@override_settings(CACHES=FRAGMENT_CACHE)
+class FragmentCacheTest(TestCase):
+    """
+    Tests for the cached fragments of the public pages.
+    """
+
+    def setUp(self):
+        caches['fragments'].clear()
+        self.guest = User.objects.create_user(username='guest', password='password123')
+        self.staff = User.objects.create_user(
+            username='manager', password='password123', is_staff=True)
+
+    def test_navigation_varies_by_user_kind(self):
+        """
+        Cached navigation never shows one user's name, staff link or CSRF
+        token to another.
+        """
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Staff Portal')
+        self.assertContains(response, 'manager')
+        staff_token = response.context['csrf_token']
+
+        self.client.force_login(self.guest)
+        response = self.client.get(reverse('home'))
+        self.assertNotContains(response, 'Staff Portal')
+        self.assertNotContains(response, 'manager')
+        self.assertContains(response, 'Hello, guest!')
+        self.assertContains(response, f'value="{response.context["csrf_token"]}"')
+        self.assertNotContains(response, f'value="{staff_token}"')
+
+        self.client.logout()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Admin Login')
+        self.assertNotContains(response, 'My Bookings')
+
+    def test_availability_form_fragment_rolls_over_with_the_date(self):
+        for today in (date(2031, 3, 1), date(2031, 3, 2)):
+            with mock.patch('bookings.forms.timezone.localdate', return_value=today):
+                response = self.client.get(reverse('check_availability'))
+            self.assertContains(response, f'min="{today.isoformat()}"')
+
+    def test_bound_form_is_not_cached(self):
+        self.client.get(reverse('check_availability'))
+        response = self.client.post(reverse('check_availability'), {
+            'check_date': '2031-03-01', 'check_time': '23:30', 'num_guests': 3})
+        self.assertContains(response, 'value="23:30"')
+        self.assertContains(response, 'value="3"')
+
+
+class BenchmarkTemplatesCommandTest(TestCase):
+    """
+    Tests for `manage.py benchmark_templates`.
+    """
+
+    def test_reports_every_page_in_every_mode(self):
+        out = StringIO()
+        call_command('benchmark_templates', iterations=2, json=True, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {'uncached', 'loader', 'loader+fragments'})
+        for pages in results.values():
+            self.assertEqual(len(pages), 4)
+            for stats in pages.values():
+                self.assertEqual(stats['status_codes'], [200])
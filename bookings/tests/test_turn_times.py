@@ -0,0 +1,126 @@
+# bookings/tests/test_turn_times.py
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from bookings.allocation import NoTableAvailable, free_tables, place_booking
+from bookings.availability import available_tables
+from bookings.models import Booking, Table, TurnTimeRule
+from bookings.occupancy import TurnTimes, get_turn_times, invalidate_turn_times, turn_mask
+
+
+User = get_user_model()
+
+
+class TurnTimesTest(SimpleTestCase):
+    """
+    Tests for compiling turn time rules into a lookup by table and party size.
+    """
+
+    def test_most_specific_rule_wins(self):
+        turn_times = TurnTimes([
+            TurnTimeRule(pk=1, min_guests=1, max_guests=None, minutes=90),
+            TurnTimeRule(pk=2, min_guests=1, max_guests=2, minutes=60),
+            TurnTimeRule(pk=3, min_guests=7, max_guests=None, minutes=150),
+            TurnTimeRule(pk=4, min_guests=3, max_guests=4, table_id=5, minutes=75),
+        ], default=45)
+        self.assertEqual(turn_times.minutes(1, 2), 60)
+        self.assertEqual(turn_times.minutes(1, 4), 90)
+        self.assertEqual(turn_times.minutes(1, 7), 150)
+        self.assertEqual(turn_times.minutes(1, 40), 150)
+        # Table 5's own rule covers 3-4 guests; the general rules do the rest
+        self.assertEqual(turn_times.minutes(5, 4), 75)
+        self.assertEqual(turn_times.minutes(5, 2), 60)
+
+    def test_default_when_no_rule_applies(self):
+        turn_times = TurnTimes([TurnTimeRule(pk=1, min_guests=5, max_guests=6, minutes=120)], 60)
+        self.assertEqual(turn_times.minutes(1, 4), 60)
+        self.assertEqual(turn_times.minutes(1, 6), 120)
+        self.assertEqual(turn_times.minutes(1, 8), 60)
+        self.assertEqual(TurnTimes([], 60).minutes(1, 12), 60)
+
+    def test_turns_stop_at_midnight(self):
+        self.assertEqual(turn_mask(time(23, 0), 120), ((1 << 60) - 1) << (23 * 60))
+
+
+class TurnTimeAllocationTest(TestCase):
+    """
+    Tests for holding tables for the party's turn when booking and checking
+    availability.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='guest', password='password123')
+        cls.two_top = Table.objects.create(number=1, capacity=2)
+        cls.banquet = Table.objects.create(number=2, capacity=10)
+        cls.day = timezone.localdate() + timedelta(days=3)
+        TurnTimeRule.objects.create(min_guests=1, max_guests=2, minutes=45)
+        TurnTimeRule.objects.create(min_guests=7, minutes=180)
+
+    def setUp(self):
+        invalidate_turn_times()
+        self.addCleanup(invalidate_turn_times)
+        cache.clear()
+
+    def _place(self, at, guests):
+        booking = Booking(user=self.user, booking_date=self.day, booking_time=at,
+                          number_of_guests=guests, status='confirmed')
+        with transaction.atomic():
+            place_booking(booking)
+        return booking
+
+    def test_small_parties_free_the_table_sooner(self):
+        booking = self._place(time(18, 0), 2)
+        self.assertEqual(booking.turn_minutes, 45)
+        self.assertEqual(free_tables(self.day, time(18, 30), 2), [self.banquet])
+        self.assertEqual(free_tables(self.day, time(18, 45), 2), [self.two_top, self.banquet])
+        self.assertEqual(self._place(time(18, 45), 2).table, self.two_top)
+
+    def test_banquets_hold_the_table_for_their_whole_turn(self):
+        self._place(time(18, 0), 8)
+        self.assertEqual(free_tables(self.day, time(20, 30), 6), [])
+        with self.assertRaises(NoTableAvailable):
+            self._place(time(20, 30), 6)
+        self.assertEqual(free_tables(self.day, time(21, 0), 6), [self.banquet])
+        # A banquet starting before a booking must end before it starts, too
+        self.assertEqual(free_tables(self.day, time(15, 30), 8), [])
+        self.assertEqual(free_tables(self.day, time(15, 0), 8), [self.banquet])
+
+    def test_lookups_cost_the_same_however_many_rules(self):
+        TurnTimeRule.objects.bulk_create(
+            TurnTimeRule(min_guests=3, max_guests=3, table=self.banquet, minutes=60 + n)
+            for n in range(50))
+        self._place(time(19, 0), 2)
+        get_turn_times()
+        # The date's bookings and the candidate tables
+        with self.assertNumQueries(2):
+            free_tables(self.day, time(19, 30), 3)
+
+    def test_availability_answers_every_time_from_one_cached_date(self):
+        self._place(time(19, 0), 8)
+        available_tables(self.day, time(12, 0), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(available_tables(self.day, time(22, 0), 8), [self.banquet])
+            self.assertEqual(available_tables(self.day, time(21, 0), 2), [self.two_top])
+            self.assertEqual(available_tables(self.day, time(16, 30), 8), [])
+
+    def test_rule_changes_apply_to_new_bookings_only(self):
+        booking = self._place(time(18, 0), 2)
+        rule = TurnTimeRule.objects.get(max_guests=2)
+        rule.minutes = 120
+        rule.save()
+        self.assertEqual(free_tables(self.day, time(18, 45), 2), [self.two_top, self.banquet])
+        self.assertEqual(self._place(time(20, 0), 2).turn_minutes, 120)
+        booking.refresh_from_db()
+        self.assertEqual(booking.turn_minutes, 45)
+
+    @override_settings(BOOKINGS_TURN_TIME_TTL=0)
+    def test_other_processes_catch_up_after_the_ttl(self):
+        get_turn_times()
+        # As if another process made the change: no signal reaches this one
+        TurnTimeRule.objects.filter(max_guests=2).update(minutes=30)
+        self.assertEqual(get_turn_times().minutes(self.two_top.id, 2), 30)
@@ -0,0 +1,157 @@
+# bookings/tests/test_waitlist.py
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+
+from bookings.allocation import NoTableAvailable
+from bookings.jobs import Worker
+from bookings.models import Booking, Job, Table, TurnTimeRule, WaitlistEntry
+from bookings.waitlist import match_waitlist, waitlist_candidates
+
+
+User = get_user_model()
+
+
+class WaitlistTest(TestCase):
+    """
+    Tests for joining the waitlist and filling freed slots from it.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest = User.objects.create_user(
+            username='guest', email='guest@example.com', password='password123')
+        cls.first = User.objects.create_user(
+            username='first', email='first@example.com', password='password123')
+        cls.second = User.objects.create_user(
+            username='second', email='second@example.com', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.day = date.today() + timedelta(days=5)
+
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            user=self.guest, table=self.table, booking_date=self.day,
+            booking_time=time(19, 0), number_of_guests=4)
+
+    def wait(self, user, guests=2, earliest=time(18, 30), latest=time(19, 30), day=None):
+        return WaitlistEntry.objects.create(
+            user=user, booking_date=day or self.day, earliest_time=earliest,
+            latest_time=latest, number_of_guests=guests)
+
+    def test_full_booking_offers_the_waitlist(self):
+        self.client.login(username='first', password='password123')
+        response = self.client.post(reverse('make_booking'), {
+            'booking_date': self.day.isoformat(), 'booking_time': '19:15',
+            'number_of_guests': 2,
+        })
+        waitlist_form = response.context['waitlist_form']
+        self.assertEqual(waitlist_form.initial['earliest_time'], time(18, 45))
+        self.assertEqual(waitlist_form.initial['latest_time'], time(19, 45))
+        self.assertContains(response, 'Join Waitlist')
+
+        response = self.client.post(reverse('join_waitlist'), {
+            'booking_date': self.day.isoformat(), 'earliest_time': '18:45',
+            'latest_time': '19:45', 'number_of_guests': 2,
+        })
+        self.assertRedirects(response, reverse('my_bookings'))
+        entry = WaitlistEntry.objects.get(user=self.first)
+        self.assertEqual(entry.status, 'waiting')
+
+    def test_window_must_be_in_opening_hours_and_in_order(self):
+        self.client.login(username='first', password='password123')
+        for earliest, latest in [('20:00', '19:00'), ('06:00', '08:30')]:
+            response = self.client.post(reverse('join_waitlist'), {
+                'booking_date': self.day.isoformat(), 'earliest_time': earliest,
+                'latest_time': latest, 'number_of_guests': 2,
+            })
+            self.assertEqual(response.status_code, 200)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_candidates_come_from_one_query_in_priority_order(self):
+        first = self.wait(self.first)
+        second = self.wait(self.second)
+        self.wait(self.second, guests=6)
+        self.wait(self.second, earliest=time(20, 0), latest=time(21, 0))
+        self.wait(self.second, day=self.day + timedelta(days=1))
+        with self.assertNumQueries(1):
+            candidates = waitlist_candidates(self.day, time(19, 0), capacity=4)
+        self.assertEqual(candidates, [first, second])
+
+    def test_guests_already_booked_in_their_window_are_skipped(self):
+        self.wait(self.guest)
+        self.assertEqual(waitlist_candidates(self.day, time(19, 0), capacity=4), [])
+
+    def test_cancellation_books_the_longest_waiting_guest(self):
+        """
+        Cancelling only queues a job; the worker books the freed slot for the
+        first guest in line and emails them.
+        """
+        first = self.wait(self.first)
+        second = self.wait(self.second)
+        self.client.login(username='guest', password='password123')
+        self.client.post(reverse('cancel_booking', args=[self.booking.pk]))
+        self.assertTrue(Job.objects.filter(kind='match_waitlist').exists())
+        self.assertFalse(Booking.objects.filter(user=self.first).exists())
+
+        Worker(burst=True).run_once()
+        Worker(burst=True).run_once()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, 'booked')
+        self.assertEqual(first.booking.booking_time, time(19, 0))
+        self.assertEqual(first.booking.status, 'confirmed')
+        self.assertEqual(second.status, 'waiting')
+        self.assertIn("A table opened up for you", [message.subject for message in mail.outbox])
+
+    def test_moving_a_booking_frees_its_old_slot(self):
+        entry = self.wait(self.first)
+        self.client.login(username='guest', password='password123')
+        self.client.post(reverse('edit_booking', args=[self.booking.pk]), {
+            'booking_date': self.day.isoformat(), 'booking_time': '12:00',
+            'number_of_guests': 4,
+        })
+        job = Job.objects.get(kind='match_waitlist')
+        self.assertEqual(job.payload, {'date': self.day.isoformat(), 'time': '19:00:00', 'capacity': 4})
+        match_waitlist(self.day, time(19, 0), 4)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'booked')
+
+    def test_shorter_turn_frees_the_end_of_the_old_one(self):
+        """
+        A smaller party on the same table and time gets a shorter turn; the
+        time it no longer needs is offered to the waitlist.
+        """
+        TurnTimeRule.objects.create(min_guests=1, max_guests=2, minutes=45)
+        TurnTimeRule.objects.create(min_guests=3, minutes=90)
+        Booking.objects.filter(pk=self.booking.pk).update(turn_minutes=90)
+        self.client.login(username='guest', password='password123')
+        self.client.post(reverse('edit_booking', args=[self.booking.pk]), {
+            'booking_date': self.day.isoformat(), 'booking_time': '19:00',
+            'number_of_guests': 2,
+        })
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.turn_minutes, 45)
+        job = Job.objects.get(kind='match_waitlist')
+        self.assertEqual(job.payload, {'date': self.day.isoformat(), 'time': '19:45:00', 'capacity': 4})
+
+        # Same party size again: nothing new is freed
+        Job.objects.all().delete()
+        self.client.post(reverse('edit_booking', args=[self.booking.pk]), {
+            'booking_date': self.day.isoformat(), 'booking_time': '19:00',
+            'number_of_guests': 2,
+        })
+        self.assertFalse(Job.objects.filter(kind='match_waitlist').exists())
+
+    def test_larger_parties_are_not_tried_once_a_party_cannot_be_seated(self):
+        self.wait(self.first, guests=2)
+        self.wait(self.second, guests=3)
+        with mock.patch('bookings.waitlist._book_entry', side_effect=NoTableAvailable) as book:
+            self.assertEqual(match_waitlist(self.day, time(19, 0), 4), [])
+        self.assertEqual(book.call_count, 1)
+
+    def test_past_slots_are_ignored(self):
+        self.wait(self.first, day=date.today() - timedelta(days=1))
+        self.assertEqual(match_waitlist(date.today() - timedelta(days=1), time(19, 0), 4), [])
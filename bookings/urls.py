@@ -6,20 +6,29 @@ from .views import staff_table_edit, register
 urlpatterns = [
     path('', views.home_view, name='home'),
     path('book/', views.make_booking, name='make_booking'),
+    path('waitlist/', views.join_waitlist, name='join_waitlist'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
     path('edit-booking/<int:booking_id>/',
          views.edit_booking, name='edit_booking'),
     path('cancel-booking/<int:booking_id>/',
          views.cancel_booking, name='cancel_booking'),
+    path('bookings/<int:booking_id>/qr.png',
+         views.booking_qr_code, name='booking_qr_code'),
     path('check-availability/', views.check_availability,
          name='check_availability'),
     path('register/', register, name='register'),  # Add this line
+    path('metrics', views.metrics_view, name='metrics'),
     # Staff Dashboard URLs
     path('staff/', views.staff_dashboard, name='staff_dashboard'),
     path('staff/bookings/', views.staff_booking_list, name='staff_booking_list'),
     path('staff/bookings/<int:booking_id>/',
          views.staff_booking_detail, name='staff_booking_detail'),
+    path('staff/check-in/', views.staff_check_in, name='staff_check_in'),
+    path('staff/runsheet/', views.staff_runsheet, name='staff_runsheet'),
+    path('staff/analytics/', views.staff_analytics, name='staff_analytics'),
+    path('staff/analytics.json', views.staff_analytics_json, name='staff_analytics_json'),
     path('staff/tables/', views.staff_table_list, name='staff_table_list'),
+    path('staff/tables/import/', views.staff_table_import, name='staff_table_import'),
     path('staff/tables/<int:table_id>/edit/',
          staff_table_edit, name='staff_table_edit'),
     path('staff/tables/<int:table_id>/delete/',
@@ -1,52 +1,101 @@
 # bookings/views.py
 # Standard library
-import os
+import logging
 from bookings.models import Booking, Table
 from django.shortcuts import render
 from datetime import datetime, timedelta, date, time
-from io import BytesIO
 
 # Third-party
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.mail import EmailMessage
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db import transaction
-from django.db.models import Q
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.template.loader import get_template
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from xhtml2pdf import pisa
 from django.db.models import ProtectedError
 
 # Local
-from .models import Booking, Table
+from .models import Booking, DailyBookingStats, Table
+from . import metrics
+from .allocation import BookingConflict, NoTableAvailable, is_overlap_error, place_booking
+from .db import retry_on_lock
+from .archive import CombinedBookings, search_archived_bookings
+from .availability import available_tables as find_available_tables
+from .emails import queue_booking_email
+from .history import (
+    FRESH_UPCOMING_COOKIE, decode_cursor, mark_upcoming_changed, my_bookings_sections)
+from .runsheet import get_runsheet_pdf
+from .schedule import hours_message, is_open
+from .qr import get_qr_code, prerender_qr_code
 from .forms import (
     BookingForm,
     AvailabilityForm,
     BookingStatusUpdateForm,
+    CheckInForm,
+    FloorPlanImportForm,
     TableForm,
     CustomUserCreationForm,
+    WaitlistForm,
 )
-
-# Debug prints to confirm models.py is loaded correctly
-print(
-    f"DEBUG VIEWS: Loading models.py from: {os.path.abspath(os.path.join(os.path.dirname(__file__), 'models.py'))}")
-# (Note: Using os.path.join and os.path.dirname for robustness in getting models.py path)
-try:
-    from .models import Booking  # Import again to check its field directly
-    table_field = Booking._meta.get_field('table')
-    print(
-        f"DEBUG VIEWS: Booking.table.on_delete setting: {table_field.on_delete}")
-    # _PROTECT is the internal value for PROTECT
-    print(
-        f"DEBUG VIEWS: Is it PROTECT? {table_field.on_delete == ProtectedError._PROTECT}")
-except Exception as e:
-    print(f"DEBUG VIEWS: Could not inspect Booking.table.on_delete: {e}")
+from .floorplan import import_floor_plan
+from .waitlist import queue_waitlist_match
+
+logger = logging.getLogger(__name__)
+
+
+# Write transactions for the guest booking views. Each is retried as a whole
+# if SQLite reports the database as locked.
+
+@retry_on_lock
+def _save_new_booking(form, user):
+    with transaction.atomic():
+        booking = form.save(commit=False)
+        booking.user = user
+        booking.status = 'confirmed'
+        place_booking(booking)
+        code = booking.confirmation_code
+        transaction.on_commit(lambda: prerender_qr_code(code))
+        transaction.on_commit(lambda: metrics.bookings_created.inc(source='guest'))
+        transaction.on_commit(lambda: metrics.booking_attempts.inc(outcome='created'))
+        queue_booking_email(booking, 'confirmed')
+    return booking
+
+
+@retry_on_lock
+def _save_booking_change(booking, booking_date, booking_time, number_of_guests):
+    with transaction.atomic():
+        # The form has already put the new date and time on the instance
+        freed = (booking._loaded_booking_date, booking._loaded_booking_time, booking.table)
+        old_turn = booking.turn_minutes
+        booking.booking_date = booking_date
+        booking.booking_time = booking_time
+        booking.number_of_guests = number_of_guests
+        place_booking(booking)
+        # Moved to another slot or table: someone waiting may fit the old one
+        if freed != (booking.booking_date, booking.booking_time, booking.table):
+            queue_waitlist_match(freed[0], freed[1], freed[2].capacity)
+        elif booking.turn_minutes < old_turn:
+            # A smaller party holds the table for less time: the tail of the old turn is free
+            ends = datetime.combine(booking.booking_date, booking.booking_time) + timedelta(
+                minutes=booking.turn_minutes)
+            if ends.date() == booking.booking_date:
+                queue_waitlist_match(ends.date(), ends.time(), booking.table.capacity)
+        queue_booking_email(booking, 'updated')
+
+
+@retry_on_lock
+def _cancel_booking(booking):
+    with transaction.atomic():
+        booking.status = 'cancelled'
+        booking.save()
+        queue_waitlist_match(booking.booking_date, booking.booking_time, booking.table.capacity)
+        queue_booking_email(booking, 'cancelled')
 
 
 # Decorator for staff members (assuming you have this defined elsewhere or use is_staff check)
@@ -85,9 +134,20 @@ def home_view(request):
     return render(request, 'bookings/home.html')
 
 
+def metrics_view(request):
+    """Prometheus scrape endpoint, for local collectors and staff only."""
+    allowed = request.META.get('REMOTE_ADDR') in settings.BOOKINGS_METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(metrics.registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 def make_booking(request):
     """Handle the booking creation form."""
+    waitlist_form = None
     if request.method == 'POST':
         form = BookingForm(request.POST)
         if form.is_valid():
@@ -99,14 +159,10 @@ def make_booking(request):
             booking_datetime = datetime.combine(booking_date, booking_time)
             booking_datetime = timezone.make_aware(booking_datetime)
 
-            # Define allowed time range
-            opening_time = time(9, 0)   # 9:00 AM
-            closing_time = time(22, 0)  # 10:00 PM
-
-            # Check if booking time is outside of allowed interval
-            if not (opening_time <= booking_time <= closing_time):
-                messages.warning(
-                    request, "Bookings can only be made between 9:00 AM and 10:00 PM.")
+            # Check the booking time against that day's opening hours
+            if not is_open(booking_date, booking_time):
+                messages.warning(request, hours_message(
+                    booking_date, "Bookings can only be made between {hours}."))
                 return render(request, 'bookings/make_booking.html', {'form': form})
 
             # Check if the booking is in the past
@@ -114,75 +170,77 @@ def make_booking(request):
                 form.add_error('booking_date', "Booking date cannot be in the past.")
                 return render(request, 'bookings/make_booking.html', {'form': form})
 
-            # Find tables booked at the exact time
-            booked_tables_ids = Booking.objects.filter(
-                booking_date=booking_date,
-                booking_time=booking_time
-            ).values_list('table__id', flat=True)
-
-            # Start with tables that match capacity and aren't booked at that exact time
-            available_tables = Table.objects.filter(
-                capacity__gte=number_of_guests
-            ).exclude(id__in=booked_tables_ids)
-
-            # Further exclude tables booked within 1 hour window
-            one_hour_before = (datetime.combine(
-                booking_date, booking_time) - timedelta(hours=1)).time()
-            one_hour_after = (datetime.combine(
-                booking_date, booking_time) + timedelta(hours=1)).time()
-
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=booking_date,
-                table__in=available_tables,
-                booking_time__range=(one_hour_before, one_hour_after)
-            )
-
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table__id', flat=True)
-            available_tables = available_tables.exclude(
-                id__in=conflicting_table_ids).order_by('capacity')
-
-            if available_tables.exists():
-                selected_table = available_tables.first()
-                try:
-                    with transaction.atomic():
-                        booking = form.save(commit=False)
-                        booking.user = request.user
-                        booking.table = selected_table
-                        booking.status = 'confirmed'
-                        booking.save()
-                        messages.success(
-                            request, f"Your booking for Table {selected_table.number} has been confirmed!")
-                        return redirect('my_bookings')
-                except Exception as e:
-                    messages.error(
-                        request, f"An error occurred during booking: {e}")
-            else:
+            # The database rejects overlapping bookings, so there is no
+            # separate availability check to race against
+            try:
+                booking = _save_new_booking(form, request.user)
+            except NoTableAvailable:
+                metrics.booking_attempts.inc(outcome='no_table')
+                messages.warning(
+                    request, "No tables available for your requested date, time, and number of guests.")
+                waitlist_form = WaitlistForm.for_booking(form.cleaned_data)
+            except BookingConflict:
+                metrics.booking_attempts.inc(outcome='conflict')
                 messages.warning(
                     request, "No tables available for your requested date, time, and number of guests.")
+                waitlist_form = WaitlistForm.for_booking(form.cleaned_data)
+            except Exception as e:
+                metrics.booking_attempts.inc(outcome='error')
+                messages.error(
+                    request, f"An error occurred during booking: {e}")
+            else:
+                messages.success(
+                    request, f"Your booking for Table {booking.table.number} has been confirmed!")
+                return mark_upcoming_changed(redirect('my_bookings'))
         else:
             messages.error(request, "Please correct the errors in the form.")
     else:
         form = BookingForm()
-    return render(request, 'bookings/make_booking.html', {'form': form})
+    return render(request, 'bookings/make_booking.html', {
+        'form': form,
+        'waitlist_form': waitlist_form,
+    })
 
 
 @login_required
-def my_bookings(request):
-    """Display a list of the current user's bookings."""
-    upcoming_bookings = Booking.objects.filter(
-        user=request.user,
-        booking_date__gte=timezone.now().date()
-    ).order_by('booking_date', 'booking_time')
+@require_POST
+def join_waitlist(request):
+    """Put the user on the waitlist after make_booking found no table."""
+    form = WaitlistForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Please correct the errors to join the waitlist.")
+        return render(request, 'bookings/make_booking.html', {
+            'form': BookingForm(),
+            'waitlist_form': form,
+        })
+
+    entry = form.save(commit=False)
+    entry.user = request.user
+    entry.save()
+    messages.success(
+        request,
+        f"You're on the waitlist for {entry.booking_date:%B %d, %Y}. If a table for "
+        f"{entry.number_of_guests} opens up between {entry.earliest_time:%H:%M} and "
+        f"{entry.latest_time:%H:%M}, we'll book it for you and email you.")
+    return redirect('my_bookings')
 
-    past_bookings = Booking.objects.filter(
-        user=request.user,
-        booking_date__lt=timezone.now().date()
-    ).order_by('-booking_date', '-booking_time')
+
+@login_required
+def my_bookings(request):
+    """Display the current user's upcoming bookings and a page of past ones."""
+    # Archived history lives in a separate table and is only read on request
+    show_archived = request.GET.get('archived') == '1'
+    cursor = decode_cursor(request.GET.get('before'))
+    upcoming_bookings, past_bookings, next_cursor = my_bookings_sections(
+        request.user, cursor=cursor, include_archived=show_archived,
+        fresh=FRESH_UPCOMING_COOKIE in request.COOKIES)
 
     context = {
         'upcoming_bookings': upcoming_bookings,
         'past_bookings': past_bookings,
+        'show_archived': show_archived,
+        'next_cursor': next_cursor,
+        'is_older_page': cursor is not None,
     }
     return render(request, 'bookings/my_bookings.html', context)
 
@@ -203,14 +261,10 @@ def edit_booking(request, booking_id):
             booking_datetime = datetime.combine(booking_date, booking_time)
             booking_datetime = timezone.make_aware(booking_datetime)
 
-            # Define allowed time range (same as in make_booking)
-            opening_time = time(9, 0)
-            closing_time = time(22, 0)
-
-            # Check if booking time is outside of allowed interval
-            if not (opening_time <= booking_time <= closing_time):
-                messages.warning(
-                    request, "Bookings can only be made between 9:00 AM and 10:00 PM.")
+            # Check the booking time against that day's opening hours
+            if not is_open(booking_date, booking_time):
+                messages.warning(request, hours_message(
+                    booking_date, "Bookings can only be made between {hours}."))
                 return render(request, 'bookings/edit_booking.html', {'form': form, 'booking': booking})
 
             # Check if the booking is in the past
@@ -219,53 +273,19 @@ def edit_booking(request, booking_id):
                     request, "You cannot edit a booking to a past time.")
                 return render(request, 'bookings/edit_booking.html', {'form': form, 'booking': booking})
 
-            # Find tables booked at the exact time, excluding the current booking's table
-            booked_tables_ids = Booking.objects.filter(
-                booking_date=booking_date,
-                booking_time=booking_time
-            ).exclude(id=booking.id).values_list('table__id', flat=True)
-
-            # Start with tables that match capacity and aren't booked at that exact time
-            available_tables = Table.objects.filter(
-                capacity__gte=number_of_guests
-            ).exclude(id__in=booked_tables_ids)
-
-            # Further exclude tables booked within 1 hour window, excluding the current booking's table
-            one_hour_before = (datetime.combine(
-                booking_date, booking_time) - timedelta(hours=1)).time()
-            one_hour_after = (datetime.combine(
-                booking_date, booking_time) + timedelta(hours=1)).time()
-
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=booking_date,
-                table__in=available_tables,
-                booking_time__range=(one_hour_before, one_hour_after)
-            ).exclude(id=booking.id)  # Exclude the current booking itself
-
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table__id', flat=True)
-            available_tables = available_tables.exclude(
-                id__in=conflicting_table_ids).order_by('capacity')
-
-            if available_tables.exists():
-                selected_table = available_tables.first()
-                try:
-                    with transaction.atomic():
-                        # Update the existing booking with new data
-                        booking.booking_date = booking_date
-                        booking.booking_time = booking_time
-                        booking.number_of_guests = number_of_guests
-                        booking.table = selected_table  # Assign the newly found table
-                        booking.save()
-                        messages.success(
-                            request, f"Your booking for Table {selected_table.number} has been updated successfully!")
-                        return redirect('my_bookings')
-                except Exception as e:
-                    messages.error(
-                        request, f"An error occurred during booking update: {e}")
-            else:
+            try:
+                _save_booking_change(
+                    booking, booking_date, booking_time, number_of_guests)
+            except (NoTableAvailable, BookingConflict):
                 messages.warning(
                     request, "No tables available for your requested date, time, and number of guests for this edit.")
+            except Exception as e:
+                messages.error(
+                    request, f"An error occurred during booking update: {e}")
+            else:
+                messages.success(
+                    request, f"Your booking for Table {booking.table.number} has been updated successfully!")
+                return mark_upcoming_changed(redirect('my_bookings'))
         else:
             messages.error(request, "Please correct the errors in the form.")
     else:
@@ -278,6 +298,17 @@ def edit_booking(request, booking_id):
     return render(request, 'bookings/edit_booking.html', context)
 
 
+@login_required
+def booking_qr_code(request, booking_id):
+    """Serve the check-in QR code for one of the user's own bookings."""
+    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    response = HttpResponse(
+        get_qr_code(booking.confirmation_code), content_type='image/png')
+    # The code never changes for a booking, so browsers can keep it
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
 # @require_POST
 # @login_required
 # def cancel_booking(request, booking_id):
@@ -302,7 +333,8 @@ def edit_booking(request, booking_id):
 @require_POST
 @login_required
 def cancel_booking(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_object_or_404(
+        Booking.objects.select_related('table'), id=booking_id, user=request.user)
 
     # Combine date and time and make timezone-aware
     booking_datetime = timezone.make_aware(
@@ -318,10 +350,10 @@ def cancel_booking(request, booking_id):
             request, "Bookings cannot be cancelled within 2 hours of the reservation time.")
         return redirect('my_bookings')
 
-    booking.status = 'cancelled'
-    booking.save()
+    _cancel_booking(booking)
+    metrics.bookings_cancelled.inc(source='guest')
     messages.success(request, "Your booking has been successfully cancelled.")
-    return redirect('my_bookings')
+    return mark_upcoming_changed(redirect('my_bookings'))
 
 
 # @staff_member_required
@@ -349,7 +381,7 @@ def cancel_booking(request, booking_id):
 #     return render(request, 'bookings/staff_dashboard.html', context)
 
 def check_availability(request):
-    """View to check table availability based on date, time, and guests, enforcing a ±2 hour rule."""
+    """View to check table availability based on date, time, and guests, allowing for turn times."""
     available_tables = []
 
     if request.method == 'POST':
@@ -359,34 +391,14 @@ def check_availability(request):
             check_time = form.cleaned_data['check_time']
             num_guests = form.cleaned_data['num_guests']
 
-            # Combine date and time into a datetime object
-            requested_datetime = timezone.make_aware(
-                datetime.combine(check_date, check_time))
-            two_hours_before = (requested_datetime - timedelta(hours=2)).time()
-            two_hours_after = (requested_datetime + timedelta(hours=2)).time()
-
-            # Find conflicting bookings within ±2 hours on the same date
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=check_date,
-                booking_time__range=(two_hours_before, two_hours_after),
-                status='confirmed'  # Only confirmed bookings block availability
-            )
+            available_tables = find_available_tables(check_date, check_time, num_guests)
 
-
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table_id', flat=True)
-
-            # Find available tables that meet guest count and are not conflicted
-            available_tables = Table.objects.filter(
-                capacity__gte=num_guests
-            ).exclude(id__in=conflicting_table_ids).order_by('capacity')
-
-            if not available_tables.exists():
+            if not available_tables:
                 messages.warning(
-                    request, "No tables are available within 2 hours of the selected time.")
+                    request, "No tables are available at the selected time.")
             else:
                 messages.success(
-                    request, f"Found {available_tables.count()} table(s) available.")
+                    request, f"Found {len(available_tables)} table(s) available.")
         else:
             messages.error(
                 request, "Please correct the errors to check availability.")
@@ -407,20 +419,16 @@ def staff_dashboard(request):
 
     today = timezone.now().date()
 
-    # Filter bookings with status 'pending' or 'confirmed' and date >= today
-    upcoming_bookings = Booking.objects.filter(
-        booking_date__gte=today,
+    # Counted from the daily rollup rather than the bookings themselves
+    upcoming_active_bookings_count = DailyBookingStats.objects.filter(
+        date__gte=today,
         status__in=['pending', 'confirmed']
-    )
-
-    # Count the number of upcoming active bookings
-    upcoming_active_bookings_count = upcoming_bookings.count()
+    ).aggregate(total=Sum('bookings'))['total'] or 0
 
-    # Count bookings confirmed for today (optional, based on your context)
-    confirmed_today_count = Booking.objects.filter(
-        booking_date=today,
+    confirmed_today_count = DailyBookingStats.objects.filter(
+        date=today,
         status='confirmed'
-    ).count()
+    ).aggregate(total=Sum('bookings'))['total'] or 0
 
     total_tables = Table.objects.count()
 
@@ -438,17 +446,21 @@ def staff_dashboard(request):
 @staff_member_required
 def staff_booking_list(request):
     """List all bookings for staff, with search and filters."""
-    bookings_list = Booking.objects.all().order_by('-booking_date', '-booking_time')
+    bookings_list = Booking.objects.select_related('user', 'table').order_by(
+        '-booking_date', '-booking_time')
 
     query = request.GET.get('q')
     status_filter = request.GET.get('status')
     date_filter = request.GET.get('date')
+    include_archived = request.GET.get('archived') == '1'
+    parsed_date = None
 
     if query:
         bookings_list = bookings_list.filter(
             Q(user__username__icontains=query) |
             Q(table__number__icontains=query) |
-            Q(notes__icontains=query)
+            Q(notes__icontains=query) |
+            Q(confirmation_code=query.strip().upper())
         )
     if status_filter:
         bookings_list = bookings_list.filter(status=status_filter)
@@ -461,6 +473,11 @@ def staff_booking_list(request):
             # Clear the date_filter so it doesn't show invalid value in the form
             date_filter = ''    # Reset to empty
 
+    if include_archived:
+        bookings_list = CombinedBookings(
+            bookings_list,
+            search_archived_bookings(query, status_filter, parsed_date))
+
     paginator = Paginator(bookings_list, 10)  # Show 10 bookings per page
     page = request.GET.get('page')
     try:
@@ -475,6 +492,7 @@ def staff_booking_list(request):
         'query': query,
         'status_filter': status_filter,
         'date_filter': date_filter,
+        'include_archived': include_archived,
         'status_choices': Booking.BOOKING_STATUS_CHOICES,  # Pass choices to template
         'active_tab': 'bookings',
     }
@@ -483,22 +501,124 @@ def staff_booking_list(request):
         'query': query,
         'status_filter': status_filter,
         'date_filter': date_filter,
+        'include_archived': include_archived,
         'status_choices': Booking.BOOKING_STATUS_CHOICES,
         'active_tab': 'bookings',
     })
 
 
+@staff_member_required
+def staff_analytics(request):
+    """Occupancy heatmap, cancellation rates and demand forecast."""
+    # bookings.analytics loads numpy; only pay for that when it is used
+    from .analytics import booking_analytics
+
+    analytics = booking_analytics()
+    heatmap = analytics['heatmap']
+    context = {
+        'analytics': analytics,
+        'heatmap_rows': zip(heatmap['weekdays'], heatmap['occupancy']),
+        'active_tab': 'analytics',
+    }
+    return render(request, 'bookings/staff_analytics.html', context)
+
+
+@staff_member_required
+def staff_analytics_json(request):
+    """The staff analytics figures as JSON."""
+    from .analytics import booking_analytics
+
+    return JsonResponse(booking_analytics())
+
+
+@staff_member_required
+def staff_runsheet(request):
+    """Download the run-sheet PDF for a date (defaults to today)."""
+    date_param = request.GET.get('date')
+    if date_param:
+        try:
+            day = datetime.strptime(date_param, '%Y-%m-%d').date()
+        except ValueError:
+            messages.error(request, "Invalid date format. Please use YYYY-MM-DD.")
+            return redirect('staff_dashboard')
+    else:
+        day = timezone.now().date()
+
+    pdf = get_runsheet_pdf(day)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="runsheet-{day.isoformat()}.pdf"'
+    return response
+
+
+@staff_member_required
+def staff_check_in(request):
+    """
+    Resolve a confirmation code (typed or scanned from the guest's QR code)
+    to its booking and mark the booking seated or completed.
+    """
+    booking = None
+
+    if request.method == 'POST':
+        form = CheckInForm(request.POST)
+        new_status = request.POST.get('status')
+        if form.is_valid() and new_status in ('seated', 'completed'):
+            booking = Booking.objects.select_related('user', 'table').filter(
+                confirmation_code=form.cleaned_data['code']).first()
+            if booking is None:
+                messages.error(request, "No booking found for that confirmation code.")
+            elif booking.status == 'cancelled':
+                messages.error(request, "This booking has been cancelled.")
+            else:
+                booking.status = new_status
+                booking.save(update_fields=['status', 'updated_at'])
+                messages.success(
+                    request, f"Booking {booking.confirmation_code} for {booking.user.username} "
+                             f"at Table {booking.table.number} marked as {booking.get_status_display().lower()}.")
+                return redirect('staff_check_in')
+        else:
+            messages.error(request, "Please enter a valid confirmation code.")
+    else:
+        form = CheckInForm(request.GET or None)
+        if form.is_bound and form.is_valid():
+            booking = Booking.objects.select_related('user', 'table').filter(
+                confirmation_code=form.cleaned_data['code']).first()
+            if booking is None:
+                messages.error(request, "No booking found for that confirmation code.")
+
+    context = {
+        'form': form,
+        'booking': booking,
+        'active_tab': 'check_in',
+    }
+    return render(request, 'bookings/staff_check_in.html', context)
+
+
 @staff_member_required
 def staff_booking_detail(request, booking_id):
     """View and update details of a specific booking."""
     booking = get_object_or_404(Booking, id=booking_id)
 
     if request.method == 'POST':
+        was_cancelled = booking.status == 'cancelled'
         form = BookingStatusUpdateForm(request.POST, instance=booking)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Booking status updated successfully!")
-            return redirect('staff_booking_list')
+            try:
+                with transaction.atomic():
+                    form.save()
+                    if booking.status == 'cancelled' and not was_cancelled:
+                        queue_waitlist_match(
+                            booking.booking_date, booking.booking_time, booking.table.capacity)
+                        transaction.on_commit(
+                            lambda: metrics.bookings_cancelled.inc(source='staff'))
+            except IntegrityError as e:
+                if not is_overlap_error(e):
+                    raise
+                # e.g. reinstating a cancelled booking whose slot was rebooked
+                messages.error(
+                    request, "This table is already booked at that time.")
+            else:
+                messages.success(request, "Booking status updated successfully!")
+                return redirect('staff_booking_list')
         else:
             messages.error(request, "Error updating booking status.")
     else:
@@ -534,11 +654,36 @@ def staff_table_list(request):
     context = {
         'tables': tables,
         'form': form,
+        'import_form': FloorPlanImportForm(),
         'active_tab': 'tables',
     }
     return render(request, 'bookings/staff_table_list.html', context)
 
 
+@staff_member_required
+@require_POST
+def staff_table_import(request):
+    """Create and resize tables in bulk from an uploaded CSV or JSON floor plan."""
+    import_form = FloorPlanImportForm(request.POST, request.FILES)
+    if not import_form.is_valid():
+        messages.error(request, "The floor plan was not imported. Nothing has been changed.")
+        context = {
+            'tables': Table.objects.all().order_by('number'),
+            'form': TableForm(),
+            'import_form': import_form,
+            'active_tab': 'tables',
+        }
+        return render(request, 'bookings/staff_table_list.html', context)
+
+    counts = import_floor_plan(import_form.cleaned_data['floor_plan'])
+    logger.info("Floor plan imported by %s: %s", request.user.username, counts)
+    messages.success(
+        request,
+        f"Floor plan imported: {counts['created']} table(s) added, "
+        f"{counts['updated']} resized, {counts['unchanged']} unchanged.")
+    return redirect('staff_table_list')
+
+
 @staff_member_required
 def staff_table_edit(request, table_id):
     """Edit a specific restaurant table."""
@@ -570,51 +715,32 @@ def staff_table_delete(request, table_id):
     """
     Deletes a specific restaurant table. Protected if it has active bookings.
     """
-    print(
-        f"\n--- DEBUG VIEWS: Entering staff_table_delete for table_id: {table_id} ---")
-
     try:
         table = get_object_or_404(Table, pk=table_id)
-        print(f"DEBUG VIEWS: Retrieved table: {table.number} (PK: {table.pk})")
-
-        # Check related bookings BEFORE the delete attempt
-        related_bookings = Booking.objects.filter(table=table)
-        print(
-            f"DEBUG VIEWS: Number of related bookings for table {table.pk}: {related_bookings.count()}")
-        if related_bookings.exists():
-            print(
-                f"DEBUG VIEWS: Related booking PKs: {[b.pk for b in related_bookings]}")
-            print(
-                f"DEBUG VIEWS: Related booking statuses: {[b.status for b in related_bookings]}")
-        else:
-            print(
-                f"DEBUG VIEWS: No related bookings found for table {table.pk}.")
 
-        # This is the line that should raise ProtectedError if relationships exist and PROTECT is on
+        # Raises ProtectedError if any booking still references the table
         table.delete()
 
-        print(
-            f"DEBUG VIEWS: Table {table.pk} DELETED successfully (THIS SHOULD NOT HAPPEN IF PROTECTED!).")
+        logger.info("Table %s deleted by %s", table.number, request.user.username)
         messages.success(
             request, f"Table {table.number} deleted successfully!")
         return redirect('staff_table_list')  # Returns 302
 
-    except ProtectedError as e:
-        print(
-            f"DEBUG VIEWS: ProtectedError CAUGHT for Table {table_id}. Error: {e}")
+    except ProtectedError:
+        logger.info("Refused to delete table id %s: it still has bookings", table_id)
         messages.error(
             request, "This table cannot be deleted as it has active bookings.")
         # Render the staff table list page with the error message
         tables = Table.objects.all().order_by('number')
         form = TableForm()
-        context = {'tables': tables, 'form': form, 'active_tab': 'tables'}
+        context = {'tables': tables, 'form': form,
+                   'import_form': FloorPlanImportForm(), 'active_tab': 'tables'}
         # Returns 200
         return render(request, 'bookings/staff_table_list.html', context)
 
     except Exception as e:
         # Catch any other unexpected errors during the process
-        print(
-            f"DEBUG VIEWS: An UNEXPECTED ERROR occurred for Table {table_id}: {e}")
+        logger.exception("Unexpected error deleting table id %s", table_id)
         messages.error(
             request, f"An unexpected error occurred while deleting the table: {e}")
         # Redirect to list page even for unexpected errors
@@ -0,0 +1,97 @@
+# bookings/waitlist.py
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import metrics
+from .allocation import BookingConflict, NoTableAvailable, place_booking
+from .db import retry_on_lock
+from .emails import queue_booking_email
+from .jobs import enqueue
+from .models import Booking, WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+
+def queue_waitlist_match(booking_date, booking_time, capacity):
+    """
+    Queue a background match for a slot that was just freed (a cancelled or
+    moved booking on a table seating ``capacity``). Call it inside the
+    transaction that frees the slot so the job only runs if that commits.
+    """
+    return enqueue('match_waitlist', {
+        'date': booking_date.isoformat(),
+        'time': booking_time.isoformat(),
+        'capacity': capacity,
+    })
+
+
+def waitlist_candidates(booking_date, booking_time, capacity, limit=None):
+    """
+    Waiting entries that could take a slot, longest-waiting first: same
+    date, a window covering the time and a party the freed table seats.
+    Guests who already hold a booking inside their window are skipped.
+    """
+    already_booked = Booking.objects.filter(
+        user=OuterRef('user_id'),
+        booking_date=booking_date,
+        booking_time__gte=OuterRef('earliest_time'),
+        booking_time__lte=OuterRef('latest_time'),
+    ).exclude(status='cancelled')
+    candidates = WaitlistEntry.objects.filter(
+        status='waiting',
+        booking_date=booking_date,
+        earliest_time__lte=booking_time,
+        latest_time__gte=booking_time,
+        number_of_guests__lte=capacity,
+    ).exclude(Exists(already_booked)).select_related('user').order_by('created_at', 'id')
+    return list(candidates[:limit or settings.BOOKINGS_WAITLIST_MATCH_LIMIT])
+
+
+@retry_on_lock
+def _book_entry(entry, booking_time):
+    with transaction.atomic():
+        booking = Booking(
+            user=entry.user, booking_date=entry.booking_date, booking_time=booking_time,
+            number_of_guests=entry.number_of_guests, notes=entry.notes, status='confirmed')
+        place_booking(booking)
+        # The guest may have withdrawn since the candidates were read
+        if not WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+                status='booked', booking=booking, updated_at=timezone.now()):
+            transaction.set_rollback(True)
+            return None
+        transaction.on_commit(lambda: metrics.bookings_created.inc(source='waitlist'))
+        queue_booking_email(booking, 'waitlist')
+    return booking
+
+
+def match_waitlist(booking_date, booking_time, capacity):
+    """
+    Book a freed slot for waiting guests in the order they joined. Each
+    candidate gets whatever table place_booking finds at that time; once a
+    party of some size can't be seated, larger parties are not tried.
+    Returns the bookings made.
+    """
+    slot = timezone.make_aware(datetime.combine(booking_date, booking_time))
+    if slot < timezone.now():
+        return []
+
+    booked = []
+    smallest_unseated = None
+    for entry in waitlist_candidates(booking_date, booking_time, capacity):
+        if smallest_unseated is not None and entry.number_of_guests >= smallest_unseated:
+            continue
+        try:
+            booking = _book_entry(entry, booking_time)
+        except (NoTableAvailable, BookingConflict):
+            smallest_unseated = entry.number_of_guests
+            continue
+        if booking is not None:
+            logger.info("Waitlist entry %s booked into table %s at %s %s",
+                        entry.pk, booking.table.number, booking_date, booking_time)
+            booked.append(booking)
+    return booked
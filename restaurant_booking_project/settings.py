@@ -43,29 +43,44 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'bookings.metrics.MetricsMiddleware',
+    'bookings.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'bookings.staticfiles.StaticFilesMiddleware',
+    # ETags on pages, so an unchanged page is answered with 304 Not Modified
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'bookings.auth.CachedAuthenticationMiddleware',
+    'bookings.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'restaurant_booking_project.urls'
 
+# Compiled templates are kept in memory outside development; with DEBUG on,
+# templates are re-read on every render so edits show up straight away
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         # Directory for custom templates
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
@@ -80,9 +95,55 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts rather than on
+            # its first write, so a waiting writer queues on busy_timeout
+            # instead of failing immediately when it tries to upgrade
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Applied to every new SQLite connection by bookings.db.configure_sqlite.
+# WAL lets readers carry on while a booking is written; NORMAL sync is
+# durable against application crashes (a power cut may lose the last commit).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms to wait for the write lock before giving up
+    'cache_size': -20000,  # Negative means KiB: ~20MB page cache per connection
+    'mmap_size': 134217728,  # 128MB of the file memory-mapped for reads
+    'temp_store': 'MEMORY',
+}
+# Write transactions that still hit 'database is locked' are retried
+# (bookings.db.retry_on_lock) with exponential backoff from this delay.
+BOOKINGS_DB_LOCK_RETRIES = 3
+BOOKINGS_DB_LOCK_RETRY_DELAY = 0.05  # seconds
+
+# Old completed/cancelled bookings are moved to ArchivedBooking by
+# `manage.py archive_bookings`. To keep the archive in its own file, add e.g.
+#   DATABASES['archive'] = {'ENGINE': 'django.db.backends.sqlite3',
+#                           'NAME': BASE_DIR / 'archive.sqlite3'}
+# and set BOOKINGS_ARCHIVE_DATABASE = 'archive', then
+# `manage.py migrate --database archive`.
+BOOKINGS_ARCHIVE_DATABASE = None
+BOOKINGS_ARCHIVE_AFTER_DAYS = 180
+
+# Read replica (bookings.routers.ReplicaRouter). GET/HEAD requests read
+# from this alias; writes, POSTs, sessions and jobs stay on 'default', and a
+# browser that just wrote is kept on 'default' for
+# BOOKINGS_REPLICA_STICKY_SECONDS, which should exceed the replication lag.
+# To try it locally with a second SQLite file, add
+#   DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3',
+#                           'NAME': BASE_DIR / 'replica.sqlite3',
+#                           'TEST': {'MIRROR': 'default'}}
+# set BOOKINGS_REPLICA_DATABASE = 'replica' and keep the copy fresh with
+# `manage.py sync_replica --interval 2`.
+BOOKINGS_REPLICA_DATABASE = None
+BOOKINGS_REPLICA_STICKY_SECONDS = 10
+
+DATABASE_ROUTERS = ['bookings.routers.ArchiveRouter', 'bookings.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,12 +182,177 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# With DEBUG off, collectstatic writes content-hashed copies of every file
+# (site.abc123.css) plus .gz and .br variants, and templates link to the
+# hashed names. bookings.staticfiles.StaticFilesMiddleware then serves them
+# with a one-year immutable Cache-Control, so repeat visits don't fetch or
+# revalidate assets at all. Brotli variants need the brotli package.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': ('django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'bookings.staticfiles.CompressedManifestStaticFilesStorage'),
+    },
+}
+# Serve STATIC_ROOT from Django; turn off if a web server in front does it
+BOOKINGS_SERVE_STATIC = not DEBUG
+
+# Pre-generated staff run-sheet PDFs (see `manage.py generate_runsheets`)
+RUNSHEET_ROOT = os.path.join(BASE_DIR, 'runsheets')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Email
+# https://docs.djangoproject.com/en/5.2/topics/email/
+
+DEFAULT_FROM_EMAIL = 'Restaurant Booking <bookings@restaurant-booking.local>'
+if DEBUG:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Booking emails are queued as background jobs (bookings/emails.py)
+BOOKING_EMAIL_BATCH_SIZE = 50  # Messages per SMTP connection
+BOOKING_EMAIL_CONCURRENCY = 2  # Parallel SMTP connections across all workers
+
+
+# Background jobs (bookings/jobs.py, run with `manage.py run_jobs`)
+BOOKINGS_JOBS_EAGER = False  # Run jobs in-process on commit instead of via a worker
+BOOKINGS_JOBS_POLL_INTERVAL = 1.0  # Seconds an idle worker thread sleeps
+BOOKINGS_JOBS_LEASE_SECONDS = 300  # A job leased longer than this is handed to another worker
+BOOKINGS_JOBS_RETRY_BACKOFF = 10  # Seconds before the first retry, doubled on each retry
+BOOKINGS_JOBS_RETRY_BACKOFF_MAX = 3600
+BOOKINGS_JOBS_RETENTION_DAYS = 7  # Finished jobs are pruned after this many days
+
+# Request profiling (bookings/profiling.py). Staff can profile a single
+# request with an `X-Profile: 1` header or `?_profile=1`; set a sample rate
+# to also profile that fraction of all requests. Each profile is written to
+# a directory under BOOKINGS_PROFILE_ROOT with the request path, a cProfile
+# dump and every SQL statement (text only, no parameters), so profiles hold
+# no guest data. Off unless BOOKINGS_PROFILING=1 is set in the environment.
+# In production: turn it on while diagnosing a slow page, keep the sample
+# rate at 0 (or small), point BOOKINGS_PROFILE_ROOT somewhere outside the
+# web root with room to spare and clear it out afterwards.
+BOOKINGS_PROFILING_ENABLED = os.environ.get('BOOKINGS_PROFILING') == '1'
+BOOKINGS_PROFILE_ROOT = os.path.join(BASE_DIR, 'profiles')
+BOOKINGS_PROFILING_SAMPLE_RATE = 0.0
+
+# Prometheus metrics at /metrics (bookings/metrics.py). With several worker
+# processes, point BOOKINGS_METRICS_DIR at a directory they share (cleared
+# on restart) and the endpoint reports the sum across all of them.
+BOOKINGS_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+BOOKINGS_METRICS_DIR = None
+BOOKINGS_METRICS_FLUSH_INTERVAL = 5.0  # Seconds between per-process snapshots
+
+# Logging: one line per record with a timestamp, level and logger name, to
+# stderr where the process manager collects it. Set BOOKINGS_LOG_LEVEL to
+# DEBUG to see the app's debug output.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            'format': 'time={asctime} level={levelname} logger={name} pid={process} msg="{message}"',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'bookings': {
+            'handlers': ['console'],
+            'level': os.environ.get('BOOKINGS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Sessions are read from a per-process cache and written through to the
+# database, and bookings.auth.CachedAuthenticationMiddleware keeps recently
+# seen users in a per-process LRU, so a logged-in request normally needs
+# neither the django_session nor the auth_user query. Logout and any save of
+# the User (password, staff or active changes) drop the entries in the
+# process that handled it and are recorded in UserCacheInvalidation; other
+# processes read those rows at most every BOOKINGS_USER_CACHE_SYNC_INTERVAL
+# seconds, so the change reaches them within that time.
+BOOKINGS_USER_CACHE_SIZE = 1000
+BOOKINGS_USER_CACHE_TTL = 60
+BOOKINGS_USER_CACHE_SYNC_INTERVAL = 2
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'bookings.auth.ShortLivedLocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': BOOKINGS_USER_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': BOOKINGS_USER_CACHE_SIZE},
+    },
+    # Rendered page fragments ({% cache ... using="fragments" %}). Keys vary
+    # on everything a fragment shows (signed in, staff, today's date), so
+    # entries never need explicit invalidation; a deploy starts with an
+    # empty cache. Off in development so template edits show up.
+    'fragments': {
+        'BACKEND': ('django.core.cache.backends.dummy.DummyCache' if DEBUG
+                    else 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': 'fragments',
+        'TIMEOUT': 60 * 60 * 24,
+    },
+}
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# My Bookings caches each user's upcoming bookings in the default cache.
+# Saving or deleting a booking drops its owner's entry, in the process that
+# made the change; with a per-process cache other processes notice within
+# this many seconds, and a shared cache (Redis, Memcached) makes it exact.
+# A guest who makes, edits or cancels a booking gets a cookie that skips
+# the cache on their browser for the same time, so they always see it.
+BOOKINGS_UPCOMING_CACHE_TIMEOUT = 300
+
+# check_availability caches the floor plan and each date's table occupancy
+# in the default cache under a floor-plan version and a per-date version (bookings/availability.py).
+# Table and booking saves move the versions on in the process that made
+# them; other processes notice within this many seconds unless the default
+# cache is shared.
+BOOKINGS_AVAILABILITY_CACHE_TIMEOUT = 60
+
+# Waitlist (bookings/waitlist.py): the time window offered around the
+# requested time when make_booking finds no table, and how many waiting
+# guests one freed slot is tried against.
+BOOKINGS_WAITLIST_WINDOW_MINUTES = 30
+BOOKINGS_WAITLIST_MATCH_LIMIT = 20
+
+# Opening hours and schedule exceptions are compiled into per-date minute
+# masks held in each process (bookings/schedule.py). Edits rebuild them in
+# the process that made them; other processes within this many seconds.
+BOOKINGS_SCHEDULE_TTL = 60
+
+# Turn times (bookings/occupancy.py): how long a booking holds its table when
+# no TurnTimeRule covers the party, and how long other processes keep using
+# their compiled rules after one is edited.
+BOOKINGS_DEFAULT_TURN_MINUTES = 60
+BOOKINGS_TURN_TIME_TTL = 60
+
+# Staff analytics (bookings/analytics.py): weeks of history behind the
+# heatmap, rates and forecast, how many days ahead to forecast, and how long
+# the computed figures are cached.
+BOOKINGS_ANALYTICS_HISTORY_WEEKS = 12
+BOOKINGS_ANALYTICS_FORECAST_DAYS = 14
+BOOKINGS_ANALYTICS_CACHE_TIMEOUT = 300
+
 LOGIN_REDIRECT_URL = 'home'  # Redirect to home page after login
 LOGOUT_REDIRECT_URL = 'home'  # Redirect to home page after logout
 LOGIN_URL = 'login'  # The URL where the login view is located